@@ -1,18 +1,19 @@
-
 # ---------------------------------------------------------------------------- #
 
+import argparse
 import os
 
 # ---------------------------------------------------------------------------- #
 
+import app.database as database
 import app.services as services
 
 # ---------------------------------------------------------------------------- #
 
-if __name__ == "__main__":
+
+def serve(arguments: argparse.Namespace) -> None:
     """
-    Main entry point for the application. Loads the configuration and starts
-    the application server.
+    Start the application server.
     """
     import uvicorn
 
@@ -23,3 +24,62 @@ if __name__ == "__main__":
                 port=port, reload=True, factory=True)
 
 # ---------------------------------------------------------------------------- #
+
+
+def compress_static(arguments: argparse.Namespace) -> None:
+    """
+    Precompress the static files, so they can be served without
+    compressing them on every request.
+    """
+    config = services.get_configuration()
+    directory = arguments.directory or config.static_files.directory
+
+    written = services.compress_static_files(directory)
+    print(f"Wrote {written} compressed files to '{directory}'.")
+
+# ---------------------------------------------------------------------------- #
+
+
+def migrate(arguments: argparse.Namespace) -> None:
+    """
+    Apply the pending database migrations. Run this once per deployment,
+    before the application servers start.
+    """
+    applied = database.get_database().migrate(target=arguments.to)
+    for migration in applied:
+        print(f"Applied migration {migration.version} '{migration.name}'.")
+    print(f"Applied {len(applied)} migrations.")
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    """
+    Main entry point for the application. Loads the configuration and starts
+    the application server, or runs one of the maintenance commands.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app")
+    parser.set_defaults(command=serve)
+    commands = parser.add_subparsers(title="commands")
+
+    commands.add_parser(
+        "serve", help="start the application server (default)"
+    ).set_defaults(command=serve)
+
+    compress_parser = commands.add_parser(
+        "compress-static", help="precompress the static files")
+    compress_parser.add_argument(
+        "--directory", help="static directory (default: from config)")
+    compress_parser.set_defaults(command=compress_static)
+
+    migrate_parser = commands.add_parser(
+        "migrate", help="apply the pending database migrations")
+    migrate_parser.add_argument(
+        "--to", type=int, metavar="VERSION",
+        help="target version (default: latest)")
+    migrate_parser.set_defaults(command=migrate)
+
+    arguments = parser.parse_args()
+    arguments.command(arguments)
+
+# ---------------------------------------------------------------------------- #
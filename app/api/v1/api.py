@@ -5,6 +5,7 @@ import fastapi
 # ---------------------------------------------------------------------------- #
 
 import app.schemas as schemas
+from app.api.v1.endpoints import jobs_router
 from app.api.v1.endpoints import user_router
 from app.api.v1.endpoints import utils_router
 
@@ -16,6 +17,7 @@ router = fastapi.APIRouter(
     tags=[schemas.Tags.api, schemas.Tags.v1]
 )
 
+router.include_router(jobs_router)
 router.include_router(user_router)
 router.include_router(utils_router)
 
@@ -1,5 +1,6 @@
 # ---------------------------------------------------------------------------- #
 
+from .jobs import router as jobs_router
 from .user import router as user_router
 from .utils import router as utils_router
 
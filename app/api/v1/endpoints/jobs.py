@@ -0,0 +1,36 @@
+# ---------------------------------------------------------------------------- #
+
+import fastapi
+
+# ---------------------------------------------------------------------------- #
+
+import app.schemas as schemas
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+
+router = fastapi.APIRouter(prefix="/jobs", tags=[schemas.Tags.jobs])
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/{job_id}", summary="Job Status")
+def jobs_get(
+    job_manager: services.JobManagerDependency,
+    job_id: str = fastapi.Path(..., max_length=32, description="Job id")
+) -> schemas.JobSchema:
+    """
+    Return the status of a background job and, once it has finished, its
+    result or error. This is a synchronous endpoint, as the job store may
+    access the database.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Job not found."
+        )
+    return job
+
+# ---------------------------------------------------------------------------- #
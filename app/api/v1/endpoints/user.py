@@ -1,13 +1,22 @@
 # ---------------------------------------------------------------------------- #
 
+import base64
+import binascii
+import csv
 import fastapi
-from typing import Dict
+import io
+import json
+import pydantic
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi.responses import StreamingResponse
+from typing import AsyncGenerator, AsyncIterable, Dict, List
 
 # ---------------------------------------------------------------------------- #
 
 import app.schemas as schemas
 import app.crud as crud
 import app.database as database
+import app.services as services
 
 # ---------------------------------------------------------------------------- #
 
@@ -18,25 +27,392 @@ router = fastapi.APIRouter(prefix="/user", tags=[schemas.Tags.user])
 
 
 @router.post("/login", summary="User Login")
-async def user_login() -> None:
+async def user_login(
+    session: database.AsyncReadOnlyDatabaseDependency,
+    config: services.ConfigDependency,
+    credentials: schemas.UserLoginSchema = fastapi.Body(
+        ..., description="Login data")
+) -> schemas.TokenSchema:
     """
-    Login a user (not yet implemented).
+    Login a user and return a signed access token. The token is stateless
+    and can be validated without accessing the database. The credentials
+    are only read, so they are looked up on a read replica if there is one.
     """
-    raise NotImplementedError("Login not implemented yet.")
+    user = await crud.user.authenticate_user_async(
+        session=session,
+        username=credentials.username,
+        password=credentials.password
+    )
+
+    if user is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid username or password.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    if user.disabled:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_403_FORBIDDEN,
+            detail="User is disabled."
+        )
+
+    return schemas.TokenSchema(
+        access_token=services.create_token(
+            user_id=user.id, username=user.username),
+        expires_in=config.auth.token_expire_minutes * 60
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("", summary="List Users")
+async def user_list(
+    session: database.AsyncReadOnlyDatabaseDependency,
+    token: services.TokenDependency,
+    sort: schemas.UserSortEnum = fastapi.Query(
+        schemas.UserSortEnum.ID, description="Column to order the users by."),
+    cursor: str | None = fastapi.Query(
+        None, description="Cursor of the page, as returned by the previous "
+                          "page. Omit it for the first page."),
+    limit: int = fastapi.Query(
+        50, ge=1, le=1000, description="Maximum number of users."),
+    disabled: bool | None = fastapi.Query(
+        None, description="Only list (not) disabled users.")
+) -> schemas.UserPageSchema:
+    """
+    List users page by page. Pages are fetched by cursor (keyset
+    pagination), so every page is fetched in constant time, no matter how
+    many users there are. The cursor is only valid for the same sort order.
+    Users are read from a read replica, if configured. Requires an access
+    token.
+    """
+    users = await crud.user.get_users_async(
+        session=session,
+        sort=sort,
+        after=None if cursor is None else _decode_cursor(cursor, sort),
+        limit=limit + 1,
+        disabled=disabled
+    )
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = _encode_cursor(getattr(users[-1], sort.value), sort)
+
+    return schemas.UserPageSchema(users=users, next_cursor=next_cursor)
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get(
+    "/export",
+    summary="Export Users",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def user_export(
+    token: services.TokenDependency,
+    config: services.ConfigDependency,
+    format: schemas.UserExportFormatEnum = fastapi.Query(
+        schemas.UserExportFormatEnum.CSV, description="Export format.")
+) -> StreamingResponse:
+    """
+    Export all users (without passwords) as CSV or NDJSON. The users are
+    read through a server-side cursor (from a read replica, if configured)
+    and streamed chunk by chunk, so memory usage does not depend on the
+    number of users. Requires an access token.
+    """
+    if format == schemas.UserExportFormatEnum.CSV:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        _export_users(
+            format=format,
+            chunk_size=config.database.stream_chunk_size
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="users.{format.value}"'
+        }
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.get("/me", summary="Current User")
+async def user_me(
+    token: services.TokenDependency
+) -> schemas.TokenPayloadSchema:
+    """
+    Return the payload of the access token of the current user. The token
+    is validated without accessing the database.
+    """
+    return token
 
 # ---------------------------------------------------------------------------- #
 
 
 @router.post("/create", summary="Create User")
 async def user_create(
-    session: database.DatabaseDependency,
+    session: database.AsyncDatabaseDependency,
     user: schemas.user.UserCreateSchema = fastapi.Body(
         ..., description="User data")
 ) -> Dict:
     """
     Create a new user.
     """
-    crud.user.create_user(session=session, user=user)
+    await crud.user.create_user_async(session=session, user=user)
     return {"message": f"User '{user.username}' created successfully."}
 
 # ---------------------------------------------------------------------------- #
+
+
+@router.post("/bulk", summary="Create Users in Bulk")
+async def user_bulk_create(
+    session: database.AsyncDatabaseDependency,
+    config: services.ConfigDependency,
+    users: List[schemas.user.UserCreateSchema] = fastapi.Body(
+        ..., description="List of user data")
+) -> schemas.UserBulkResultSchema:
+    """
+    Create multiple users at once. Users are inserted in chunks, users that
+    conflict with existing users are reported instead of failing the request.
+    """
+    return await crud.user.create_users_async(
+        session=session,
+        users=users,
+        chunk_size=config.database.bulk_chunk_size
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.post(
+    "/bulk/job",
+    summary="Create Users in Bulk as Job",
+    status_code=fastapi.status.HTTP_202_ACCEPTED
+)
+async def user_bulk_create_job(
+    job_manager: services.JobManagerDependency,
+    config: services.ConfigDependency,
+    users: List[schemas.user.UserCreateSchema] = fastapi.Body(
+        ..., description="List of user data")
+) -> schemas.JobSchema:
+    """
+    Create multiple users at once in a background job and return the job
+    immediately. Poll the job for the result, which is the same as for the
+    synchronous endpoint.
+    """
+    return await job_manager.submit_threaded(
+        "user_bulk_create",
+        _create_users_job,
+        users,
+        config.database.bulk_chunk_size
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+@router.post(
+    "/import",
+    summary="Import Users from NDJSON",
+    response_class=services.NDJSONStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def user_import(
+    request: fastapi.Request,
+    config: services.ConfigDependency
+) -> services.NDJSONStreamingResponse:
+    """
+    Import users from a newline-delimited JSON body with one user per line.
+    The body is read incrementally and users are written in batches, so
+    memory usage does not depend on the size of the upload. A progress
+    record is streamed back for every batch.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("application/x-ndjson"):
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content type must be 'application/x-ndjson'."
+        )
+
+    return services.NDJSONStreamingResponse(
+        _import_users(
+            stream=request.stream(),
+            batch_size=config.database.bulk_chunk_size
+        )
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _import_users(
+    stream: AsyncIterable[bytes],
+    batch_size: int
+) -> AsyncGenerator[str]:
+    """
+    Read users from an NDJSON stream and write them in batches, yielding an
+    NDJSON progress record per batch. The session is opened here rather
+    than injected, because dependencies are closed before a streaming
+    response is sent.
+    """
+    progress = schemas.UserImportProgressSchema()
+    users: List[schemas.UserCreateSchema] = []
+    line_numbers: List[int] = []
+    pending = 0
+
+    async def flush(session: AsyncSession) -> str:
+        """
+        Write the pending users and return the progress record.
+        """
+        result = await crud.user.create_users_async(
+            session=session, users=users, chunk_size=batch_size)
+        for conflict in result.conflicts:
+            conflict.index = line_numbers[conflict.index]
+
+        progress.batch += 1
+        progress.created += result.created
+        progress.conflicts = result.conflicts
+        users.clear()
+        line_numbers.clear()
+
+        record = progress.model_dump_json() + "\n"
+        progress.errors = []
+        return record
+
+    async for session in database.get_database_async_session():
+        try:
+            async for line_number, line in \
+                    services.iterate_ndjson_lines(stream):
+                progress.lines = line_number + 1
+                pending += 1
+                try:
+                    users.append(
+                        schemas.UserCreateSchema.model_validate_json(line))
+                    line_numbers.append(line_number)
+                except pydantic.ValidationError as exception:
+                    progress.errors.append(schemas.UserImportErrorSchema(
+                        line=line_number,
+                        detail="; ".join(
+                            error["msg"] for error in exception.errors())
+                    ))
+
+                if pending >= batch_size:
+                    pending = 0
+                    yield await flush(session)
+        except services.NDJSONLineTooLongError as exception:
+            progress.errors.append(schemas.UserImportErrorSchema(
+                line=progress.lines, detail=str(exception)))
+
+        if pending:
+            yield await flush(session)
+
+    progress.conflicts = []
+    progress.done = True
+    yield progress.model_dump_json() + "\n"
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _export_users(
+    format: schemas.UserExportFormatEnum,
+    chunk_size: int
+) -> AsyncGenerator[str]:
+    """
+    Stream all users in the given format, one chunk of users at a time. The
+    session is opened here rather than injected, because dependencies are
+    closed before a streaming response is sent.
+    """
+    fields = list(schemas.UserSchema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if format == schemas.UserExportFormatEnum.CSV:
+        writer.writerow(fields)
+        yield buffer.getvalue()
+
+    async for session in database.get_database_read_async_session():
+        async for users in crud.user.iterate_users_async(
+                session=session, chunk_size=chunk_size):
+            if format == schemas.UserExportFormatEnum.CSV:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(
+                    [getattr(user, field) for field in fields]
+                    for user in users
+                )
+                yield buffer.getvalue()
+            else:
+                yield "".join(user.model_dump_json() + "\n" for user in users)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _encode_cursor(value: int | str, sort: schemas.UserSortEnum) -> str:
+    """
+    Encode the last value of a page into an opaque cursor.
+    """
+    return base64.urlsafe_b64encode(
+        json.dumps([sort.value, value]).encode("utf-8")).decode("ascii")
+
+# ---------------------------------------------------------------------------- #
+
+
+def _decode_cursor(cursor: str, sort: schemas.UserSortEnum) -> int | str:
+    """
+    Decode a cursor into the last value of the previous page. Raises a 400
+    (Bad Request) if the cursor is invalid or belongs to another sort
+    order.
+    """
+    try:
+        cursor_sort, value = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        cursor_sort, value = None, None
+
+    expected_type = int if sort == schemas.UserSortEnum.ID else str
+    if cursor_sort != sort.value or type(value) is not expected_type:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+    return value
+
+# ---------------------------------------------------------------------------- #
+
+
+def _create_users_job(
+    users: List[schemas.UserCreateSchema],
+    chunk_size: int
+) -> schemas.UserBulkResultSchema:
+    """
+    Create users in bulk on a worker thread. The job runs outside of the
+    request, so it opens a session of its own. It is submitted with
+    submit_threaded(), so it runs in this process, which has a database
+    connection and whose crud cache is invalidated by the job.
+    """
+    result = schemas.UserBulkResultSchema()
+    for session in database.get_database_session():
+        result = crud.user.create_users(
+            session=session, users=users, chunk_size=chunk_size)
+    return result
+
+# ---------------------------------------------------------------------------- #
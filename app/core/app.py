@@ -79,6 +79,9 @@ def create_app() -> fastapi.FastAPI:
         from app.services import TemplateHeaderMiddleware
         app.add_middleware(TemplateHeaderMiddleware)
 
+    if config.headers.enabled:
+        app.add_middleware(services.HeaderPolicyMiddleware)
+
     if config.gzip.enabled:
         app.add_middleware(
             GZipMiddleware,
@@ -86,9 +89,19 @@ def create_app() -> fastapi.FastAPI:
             compresslevel=config.gzip.compression_level
         )
 
+    if config.metrics.enabled:
+        app.add_middleware(services.MetricsMiddleware)
+
     app.include_router(router_api_v1)
     app.include_router(router_gui_v1)
 
+    if config.metrics.enabled:
+        app.add_api_route(
+            config.metrics.path,
+            services.metrics_endpoint,
+            include_in_schema=False
+        )
+
     app.add_exception_handler(
         Exception, exceptions.exception_handler)
     app.add_exception_handler(
@@ -97,6 +110,8 @@ def create_app() -> fastapi.FastAPI:
         HTTPException, exceptions.http_exception_handler)
     app.add_exception_handler(
         StarlettHTTPException, exceptions.http_exception_handler)
+    app.add_exception_handler(
+        services.WorkerPoolFullError, exceptions.worker_pool_full_handler)
 
     return app
 
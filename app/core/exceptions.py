@@ -53,3 +53,22 @@ async def http_exception_handler(
     )
 
 # ---------------------------------------------------------------------------- #
+
+
+async def worker_pool_full_handler(
+    request: fastapi.Request,
+    exception: Exception
+) -> fastapi.responses.JSONResponse:
+    """
+    Exception handler for tasks rejected because the worker pool queue is
+    full. The client is asked to retry later.
+    """
+    logger.warning(
+        f"Worker pool full for url '{request.url}'.")
+    return fastapi.responses.JSONResponse(
+        status_code=fastapi.status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service Unavailable"},
+        headers={"Retry-After": "1"}
+    )
+
+# ---------------------------------------------------------------------------- #
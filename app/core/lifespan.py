@@ -28,21 +28,36 @@ async def lifespan(app: fastapi.FastAPI) -> AsyncGenerator:
     """
     config = services.get_configuration()
 
+    # fail before serving requests if tokens could be forged
+    services.get_secret_key()
+
     database_instance = database.get_database()
 
     database_instance.connect()
 
+    if config.static_files.enabled and config.static_files.fingerprint:
+        services.get_asset_manifest()
+
+    if config.templates.enabled and config.templates.precompile:
+        services.precompile_templates()
+
     if config.workers.enabled:
         worker_pool = services.get_worker_pool()
+        thread_worker_pool = services.get_thread_worker_pool()
 
     logger.info("Application startup complete.")
 
     yield
 
-    database_instance.disconnect()
-
+    # finish the jobs (and store their results) before the database is
+    # disconnected
     if config.workers.enabled:
         worker_pool.shutdown(wait=True)
+        if thread_worker_pool is not worker_pool:
+            thread_worker_pool.shutdown(wait=True)
+
+    await database_instance.disconnect_async()
+    database_instance.disconnect()
 
     logger.info("Application shutdown complete.")
 
@@ -1,5 +1,7 @@
 # ---------------------------------------------------------------------------- #
 
+from .cache import *
 from .user import *
+from .job import *
 
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,277 @@
+# ---------------------------------------------------------------------------- #
+
+import abc
+import json
+import logging
+from functools import lru_cache
+from typing import Any
+
+try:
+    import redis  # type: ignore[import-not-found]
+except ImportError:
+    redis = None
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+import app.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.crud")
+
+# ---------------------------------------------------------------------------- #
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface of the backends of the crud cache. Keys are strings, values
+    are JSON-compatible (dicts, lists, strings, numbers, booleans or None),
+    so they can be stored out of process. Lookups of missing or expired keys
+    raise a KeyError, so None can be cached as a regular (negative) value.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Any:
+        """
+        Get a value. Raises a KeyError if the key is not cached.
+        """
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Add a value that expires after ttl seconds.
+        """
+
+    @abc.abstractmethod
+    def delete(self, *keys: str) -> None:
+        """
+        Remove values if present.
+        """
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """
+        Remove all values.
+        """
+
+# ---------------------------------------------------------------------------- #
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process cache backend with least-recently-used eviction and a
+    time-to-live per entry. Every process has a cache of its own.
+    """
+    _cache: services.TTLCache[str, Any]
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Initialize the backend with a maximum number of entries.
+        """
+        self._cache = services.TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value. Raises a KeyError if the key is not cached.
+        """
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Add a value that expires after ttl seconds.
+        """
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, *keys: str) -> None:
+        """
+        Remove values if present.
+        """
+        for key in keys:
+            self._cache.delete(key)
+
+    def clear(self) -> None:
+        """
+        Remove all values.
+        """
+        self._cache.clear()
+
+# ---------------------------------------------------------------------------- #
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache backend storing JSON-encoded values in Redis (or any server or
+    client with a compatible get, set and delete API), so the cache is
+    shared by all processes. Keys are prefixed to keep them apart from
+    other data. The client must return bytes or strings for get().
+    """
+    _client: Any
+    _prefix: str
+
+    def __init__(self, client: Any, prefix: str = "app:crud:") -> None:
+        """
+        Initialize the backend with a Redis client.
+        """
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value. Raises a KeyError if the key is not cached.
+        """
+        value = self._client.get(self._prefix + key)
+        if value is None:
+            raise KeyError(key)
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Add a value that expires after ttl seconds.
+        """
+        self._client.set(
+            self._prefix + key,
+            json.dumps(value),
+            px=max(1, int(ttl * 1000))
+        )
+
+    def delete(self, *keys: str) -> None:
+        """
+        Remove values if present.
+        """
+        if keys:
+            self._client.delete(*(self._prefix + key for key in keys))
+
+    def clear(self) -> None:
+        """
+        Remove all values with the prefix of the backend.
+        """
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+# ---------------------------------------------------------------------------- #
+
+
+class CrudCache:
+    """
+    Read-through cache of the crud functions. Values are looked up by keys
+    of the form entity:field:value (e.g. user:id:1) and stored in a
+    pluggable backend. Hits and misses are counted per entity and exported
+    as metrics if metrics are enabled.
+    """
+    backend: CacheBackend
+    hits: int
+    misses: int
+    _ttl: float
+    _negative_ttl: float
+    _hits: services.Counter | None
+    _misses: services.Counter | None
+
+    def __init__(self, backend: CacheBackend) -> None:
+        """
+        Initialize the cache with a backend and the time-to-live of the
+        configuration.
+        """
+        config = services.get_configuration()
+
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._ttl = config.cache.ttl
+        self._negative_ttl = config.cache.negative_ttl
+        self._hits = None
+        self._misses = None
+
+        if config.metrics.enabled:
+            registry = services.get_metrics_registry()
+            self._hits = registry.counter(
+                "crud_cache_hits_total",
+                "Crud lookups answered by the cache.",
+                label_names=("entity",))
+            self._misses = registry.counter(
+                "crud_cache_misses_total",
+                "Crud lookups not answered by the cache.",
+                label_names=("entity",))
+
+        logger.info(f"Crud cache initialized ({type(backend).__name__}).")
+
+    def get(self, key: str) -> Any:
+        """
+        Get a value. Raises a KeyError if the key is not cached.
+        """
+        entity = key.partition(":")[0]
+        try:
+            value = self.backend.get(key)
+        except KeyError:
+            self.misses += 1
+            if self._misses is not None:
+                self._misses.inc(labels=(entity,))
+            raise
+
+        self.hits += 1
+        if self._hits is not None:
+            self._hits.inc(labels=(entity,))
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Add a value. None (an unknown key) is kept for a shorter time, so
+        repeated lookups of unknown keys do not hit the database.
+        """
+        self.backend.set(
+            key, value, self._negative_ttl if value is None else self._ttl)
+
+    def delete(self, *keys: str) -> None:
+        """
+        Remove values, e.g. after a write.
+        """
+        self.backend.delete(*keys)
+
+    def clear(self) -> None:
+        """
+        Remove all values.
+        """
+        self.backend.clear()
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_crud_cache() -> CrudCache:
+    """
+    Returns the crud cache with the backend of the configuration.
+    """
+    config = services.get_configuration()
+
+    backend: CacheBackend
+    if config.cache.backend == schemas.CacheBackendEnum.REDIS:
+        if redis is None:
+            raise Exception(
+                "The redis cache backend requires the redis package.")
+        backend = RedisCacheBackend(redis.Redis.from_url(
+            services.resolve_placeholders(config.cache.redis_url)))
+    else:
+        backend = MemoryCacheBackend(
+            maxsize=config.cache.max_size, ttl=config.cache.ttl)
+
+    return CrudCache(backend)
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_credentials_cache(
+) -> services.TTLCache[str, schemas.UserCredentialsSchema]:
+    """
+    Returns the cache of the credentials used to authenticate users, by
+    username. It contains password hashes, so unlike the crud cache it is
+    always kept in process and never shared (e.g. through Redis). Writes
+    only forget the credentials in their own process, so entries expire
+    after credentials_ttl seconds.
+    """
+    config = services.get_configuration()
+    return services.TTLCache(
+        maxsize=config.cache.max_size, ttl=config.cache.credentials_ttl)
+
+# ---------------------------------------------------------------------------- #
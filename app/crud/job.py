@@ -0,0 +1,70 @@
+# ---------------------------------------------------------------------------- #
+
+import sqlalchemy
+import sqlmodel
+import time
+
+# ---------------------------------------------------------------------------- #
+
+from app.models.job import *
+from app.schemas.job import *
+
+# ---------------------------------------------------------------------------- #
+
+
+def save_job(
+    session: sqlmodel.Session,
+    job: JobSchema,
+    expires: float
+) -> None:
+    """
+    Insert or update a job in the database. The job is kept until expires
+    (unix time).
+    """
+    session.merge(Job(
+        id=job.id,
+        name=job.name,
+        status=job.status.value,
+        created=job.created,
+        finished=job.finished,
+        expires=expires,
+        result=job.result,
+        error=job.error
+    ))
+    session.commit()
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_job(session: sqlmodel.Session, job_id: str) -> JobSchema | None:
+    """
+    Get a job from the database by its id. Expired jobs are not returned.
+    """
+    database_job = session.get(Job, job_id)
+    if database_job is None or database_job.expires < time.time():
+        return None
+
+    return JobSchema(
+        id=database_job.id,
+        name=database_job.name,
+        status=JobStatusEnum(database_job.status),
+        created=database_job.created,
+        finished=database_job.finished,
+        result=database_job.result,
+        error=database_job.error
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def delete_expired_jobs(session: sqlmodel.Session) -> None:
+    """
+    Delete all expired jobs from the database.
+    """
+    session.execute(
+        sqlalchemy.delete(Job).where(
+            sqlmodel.col(Job.expires) < time.time())
+    )
+    session.commit()
+
+# ---------------------------------------------------------------------------- #
@@ -1,9 +1,18 @@
 # ---------------------------------------------------------------------------- #
 
+import asyncio
+import sqlalchemy
 import sqlmodel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, Generator, Iterable, List, \
+    Sequence, Set, Tuple
 
 # ---------------------------------------------------------------------------- #
 
+import app.services as services
+from app.crud.cache import get_credentials_cache, get_crud_cache
 from app.models.user import *
 from app.schemas.user import *
 
@@ -16,12 +25,13 @@ def create_user(
     commit: bool = True
 ) -> User:
     """
-    Create a new user in the database.
+    Create a new user in the database. The password is hashed before it is
+    stored.
     """
     database_user = User(
         username=user.username,
         email=user.email,
-        password=user.password,
+        password=services.hash_password(user.password),
         disabled=False
     )
 
@@ -30,6 +40,790 @@ def create_user(
         session.commit()
         session.refresh(database_user)
 
+    _forget_users([database_user.id], [user.username], [user.email])
+
     return database_user
 
 # ---------------------------------------------------------------------------- #
+
+
+async def create_user_async(
+    session: AsyncSession,
+    user: UserCreateSchema,
+    commit: bool = True
+) -> User:
+    """
+    Create a new user in the database using an async session. This does not
+    block the event loop while waiting for the database or while hashing the
+    password.
+    """
+    database_user = User(
+        username=user.username,
+        email=user.email,
+        password=await services.hash_password_async(user.password),
+        disabled=False
+    )
+
+    session.add(database_user)
+    if commit:
+        await session.commit()
+        await session.refresh(database_user)
+
+    _forget_users([database_user.id], [user.username], [user.email])
+
+    return database_user
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_users(
+    session: sqlmodel.Session,
+    users: Sequence[UserCreateSchema],
+    chunk_size: int = 1000
+) -> UserBulkResultSchema:
+    """
+    Create multiple users in the database. The users are written in chunks
+    of chunk_size rows, each chunk using a single existence check and a
+    single multi-row INSERT ... RETURNING statement. The passwords are hashed
+    between the two, outside of any transaction. Users that conflict with
+    existing users (or with other users of the same request) on the unique
+    username or email are reported in the result instead of aborting the
+    whole batch. Every chunk is committed on its own. Passwords are hashed
+    before they are stored.
+    """
+    result = UserBulkResultSchema()
+    seen: Tuple[Set[str], Set[str]] = (set(), set())
+    ids: List[int] = []
+
+    for offset in range(0, len(users), chunk_size):
+        chunk = list(enumerate(users[offset:offset + chunk_size], offset))
+
+        existing = session.exec(_select_existing_users(chunk)).all()
+        # end the transaction of the check, so no connection (and no lock)
+        # is held while the passwords are hashed
+        session.commit()
+        accepted = _filter_conflicts(chunk, existing, seen, result)
+        if not accepted:
+            continue
+
+        rows = _user_rows(accepted, [
+            services.hash_password(user.password) for _, user in accepted
+        ])
+
+        try:
+            created = session.exec(_insert_users(), params=rows).all()
+            session.commit()
+            result.created += len(created)
+            ids.extend(row[0] for row in created)
+        except sqlalchemy.exc.IntegrityError:
+            # another writer created a conflicting user in the meantime,
+            # fall back to row-by-row inserts for this chunk
+            session.rollback()
+            for (index, user), row in zip(accepted, rows):
+                try:
+                    ids.extend(row[0] for row in session.exec(
+                        _insert_users(), params=[row]).all())
+                    session.commit()
+                    result.created += 1
+                except sqlalchemy.exc.IntegrityError:
+                    session.rollback()
+                    existing = session.exec(
+                        _select_existing_users([(index, user)])).all()
+                    result.conflicts.append(_conflict(
+                        index, user, _conflicting_fields(user, existing)))
+
+    _forget_users(ids, [user.username for user in users],
+                  [user.email for user in users])
+
+    return result
+
+# ---------------------------------------------------------------------------- #
+
+
+async def create_users_async(
+    session: AsyncSession,
+    users: Sequence[UserCreateSchema],
+    chunk_size: int = 1000
+) -> UserBulkResultSchema:
+    """
+    Create multiple users in the database using an async session. See
+    create_users() for details on chunking and conflict handling. The
+    passwords of a chunk are hashed in parallel off the event loop.
+    """
+    result = UserBulkResultSchema()
+    seen: Tuple[Set[str], Set[str]] = (set(), set())
+    ids: List[int] = []
+
+    for offset in range(0, len(users), chunk_size):
+        chunk = list(enumerate(users[offset:offset + chunk_size], offset))
+
+        existing = (await session.exec(_select_existing_users(chunk))).all()
+        # end the transaction of the check, so no connection (and no lock)
+        # is held while the passwords are hashed
+        await session.commit()
+        accepted = _filter_conflicts(chunk, existing, seen, result)
+        if not accepted:
+            continue
+
+        rows = _user_rows(accepted, await services.hash_passwords_async(
+            [user.password for _, user in accepted]))
+
+        try:
+            created = (await session.exec(_insert_users(), params=rows)).all()
+            await session.commit()
+            result.created += len(created)
+            ids.extend(row[0] for row in created)
+        except sqlalchemy.exc.IntegrityError:
+            # another writer created a conflicting user in the meantime,
+            # fall back to row-by-row inserts for this chunk
+            await session.rollback()
+            for (index, user), row in zip(accepted, rows):
+                try:
+                    ids.extend(row[0] for row in (await session.exec(
+                        _insert_users(), params=[row])).all())
+                    await session.commit()
+                    result.created += 1
+                except sqlalchemy.exc.IntegrityError:
+                    await session.rollback()
+                    existing = (await session.exec(
+                        _select_existing_users([(index, user)]))).all()
+                    result.conflicts.append(_conflict(
+                        index, user, _conflicting_fields(user, existing)))
+
+    _forget_users(ids, [user.username for user in users],
+                  [user.email for user in users])
+
+    return result
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_user_by_id(
+    session: sqlmodel.Session,
+    user_id: int
+) -> UserSchema | None:
+    """
+    Get a user by its id. The user is read through the crud cache.
+    """
+    record = _get_user_record(session, "id", user_id)
+    return None if record is None else UserSchema.model_validate(record)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_user_by_id_async(
+    session: AsyncSession,
+    user_id: int
+) -> UserSchema | None:
+    """
+    Get a user by its id using an async session. The user is read through
+    the crud cache.
+    """
+    record = await _get_user_record_async(session, "id", user_id)
+    return None if record is None else UserSchema.model_validate(record)
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_user_by_username(
+    session: sqlmodel.Session,
+    username: str
+) -> UserSchema | None:
+    """
+    Get a user by its unique username. The user is read through the crud
+    cache.
+    """
+    record = _get_user_record(session, "username", username)
+    return None if record is None else UserSchema.model_validate(record)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_user_by_username_async(
+    session: AsyncSession,
+    username: str
+) -> UserSchema | None:
+    """
+    Get a user by its unique username using an async session. The user is
+    read through the crud cache.
+    """
+    record = await _get_user_record_async(session, "username", username)
+    return None if record is None else UserSchema.model_validate(record)
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_user_by_email(
+    session: sqlmodel.Session,
+    email: str
+) -> UserSchema | None:
+    """
+    Get a user by its unique email. The user is read through the crud
+    cache.
+    """
+    record = _get_user_record(session, "email", email)
+    return None if record is None else UserSchema.model_validate(record)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_user_by_email_async(
+    session: AsyncSession,
+    email: str
+) -> UserSchema | None:
+    """
+    Get a user by its unique email using an async session. The user is read
+    through the crud cache.
+    """
+    record = await _get_user_record_async(session, "email", email)
+    return None if record is None else UserSchema.model_validate(record)
+
+# ---------------------------------------------------------------------------- #
+
+
+def update_user(
+    session: sqlmodel.Session,
+    user_id: int,
+    user: UserUpdateSchema
+) -> UserSchema | None:
+    """
+    Update the fields of a user that are set in user. A new password is
+    hashed before the user is read, so no transaction is open meanwhile.
+    The cached user is forgotten under its old and new keys. Returns the
+    updated user, or None if there is no user with the id.
+    """
+    values = user.model_dump(exclude_unset=True)
+    if "password" in values:
+        values["password"] = services.hash_password(values["password"])
+
+    database_user = session.get(User, user_id)
+    if database_user is None:
+        return None
+    emails = [database_user.email]
+    database_user.sqlmodel_update(values)
+
+    session.add(database_user)
+    session.commit()
+    session.refresh(database_user)
+
+    _forget_users([database_user.id], [database_user.username],
+                  [*emails, database_user.email])
+
+    return UserSchema.model_validate(database_user, from_attributes=True)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def update_user_async(
+    session: AsyncSession,
+    user_id: int,
+    user: UserUpdateSchema
+) -> UserSchema | None:
+    """
+    Update the fields of a user using an async session. See update_user()
+    for details.
+    """
+    values = user.model_dump(exclude_unset=True)
+    if "password" in values:
+        values["password"] = await services.hash_password_async(
+            values["password"])
+
+    database_user = await session.get(User, user_id)
+    if database_user is None:
+        return None
+    emails = [database_user.email]
+    database_user.sqlmodel_update(values)
+
+    session.add(database_user)
+    await session.commit()
+    await session.refresh(database_user)
+
+    _forget_users([database_user.id], [database_user.username],
+                  [*emails, database_user.email])
+
+    return UserSchema.model_validate(database_user, from_attributes=True)
+
+# ---------------------------------------------------------------------------- #
+
+
+def disable_user(
+    session: sqlmodel.Session,
+    user_id: int
+) -> UserSchema | None:
+    """
+    Disable a user, so it can no longer log in. Returns the updated user,
+    or None if there is no user with the id.
+    """
+    return update_user(session, user_id, UserUpdateSchema(disabled=True))
+
+# ---------------------------------------------------------------------------- #
+
+
+async def disable_user_async(
+    session: AsyncSession,
+    user_id: int
+) -> UserSchema | None:
+    """
+    Disable a user using an async session. See disable_user() for details.
+    """
+    return await update_user_async(
+        session, user_id, UserUpdateSchema(disabled=True))
+
+# ---------------------------------------------------------------------------- #
+
+
+def delete_user(
+    session: sqlmodel.Session,
+    user_id: int
+) -> bool:
+    """
+    Delete a user. The cached user is forgotten. Returns False if there is
+    no user with the id.
+    """
+    database_user = session.get(User, user_id)
+    if database_user is None:
+        return False
+    username, email = database_user.username, database_user.email
+
+    session.delete(database_user)
+    session.commit()
+
+    _forget_users([user_id], [username], [email])
+
+    return True
+
+# ---------------------------------------------------------------------------- #
+
+
+async def delete_user_async(
+    session: AsyncSession,
+    user_id: int
+) -> bool:
+    """
+    Delete a user using an async session. See delete_user() for details.
+    """
+    database_user = await session.get(User, user_id)
+    if database_user is None:
+        return False
+    username, email = database_user.username, database_user.email
+
+    await session.delete(database_user)
+    await session.commit()
+
+    _forget_users([user_id], [username], [email])
+
+    return True
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_users(
+    session: sqlmodel.Session,
+    sort: UserSortEnum = UserSortEnum.ID,
+    after: int | str | None = None,
+    limit: int = 50,
+    disabled: bool | None = None
+) -> List[UserSchema]:
+    """
+    Get a page of users ordered by a unique column, starting after the given
+    value of that column (keyset pagination). Unlike with an offset, the
+    database seeks to the first row of the page using the index of the
+    column, so a page deep into the table is as fast as the first one. Only
+    the public columns are selected, never the password.
+    """
+    rows = session.exec(_select_users(sort, after, limit, disabled)).all()
+    return [UserSchema.model_validate(row, from_attributes=True)
+            for row in rows]
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_users_async(
+    session: AsyncSession,
+    sort: UserSortEnum = UserSortEnum.ID,
+    after: int | str | None = None,
+    limit: int = 50,
+    disabled: bool | None = None
+) -> List[UserSchema]:
+    """
+    Get a page of users using an async session. See get_users() for
+    details.
+    """
+    rows = (await session.exec(
+        _select_users(sort, after, limit, disabled))).all()
+    return [UserSchema.model_validate(row, from_attributes=True)
+            for row in rows]
+
+# ---------------------------------------------------------------------------- #
+
+
+def iterate_users(
+    session: sqlmodel.Session,
+    chunk_size: int = 1000
+) -> Generator[List[UserSchema]]:
+    """
+    Iterate over all users ordered by id in chunks of chunk_size users. The
+    rows are fetched through a server-side cursor (where the driver
+    supports it), so only one chunk is held in memory at a time, no matter
+    how many users there are. Only the public columns are selected.
+    """
+    result = session.exec(_select_users(UserSortEnum.ID).execution_options(
+        yield_per=chunk_size))
+    for rows in result.partitions():
+        yield [UserSchema.model_validate(row, from_attributes=True)
+               for row in rows]
+
+# ---------------------------------------------------------------------------- #
+
+
+async def iterate_users_async(
+    session: AsyncSession,
+    chunk_size: int = 1000
+) -> AsyncGenerator[List[UserSchema]]:
+    """
+    Iterate over all users in chunks using an async session. See
+    iterate_users() for details.
+    """
+    result = await session.stream(_select_users(
+        UserSortEnum.ID).execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        yield [UserSchema.model_validate(row, from_attributes=True)
+               for row in rows]
+
+# ---------------------------------------------------------------------------- #
+
+
+async def authenticate_user_async(
+    session: AsyncSession,
+    username: str,
+    password: str
+) -> UserCredentialsSchema | None:
+    """
+    Authenticate a user by username and password. The credentials are
+    looked up in the in-process credentials cache, as password hashes are
+    never put into the (possibly shared) crud cache, which answers unknown
+    usernames (cached negatively). Otherwise they are read from the
+    database. The password is verified off the event loop. For unknown
+    users a dummy hash is verified, so the response time does not reveal
+    whether a username exists. The transaction of the session is committed
+    before the password is verified, so its connection is released
+    meanwhile. Returns the credentials if the password is correct,
+    otherwise None.
+    """
+    try:
+        credentials: UserCredentialsSchema | None = \
+            get_credentials_cache().get(username)
+    except KeyError:
+        credentials = None
+        if not _is_unknown_user("username", username):
+            user = (await session.exec(
+                _select_credentials(username))).first()
+            _cache_user("username", username, user)
+            if user is not None:
+                credentials = UserCredentialsSchema.model_validate(
+                    user, from_attributes=True)
+                get_credentials_cache().set(username, credentials)
+
+            # release the connection before the (slow) password
+            # verification
+            await session.commit()
+
+    if credentials is None:
+        await services.verify_password_async(
+            password, await asyncio.to_thread(_dummy_password_hash))
+        return None
+
+    if not await services.verify_password_async(
+            password, credentials.password):
+        return None
+
+    return credentials
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def _dummy_password_hash() -> str:
+    """
+    Returns a password hash used to equalize verification time for unknown
+    users. Hashing is slow, so call it off the event loop.
+    """
+    return services.hash_password("dummy-password")
+
+# ---------------------------------------------------------------------------- #
+
+
+def _select_existing_users(
+    chunk: Sequence[Tuple[int, UserCreateSchema]]
+) -> Select[Tuple[str, str]]:
+    """
+    Build a query returning the usernames and emails of all existing users
+    that conflict with any user in the chunk.
+    """
+    usernames = [user.username for _, user in chunk]
+    emails = [user.email for _, user in chunk]
+
+    return sqlmodel.select(User.username, User.email).where(
+        sqlmodel.or_(
+            sqlmodel.col(User.username).in_(usernames),
+            sqlmodel.col(User.email).in_(emails)
+        )
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def _select_users(
+    sort: UserSortEnum,
+    after: int | str | None = None,
+    limit: int | None = None,
+    disabled: bool | None = None
+) -> Select[Tuple[int, str, str, bool]]:
+    """
+    Build a keyset pagination query for the public columns of users.
+    """
+    column = sqlmodel.col(User.username) if sort == UserSortEnum.USERNAME \
+        else sqlmodel.col(User.id)
+
+    query = sqlmodel.select(User.id, User.username, User.email, User.disabled)
+    if after is not None:
+        query = query.where(column > after)
+    if disabled is not None:
+        query = query.where(User.disabled == disabled)
+
+    query = query.order_by(column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+# ---------------------------------------------------------------------------- #
+
+
+def _insert_users() -> Any:
+    """
+    Build a multi-row insert statement for users returning the new ids.
+    """
+    return sqlalchemy.insert(User).returning(sqlmodel.col(User.id))
+
+# ---------------------------------------------------------------------------- #
+
+
+def _user_rows(
+    accepted: Sequence[Tuple[int, UserCreateSchema]],
+    password_hashes: Sequence[str]
+) -> List[Dict[str, Any]]:
+    """
+    Convert users and their hashed passwords into parameter rows for the
+    insert statement.
+    """
+    return [
+        {
+            "username": user.username,
+            "email": user.email,
+            "password": password_hash,
+            "disabled": False
+        }
+        for (_, user), password_hash in zip(accepted, password_hashes)
+    ]
+
+# ---------------------------------------------------------------------------- #
+
+
+def _user_key(field: str, value: int | str) -> str:
+    """
+    Get the crud cache key of a user by a unique field.
+    """
+    return f"user:{field}:{value}"
+
+# ---------------------------------------------------------------------------- #
+
+
+def _select_user(field: str, value: int | str) -> Any:
+    """
+    Build a query for the public columns of a user by a unique field.
+    """
+    return sqlmodel.select(
+        User.id, User.username, User.email, User.disabled
+    ).where(getattr(User, field) == value)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _select_credentials(username: str) -> Any:
+    """
+    Build a query for a user with its credentials by its username.
+    """
+    return sqlmodel.select(User).where(User.username == username)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _is_unknown_user(field: str, value: int | str) -> bool:
+    """
+    Check if the crud cache knows that there is no user with the value.
+    """
+    try:
+        return get_crud_cache().get(_user_key(field, value)) is None
+    except KeyError:
+        return False
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_user_record(
+    session: sqlmodel.Session,
+    field: str,
+    value: int | str
+) -> Dict[str, Any] | None:
+    """
+    Get the public columns of a user by a unique field through the crud
+    cache.
+    """
+    try:
+        record: Dict[str, Any] | None = get_crud_cache().get(
+            _user_key(field, value))
+        return record
+    except KeyError:
+        user = session.exec(_select_user(field, value)).first()
+        return _cache_user(field, value, user)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _get_user_record_async(
+    session: AsyncSession,
+    field: str,
+    value: int | str
+) -> Dict[str, Any] | None:
+    """
+    Get the public columns of a user by a unique field through the crud
+    cache using an async session.
+    """
+    try:
+        record: Dict[str, Any] | None = get_crud_cache().get(
+            _user_key(field, value))
+        return record
+    except KeyError:
+        user = (await session.exec(_select_user(field, value))).first()
+        return _cache_user(field, value, user)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _cache_user(
+    field: str,
+    value: int | str,
+    user: Any
+) -> Dict[str, Any] | None:
+    """
+    Cache a user read from the database under all its unique keys, or that
+    there is no user with the value. Only the public fields are cached,
+    never the password hash, as the cache may be shared (e.g. Redis).
+    Returns the cached record.
+    """
+    cache = get_crud_cache()
+    if user is None:
+        cache.set(_user_key(field, value), None)
+        return None
+
+    record = UserSchema.model_validate(user, from_attributes=True).model_dump()
+    for unique in ("id", "username", "email"):
+        cache.set(_user_key(unique, record[unique]), record)
+    return record
+
+# ---------------------------------------------------------------------------- #
+
+
+def _forget_users(
+    ids: Iterable[int | None],
+    usernames: Iterable[str],
+    emails: Iterable[str]
+) -> None:
+    """
+    Remove (negatively) cached users and their credentials after a write.
+    """
+    usernames = list(usernames)
+    for username in usernames:
+        get_credentials_cache().delete(username)
+    get_crud_cache().delete(
+        *(_user_key("id", user_id) for user_id in ids if user_id is not None),
+        *(_user_key("username", username) for username in usernames),
+        *(_user_key("email", email) for email in emails)
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def _filter_conflicts(
+    chunk: Sequence[Tuple[int, UserCreateSchema]],
+    existing: Sequence[Tuple[str, str]],
+    seen: Tuple[Set[str], Set[str]],
+    result: UserBulkResultSchema
+) -> List[Tuple[int, UserCreateSchema]]:
+    """
+    Remove users from the chunk that conflict with existing users or with
+    users seen earlier in the same request. Conflicts are added to the
+    result, the remaining users are returned and marked as seen.
+    """
+    seen_usernames, seen_emails = seen
+    existing_usernames = {username for username, _ in existing}
+    existing_emails = {email for _, email in existing}
+
+    accepted = []
+    for index, user in chunk:
+        fields = []
+        if user.username in existing_usernames or \
+                user.username in seen_usernames:
+            fields.append("username")
+        if user.email in existing_emails or user.email in seen_emails:
+            fields.append("email")
+
+        if fields:
+            result.conflicts.append(_conflict(index, user, fields))
+            continue
+
+        seen_usernames.add(user.username)
+        seen_emails.add(user.email)
+        accepted.append((index, user))
+
+    return accepted
+
+# ---------------------------------------------------------------------------- #
+
+
+def _conflicting_fields(
+    user: UserCreateSchema,
+    existing: Sequence[Tuple[str, str]]
+) -> List[str]:
+    """
+    Determine which unique fields of a user that failed to insert conflict
+    with the existing users. If the conflicting user vanished in the
+    meantime, both fields are reported.
+    """
+    fields = []
+    if any(username == user.username for username, _ in existing):
+        fields.append("username")
+    if any(email == user.email for _, email in existing):
+        fields.append("email")
+
+    return fields or ["username", "email"]
+
+# ---------------------------------------------------------------------------- #
+
+
+def _conflict(
+    index: int,
+    user: UserCreateSchema,
+    fields: List[str]
+) -> UserConflictSchema:
+    """
+    Create a conflict entry for a user.
+    """
+    return UserConflictSchema(
+        index=index,
+        username=user.username,
+        email=user.email,
+        fields=fields
+    )
+
+# ---------------------------------------------------------------------------- #
@@ -1,6 +1,15 @@
 # ---------------------------------------------------------------------------- #
 
-from .database import get_database, get_database_session, Database
-from .dependencies import DatabaseDependency
+from .migrations import apply_migrations, get_migrations, \
+    get_applied_versions, Migration
+from .pool import PoolMonitor, MonitoredPool, AsyncMonitoredPool
+from .replicas import Replica, ReplicaSet
+from .sqlite import apply_sqlite_pragmas, get_shared_memory_url, \
+    get_sqlite_pragmas, is_sqlite, is_sqlite_file, WriterQueue
+from .database import get_database, get_database_session, \
+    get_database_async_session, get_database_read_session, \
+    get_database_read_async_session, Database
+from .dependencies import DatabaseDependency, AsyncDatabaseDependency, \
+    ReadOnlyDatabaseDependency, AsyncReadOnlyDatabaseDependency
 
 # ---------------------------------------------------------------------------- #
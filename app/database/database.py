@@ -1,17 +1,23 @@
 # ---------------------------------------------------------------------------- #
 
 import sqlalchemy
+import sqlalchemy.ext.asyncio
+import sqlalchemy.pool
 import sqlmodel
 import logging
-import re
-import os
-from typing import Generator
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, AsyncGenerator, Dict, Generator, List, Sequence, Tuple
 from functools import lru_cache
 
 # ---------------------------------------------------------------------------- #
 
 import app.services as services
 import app.schemas as schemas
+from .migrations import apply_migrations, get_migrations, Migration
+from .pool import AsyncMonitoredPool, MonitoredPool, PoolMonitor
+from .replicas import Replica, ReplicaSet, REPLICA_ERRORS
+from .sqlite import apply_sqlite_pragmas, get_shared_memory_url, is_sqlite, \
+    is_sqlite_file, use_writer_queue, WriterQueue
 
 # ---------------------------------------------------------------------------- #
 
@@ -19,12 +25,39 @@ logger = logging.getLogger("app.database")
 
 # ---------------------------------------------------------------------------- #
 
+ASYNC_DRIVERS: Dict[str, str] = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+POOL_METRICS: Dict[str, Tuple[str, str]] = {
+    "size": (
+        "database_pool_size",
+        "Connections the pool keeps open."),
+    "checkedin": (
+        "database_pool_checked_in",
+        "Idle connections in the pool."),
+    "checkedout": (
+        "database_pool_checked_out",
+        "Connections in use."),
+    "overflow": (
+        "database_pool_overflow",
+        "Connections opened beyond the pool size."),
+}
+
+# ---------------------------------------------------------------------------- #
+
 
 class Database():
     """
     Simple class for managing database connections using sqlmodel.
     """
     _engine: sqlalchemy.engine.base.Engine | None
+    _async_engine: sqlalchemy.ext.asyncio.AsyncEngine | None
+    _replicas: ReplicaSet | None
+    _writer_queue: WriterQueue | None
     _config: schemas.ConfigSchema
 
     def __init__(self) -> None:
@@ -32,6 +65,9 @@ class Database():
         Initialize the Database class.
         """
         self._engine = None
+        self._async_engine = None
+        self._replicas = None
+        self._writer_queue = None
         self._config = services.get_configuration()
 
         logger.info("Database initialized.")
@@ -39,30 +75,114 @@ class Database():
     def connect(self) -> None:
         """
         Connect to the database. This method creates a new database engine
-        and initializes the database schema. The  database URL is obtained
-        from the configuration. The URL may contain environment variable
-        placeholders in the format {{VAR_NAME}} where VAR_NAME is the name
-        of the environment variable to be replaced with its value.
+        and, if create_schema is enabled, creates the tables of the models
+        that do not exist yet. If it is disabled, the schema is managed by
+        migrations (python -m app migrate) and connecting does no DDL work
+        at all. The  database URL is obtained from the configuration. The
+        URL may contain environment variable placeholders in the format
+        {{VAR_NAME}} where VAR_NAME is the name of the environment variable
+        to be replaced with its value. If async support is enabled, an
+        additional async engine is created from the same URL. Engines for
+        the read replicas in read_urls are created the same way.
+
+        If the SQLite profile is enabled and the URL refers to an SQLite
+        database, its pragmas are applied to every connection. With a single
+        writer, the writes of the sync and the async engine go through one
+        writer queue, which admits one writing transaction at a time in
+        arrival order, while reads do not wait (see use_writer_queue()).
+        If no read_urls are given, the same database file is added as a
+        read replica, so read-only sessions have connections of their own.
+        An in-memory database exists per connection, so its engines have a
+        single connection each. With async support, an in-memory SQLite URL
+        is replaced by a named in-memory database shared by the connections
+        of both engines (see get_shared_memory_url()), so the tables created
+        here and the data written by either engine are seen by both.
         """
-        self._engine = sqlmodel.create_engine(
-            url=self._resolve_url(url=self._config.database.url),
-            echo=self._config.database.echo,
-            pool_size=self._config.database.pool_size,
-            max_overflow=self._config.database.max_overflow)
-        sqlmodel.SQLModel.metadata.create_all(self._engine)
+        url = self._resolve_url(url=self._config.database.url)
+        if self._config.database.async_enabled:
+            url = get_shared_memory_url(url)
+
+        single_writer = self._is_single_writer(url=url)
+        if single_writer:
+            self._writer_queue = WriterQueue(
+                timeout=self._config.database.pool_timeout)
+
+        self._engine = self._create_engine(
+            url=url, label="sync", single_writer=single_writer)
+        if self._config.database.create_schema:
+            sqlmodel.SQLModel.metadata.create_all(self._engine)
         logger.info("Database connection established.")
         logger.info(f"Database url: '{self._engine.url}'")
 
+        if self._config.database.async_enabled:
+            self._async_engine = self._create_async_engine(
+                url=url, label="async", single_writer=single_writer)
+            logger.info("Async database connection established.")
+            logger.info(f"Async database url: '{self._async_engine.url}'")
+
+        read_urls = self._config.database.read_urls
+        if single_writer and not read_urls and is_sqlite_file(url):
+            logger.info("No read_urls given, the SQLite database file is "
+                        "used as read replica 'replica0'.")
+            read_urls = [url]
+        if read_urls:
+            self._connect_replicas(read_urls=read_urls)
+
+        if self._config.metrics.enabled:
+            services.get_metrics_registry().collector(
+                "database_pool", self._collect_metrics)
+
     def disconnect(self) -> None:
         """
         Disconnect from the database. This method disposes of the database
-        engine and closes all connections.
+        engine and closes all connections. The async engine has to be
+        disposed separately using disconnect_async().
         """
         if self._engine:
             self._engine.dispose()
         self._engine = None
+
+        if self._replicas is not None:
+            for replica in self._replicas:
+                replica.engine.dispose()
+        self._replicas = None
+
         logger.info("Database connection disposed.")
 
+    async def disconnect_async(self) -> None:
+        """
+        Disconnect the async engine from the database. Disposing an async
+        engine requires an event loop, so this cannot be part of
+        disconnect(). The async engines of the read replicas are disposed,
+        too, so call this before disconnect().
+        """
+        if self._async_engine:
+            await self._async_engine.dispose()
+            logger.info("Async database connection disposed.")
+        self._async_engine = None
+
+        for replica in self._replicas or ():
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+                replica.async_engine = None
+
+    def migrate(self, target: int | None = None) -> List[Migration]:
+        """
+        Apply the pending migrations to the primary database, up to and
+        including the target version (default: all). A separate engine
+        without pooling is used, so the database does not need to be
+        connected. Returns the migrations applied.
+        """
+        url = self._resolve_url(url=self._config.database.url)
+        engine = sqlmodel.create_engine(
+            url=url,
+            echo=self._config.database.echo,
+            poolclass=sqlalchemy.pool.NullPool)
+        try:
+            return apply_migrations(engine, get_migrations(), target=target)
+        finally:
+            engine.dispose()
+
     def get_session(self) -> Generator[sqlmodel.Session]:
         """
         Get a session from the database engine.
@@ -76,6 +196,271 @@ class Database():
 
         logger.debug("Database session closed.")
 
+    async def get_async_session(self) -> AsyncGenerator[AsyncSession]:
+        """
+        Get an async session from the async database engine.
+        """
+        if self._async_engine is None:
+            raise Exception("Async database engine is not initialized, the "
+                            "API requires database.async_enabled.")
+
+        async with AsyncSession(self._async_engine) as session:
+            logger.debug("Async database session created.")
+            yield session
+
+        logger.debug("Async database session closed.")
+
+    def get_read_session(self) -> Generator[sqlmodel.Session]:
+        """
+        Get a session for reading only. The session is bound to a read
+        replica if there is a healthy one, otherwise to the primary. A
+        replica that cannot be connected to, or that fails with a
+        connection error while the session is in use, is ejected.
+        """
+        failed: List[Replica] = []
+        replica = self._select_replica(failed)
+        while replica is not None:
+            session = sqlmodel.Session(replica.engine)
+            try:
+                session.connection()
+            except REPLICA_ERRORS:
+                session.close()
+                self._eject_replica(replica, failed)
+                replica = self._select_replica(failed)
+                continue
+
+            assert self._replicas is not None
+            self._replicas.acquire(replica)
+            try:
+                logger.debug(f"Read session on replica '{replica.name}'.")
+                yield session
+            except REPLICA_ERRORS:
+                self._eject_replica(replica, failed)
+                raise
+            finally:
+                session.close()
+                self._replicas.release(replica)
+            return
+
+        yield from self.get_session()
+
+    async def get_read_async_session(self) -> AsyncGenerator[AsyncSession]:
+        """
+        Get an async session for reading only. See get_read_session() for
+        how the replica is selected.
+        """
+        failed: List[Replica] = []
+        replica = self._select_replica(failed)
+        while replica is not None and replica.async_engine is not None:
+            session = AsyncSession(replica.async_engine)
+            try:
+                await session.connection()
+            except REPLICA_ERRORS:
+                await session.close()
+                self._eject_replica(replica, failed)
+                replica = self._select_replica(failed)
+                continue
+
+            assert self._replicas is not None
+            self._replicas.acquire(replica)
+            try:
+                logger.debug(f"Async read session on replica "
+                             f"'{replica.name}'.")
+                yield session
+            except REPLICA_ERRORS:
+                self._eject_replica(replica, failed)
+                raise
+            finally:
+                await session.close()
+                self._replicas.release(replica)
+            return
+
+        async for session in self.get_async_session():
+            yield session
+
+    def _create_engine(
+        self,
+        url: str,
+        label: str,
+        single_writer: bool = False
+    ) -> sqlalchemy.engine.base.Engine:
+        """
+        Create an engine with the settings of the configuration. The label
+        names the engine in the metrics of its pool. The writes of a single
+        writer engine go through the writer queue.
+        """
+        engine = sqlmodel.create_engine(
+            url=url,
+            echo=self._config.database.echo,
+            **self._get_pool_arguments(
+                is_async=False,
+                single_connection=single_writer and not is_sqlite_file(url)))
+        self._monitor_pool(engine.pool, label=label)
+        if self._is_sqlite_profile(url=url):
+            apply_sqlite_pragmas(engine, self._config.sqlite)
+        if single_writer:
+            assert self._writer_queue is not None
+            use_writer_queue(engine, self._writer_queue)
+        return engine
+
+    def _create_async_engine(
+        self,
+        url: str,
+        label: str,
+        single_writer: bool = False
+    ) -> sqlalchemy.ext.asyncio.AsyncEngine:
+        """
+        Create an async engine with the settings of the configuration. The
+        url is converted to an async driver.
+        """
+        engine = sqlalchemy.ext.asyncio.create_async_engine(
+            url=self._get_async_url(url=url),
+            echo=self._config.database.echo,
+            **self._get_pool_arguments(
+                is_async=True,
+                single_connection=single_writer and not is_sqlite_file(url)))
+        self._monitor_pool(engine.pool, label=label)
+        if self._is_sqlite_profile(url=url):
+            apply_sqlite_pragmas(engine.sync_engine, self._config.sqlite)
+        if single_writer:
+            assert self._writer_queue is not None
+            use_writer_queue(engine.sync_engine, self._writer_queue)
+        return engine
+
+    def _get_pool_arguments(
+        self,
+        is_async: bool,
+        single_connection: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get the connection pool arguments of an engine. The QueuePool keeps
+        up to pool_size connections open (plus max_overflow temporary ones)
+        and waits up to pool_timeout seconds for a free connection. The
+        NullPool opens a connection per checkout, the StaticPool shares a
+        single connection (e.g. for in-memory SQLite). Pre-ping tests
+        connections before use, so connections broken by a failover are
+        replaced; recycle replaces connections older than pool_recycle
+        seconds. A single connection pool has exactly one connection.
+        """
+        database = self._config.database
+        arguments: Dict[str, Any] = {
+            "pool_pre_ping": database.pool_pre_ping,
+            "pool_recycle": database.pool_recycle,
+        }
+
+        if database.pool_class == schemas.PoolClassEnum.NULL:
+            arguments["poolclass"] = sqlalchemy.pool.NullPool
+        elif database.pool_class == schemas.PoolClassEnum.STATIC:
+            arguments["poolclass"] = sqlalchemy.pool.StaticPool
+        else:
+            arguments.update(
+                poolclass=AsyncMonitoredPool if is_async else MonitoredPool,
+                pool_size=database.pool_size,
+                max_overflow=database.max_overflow,
+                pool_timeout=database.pool_timeout)
+            if single_connection:
+                arguments.update(pool_size=1, max_overflow=0)
+
+        return arguments
+
+    def _monitor_pool(self, pool: sqlalchemy.pool.Pool, label: str) -> None:
+        """
+        Attach a monitor recording checkout waits and exhaustion to a
+        QueuePool.
+        """
+        if isinstance(pool, MonitoredPool):
+            pool.monitor = PoolMonitor(label=label)
+
+    def _connect_replicas(self, read_urls: List[str]) -> None:
+        """
+        Create the engines of the read replicas. The schema is not created
+        on replicas, they are expected to follow the primary.
+        """
+        replicas = []
+        for index, read_url in enumerate(read_urls):
+            url = self._resolve_url(url=read_url)
+            name = f"replica{index}"
+            async_engine = None
+            if self._config.database.async_enabled:
+                async_engine = self._create_async_engine(
+                    url=url, label=f"{name}_async")
+            replicas.append(Replica(
+                name=name,
+                engine=self._create_engine(url=url, label=name),
+                async_engine=async_engine
+            ))
+
+        self._replicas = ReplicaSet(
+            replicas=replicas,
+            selection=self._config.database.read_selection,
+            ejection_time=self._config.database.replica_ejection_time
+        )
+        logger.info(f"Connected to {len(replicas)} read replicas.")
+
+    def _is_sqlite_profile(self, url: str) -> bool:
+        """
+        Check if the SQLite profile applies to a database URL.
+        """
+        return self._config.sqlite.enabled and is_sqlite(url)
+
+    def _is_single_writer(self, url: str) -> bool:
+        """
+        Check if the writes to a database URL go through a single writer
+        queue.
+        """
+        return self._is_sqlite_profile(url=url) and \
+            self._config.sqlite.single_writer
+
+    def _select_replica(self, failed: Sequence[Replica]) -> Replica | None:
+        """
+        Select a healthy replica that has not failed for this session yet.
+        """
+        if self._replicas is None:
+            return None
+        return self._replicas.select(exclude=failed)
+
+    def _eject_replica(self, replica: Replica, failed: List[Replica]) -> None:
+        """
+        Eject a replica that failed and remember it for this session.
+        """
+        assert self._replicas is not None
+        self._replicas.eject(replica)
+        failed.append(replica)
+
+    def _collect_metrics(self) -> None:
+        """
+        Read the statistics of the connection pools into gauges labelled
+        by engine. Pools without statistics (like the StaticPool) are
+        skipped.
+        """
+        registry = services.get_metrics_registry()
+        engines: Dict[str, sqlalchemy.engine.base.Engine |
+                      sqlalchemy.ext.asyncio.AsyncEngine | None] = {
+            "sync": self._engine, "async": self._async_engine}
+        for replica in self._replicas or ():
+            engines[replica.name] = replica.engine
+            engines[f"{replica.name}_async"] = replica.async_engine
+
+        for label, engine in engines.items():
+            if engine is None:
+                continue
+            for attribute, (name, help) in POOL_METRICS.items():
+                statistic = getattr(engine.pool, attribute, None)
+                if callable(statistic):
+                    registry.gauge(name, help, ["engine"]).set(
+                        statistic(), (label,))
+
+    def _get_async_url(self, url: str) -> str:
+        """
+        Convert a synchronous database URL into one using an async driver
+        (asyncpg for PostgreSQL, aiosqlite for SQLite). URLs that already
+        name a driver not listed in ASYNC_DRIVERS are returned unchanged.
+        """
+        parsed = sqlalchemy.engine.make_url(url)
+        drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+        return parsed.set(drivername=drivername).render_as_string(
+            hide_password=False)
+
     def _resolve_url(self, url: str) -> str:
         """
         Get the database URL from the configuration. Replace any
@@ -84,19 +469,7 @@ class Database():
         are in the format {{VAR_NAME}} where VAR_NAME is the name of the
         environment variable to be replaced.
         """
-        def replace_env_var(match: re.Match) -> str:
-            """
-            Replace environment variable placeholders in the URL.
-            """
-            name = match.group(1)
-            value = os.getenv(name, default=None)
-            if value is None:
-                raise Exception(f"Environment variable '{name}' not set. "
-                                f"The database URL cannot be constructed.")
-            return value
-
-        url = re.sub(r"{{(\w+)}}", replace_env_var, url)
-        return url
+        return services.resolve_placeholders(url)
 
 # ---------------------------------------------------------------------------- #
 
@@ -121,5 +494,42 @@ def get_database_session() -> Generator[sqlmodel.Session]:
     logger.debug("Yielding database session for request.")
     yield from database.get_session()
 
+# ---------------------------------------------------------------------------- #
+
+
+async def get_database_async_session() -> AsyncGenerator[AsyncSession]:
+    """
+    Get an async database session from the Database class. This function is
+    used to create a new async session for each request.
+    """
+    database = get_database()
+    logger.debug("Yielding async database session for request.")
+    async for session in database.get_async_session():
+        yield session
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_database_read_session() -> Generator[sqlmodel.Session]:
+    """
+    Get a database session for reading only, bound to a read replica if
+    there is a healthy one, otherwise to the primary.
+    """
+    database = get_database()
+    logger.debug("Yielding read database session for request.")
+    yield from database.get_read_session()
+
+# ---------------------------------------------------------------------------- #
+
+
+async def get_database_read_async_session() -> AsyncGenerator[AsyncSession]:
+    """
+    Get an async database session for reading only, bound to a read replica
+    if there is a healthy one, otherwise to the primary.
+    """
+    database = get_database()
+    logger.debug("Yielding async read database session for request.")
+    async for session in database.get_read_async_session():
+        yield session
 
 # ---------------------------------------------------------------------------- #
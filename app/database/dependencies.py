@@ -2,11 +2,13 @@
 
 import fastapi
 import sqlmodel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Annotated
 
 # ---------------------------------------------------------------------------- #
 
-from app.database import get_database_session
+from app.database import get_database_session, get_database_async_session, \
+    get_database_read_session, get_database_read_async_session
 
 # ---------------------------------------------------------------------------- #
 
@@ -15,4 +17,16 @@ DatabaseDependency = Annotated[
     sqlmodel.Session, fastapi.Depends(get_database_session)
 ]
 
+AsyncDatabaseDependency = Annotated[
+    AsyncSession, fastapi.Depends(get_database_async_session)
+]
+
+ReadOnlyDatabaseDependency = Annotated[
+    sqlmodel.Session, fastapi.Depends(get_database_read_session)
+]
+
+AsyncReadOnlyDatabaseDependency = Annotated[
+    AsyncSession, fastapi.Depends(get_database_read_async_session)
+]
+
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,141 @@
+# ---------------------------------------------------------------------------- #
+
+import importlib
+import logging
+import pkgutil
+import re
+import sqlalchemy
+import time
+from typing import Callable, List, Set
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.database")
+
+# ---------------------------------------------------------------------------- #
+
+VERSIONS_PACKAGE = "app.database.versions"
+
+VERSION_PATTERN = re.compile(r"^v(\d+)_(\w+)$")
+
+MIGRATIONS_TABLE = sqlalchemy.Table(
+    "schema_migrations",
+    sqlalchemy.MetaData(),
+    sqlalchemy.Column("version", sqlalchemy.Integer, primary_key=True,
+                      autoincrement=False),
+    sqlalchemy.Column("name", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("applied", sqlalchemy.Float, nullable=False),
+)
+
+# ---------------------------------------------------------------------------- #
+
+
+class Migration:
+    """
+    A migration script with its version and the function upgrading the
+    schema, which is given a connection inside a transaction.
+    """
+    version: int
+    name: str
+    upgrade: Callable[[sqlalchemy.engine.Connection], None]
+
+    def __init__(
+        self,
+        version: int,
+        name: str,
+        upgrade: Callable[[sqlalchemy.engine.Connection], None]
+    ) -> None:
+        """
+        Initialize the migration.
+        """
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_migrations(package: str = VERSIONS_PACKAGE) -> List[Migration]:
+    """
+    Load the migration scripts of a package, ordered by version. Scripts are
+    named v<version>_<name>.py and define an upgrade(connection) function.
+    """
+    module = importlib.import_module(package)
+
+    migrations: List[Migration] = []
+    for info in pkgutil.iter_modules(module.__path__):
+        match = VERSION_PATTERN.match(info.name)
+        if match is None:
+            continue
+
+        script = importlib.import_module(f"{package}.{info.name}")
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            upgrade=script.upgrade
+        ))
+
+    migrations.sort(key=lambda migration: migration.version)
+    for previous, migration in zip(migrations, migrations[1:]):
+        if previous.version == migration.version:
+            raise Exception(
+                f"Migrations '{previous.name}' and '{migration.name}' have "
+                f"the same version {migration.version}.")
+
+    return migrations
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_applied_versions(connection: sqlalchemy.engine.Connection) -> Set[int]:
+    """
+    Get the versions of the migrations applied to a database.
+    """
+    if not sqlalchemy.inspect(connection).has_table(MIGRATIONS_TABLE.name):
+        return set()
+
+    return set(connection.execute(
+        sqlalchemy.select(MIGRATIONS_TABLE.c.version)).scalars())
+
+# ---------------------------------------------------------------------------- #
+
+
+def apply_migrations(
+    engine: sqlalchemy.engine.Engine,
+    migrations: List[Migration],
+    target: int | None = None
+) -> List[Migration]:
+    """
+    Apply the migrations not yet applied to a database in order, up to and
+    including the target version (default: all). Every migration runs in a
+    transaction of its own, together with recording its version, so a
+    failing migration leaves the database at the previous version (on
+    databases with transactional DDL like PostgreSQL). Returns the
+    migrations applied. Run this from one process only, e.g. as a step of a
+    deployment, not from every worker.
+    """
+    with engine.begin() as connection:
+        MIGRATIONS_TABLE.create(connection, checkfirst=True)
+        applied = get_applied_versions(connection)
+
+    pending = [
+        migration for migration in migrations
+        if migration.version not in applied
+        and (target is None or migration.version <= target)
+    ]
+
+    for migration in pending:
+        logger.info(f"Applying migration {migration.version} "
+                    f"'{migration.name}'.")
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(sqlalchemy.insert(MIGRATIONS_TABLE).values(
+                version=migration.version,
+                name=migration.name,
+                applied=time.time()
+            ))
+
+    logger.info(f"Applied {len(pending)} migrations.")
+    return pending
+
+# ---------------------------------------------------------------------------- #
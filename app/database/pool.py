@@ -0,0 +1,152 @@
+# ---------------------------------------------------------------------------- #
+
+import logging
+import sqlalchemy
+import sqlalchemy.pool
+import time
+from typing import Any
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.database")
+
+# ---------------------------------------------------------------------------- #
+
+CHECKOUT_WAIT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0,
+)
+
+# ---------------------------------------------------------------------------- #
+
+
+class PoolMonitor:
+    """
+    Records the checkouts of a connection pool: how long callers waited for
+    a connection, how often the pool was exhausted (all connections in use,
+    so the caller had to wait for one to be returned) and how often a
+    checkout timed out. The events are counted and, if metrics are enabled,
+    exported labelled by engine.
+    """
+    label: str
+    checkouts: int
+    exhausted: int
+    timeouts: int
+    _wait: services.Histogram | None
+    _exhausted: services.Counter | None
+    _timeouts: services.Counter | None
+
+    def __init__(self, label: str) -> None:
+        """
+        Initialize the monitor of the pool of an engine.
+        """
+        config = services.get_configuration()
+
+        self.label = label
+        self.checkouts = 0
+        self.exhausted = 0
+        self.timeouts = 0
+        self._wait = None
+        self._exhausted = None
+        self._timeouts = None
+
+        if config.metrics.enabled:
+            registry = services.get_metrics_registry()
+            self._wait = registry.histogram(
+                "database_pool_checkout_wait_seconds",
+                "Time spent waiting for a connection from the pool.",
+                label_names=("engine",),
+                buckets=CHECKOUT_WAIT_BUCKETS)
+            self._exhausted = registry.counter(
+                "database_pool_exhausted_total",
+                "Checkouts that found all connections of the pool in use.",
+                label_names=("engine",))
+            self._timeouts = registry.counter(
+                "database_pool_timeouts_total",
+                "Checkouts that timed out waiting for a connection.",
+                label_names=("engine",))
+
+    def checkout(self, wait: float, exhausted: bool) -> None:
+        """
+        Record a successful checkout.
+        """
+        self.checkouts += 1
+        if self._wait is not None:
+            self._wait.observe(wait, labels=(self.label,))
+
+        if exhausted:
+            self.exhausted += 1
+            if self._exhausted is not None:
+                self._exhausted.inc(labels=(self.label,))
+            logger.debug(f"Connection pool '{self.label}' exhausted, waited "
+                         f"{wait:.3f} seconds for a connection.")
+
+    def timeout(self, wait: float) -> None:
+        """
+        Record a checkout that timed out. A timeout implies the pool was
+        exhausted.
+        """
+        self.timeouts += 1
+        self.exhausted += 1
+        if self._wait is not None:
+            self._wait.observe(wait, labels=(self.label,))
+        if self._exhausted is not None:
+            self._exhausted.inc(labels=(self.label,))
+        if self._timeouts is not None:
+            self._timeouts.inc(labels=(self.label,))
+        logger.warning(f"Connection pool '{self.label}' exhausted, checkout "
+                       f"timed out after {wait:.3f} seconds.")
+
+# ---------------------------------------------------------------------------- #
+
+
+class MonitoredPool(sqlalchemy.pool.QueuePool):
+    """
+    QueuePool reporting its checkouts to a PoolMonitor. SQLAlchemy has no
+    pool event before a checkout, so the wait is timed around the checkout
+    itself. The monitor is set after the engine is created and kept when
+    the pool is recreated (e.g. by Engine.dispose()).
+    """
+    monitor: PoolMonitor | None = None
+
+    def recreate(self) -> "MonitoredPool":
+        """
+        Recreate the pool, keeping the monitor.
+        """
+        pool = super().recreate()
+        assert isinstance(pool, MonitoredPool)
+        pool.monitor = self.monitor
+        return pool
+
+    def _do_get(self) -> Any:
+        """
+        Check out a connection and report the wait to the monitor.
+        """
+        if self.monitor is None:
+            return super()._do_get()
+
+        exhausted = self.checkedin() == 0 and \
+            -1 < self._max_overflow <= self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            self.monitor.timeout(time.perf_counter() - started)
+            raise
+
+        self.monitor.checkout(time.perf_counter() - started, exhausted)
+        return connection
+
+# ---------------------------------------------------------------------------- #
+
+
+class AsyncMonitoredPool(MonitoredPool, sqlalchemy.pool.AsyncAdaptedQueuePool):
+    """
+    MonitoredPool for async engines.
+    """
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,139 @@
+# ---------------------------------------------------------------------------- #
+
+import itertools
+import logging
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+import threading
+import time
+from typing import Iterator, List, Sequence
+
+# ---------------------------------------------------------------------------- #
+
+import app.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.database")
+
+# ---------------------------------------------------------------------------- #
+
+REPLICA_ERRORS = (
+    sqlalchemy.exc.OperationalError,
+    sqlalchemy.exc.InterfaceError,
+)
+
+# ---------------------------------------------------------------------------- #
+
+
+class Replica:
+    """
+    A read replica with its engines, the number of its sessions in use and
+    the time until which it is ejected after a failure.
+    """
+    name: str
+    engine: sqlalchemy.engine.base.Engine
+    async_engine: sqlalchemy.ext.asyncio.AsyncEngine | None
+    sessions: int
+    ejected_until: float
+
+    def __init__(
+        self,
+        name: str,
+        engine: sqlalchemy.engine.base.Engine,
+        async_engine: sqlalchemy.ext.asyncio.AsyncEngine | None = None
+    ) -> None:
+        """
+        Initialize a healthy replica without sessions.
+        """
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.sessions = 0
+        self.ejected_until = 0.0
+
+# ---------------------------------------------------------------------------- #
+
+
+class ReplicaSet:
+    """
+    The read replicas of a database. Replicas are selected round-robin or
+    by the least number of sessions in use. A replica that fails is
+    ejected for a while and selected again afterwards; if all replicas are
+    ejected, no replica is selected and reads go to the primary.
+    """
+    _replicas: List[Replica]
+    _selection: schemas.ReadSelectionEnum
+    _ejection_time: float
+    _counter: Iterator[int]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        replicas: Sequence[Replica],
+        selection: schemas.ReadSelectionEnum,
+        ejection_time: float
+    ) -> None:
+        """
+        Initialize the replica set.
+        """
+        self._replicas = list(replicas)
+        self._selection = selection
+        self._ejection_time = ejection_time
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def select(self, exclude: Sequence[Replica] = ()) -> Replica | None:
+        """
+        Select a healthy replica that is not excluded (e.g. because it just
+        failed), or None if there is none.
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [
+                replica for replica in self._replicas
+                if replica.ejected_until <= now and replica not in exclude
+            ]
+            if not healthy:
+                return None
+
+            if self._selection == schemas.ReadSelectionEnum.LEAST_CONNECTIONS:
+                return min(healthy, key=lambda replica: replica.sessions)
+            return healthy[next(self._counter) % len(healthy)]
+
+    def acquire(self, replica: Replica) -> None:
+        """
+        Count a session of a replica as in use.
+        """
+        with self._lock:
+            replica.sessions += 1
+
+    def release(self, replica: Replica) -> None:
+        """
+        Count a session of a replica as no longer in use.
+        """
+        with self._lock:
+            replica.sessions -= 1
+
+    def eject(self, replica: Replica) -> None:
+        """
+        Stop selecting a failed replica for the ejection time.
+        """
+        with self._lock:
+            replica.ejected_until = time.monotonic() + self._ejection_time
+        logger.warning(f"Read replica '{replica.name}' failed, ejected for "
+                       f"{self._ejection_time} seconds.")
+
+    def __iter__(self) -> Iterator[Replica]:
+        """
+        Iterate over all replicas, healthy or not.
+        """
+        return iter(self._replicas)
+
+    def __len__(self) -> int:
+        """
+        Return the number of replicas.
+        """
+        return len(self._replicas)
+
+# ---------------------------------------------------------------------------- #
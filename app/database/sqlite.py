@@ -0,0 +1,318 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import collections
+import sqlalchemy
+import sqlalchemy.event
+import sqlalchemy.exc
+import threading
+import uuid
+from sqlalchemy.util import await_only
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import app.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+READ_STATEMENTS = ("SELECT", "PRAGMA", "EXPLAIN")
+
+WRITER_KEY = "sqlite_writer"
+
+# ---------------------------------------------------------------------------- #
+
+
+def is_sqlite(url: str) -> bool:
+    """
+    Check if a database URL refers to an SQLite database.
+    """
+    return sqlalchemy.engine.make_url(url).get_backend_name() == "sqlite"
+
+# ---------------------------------------------------------------------------- #
+
+
+def is_sqlite_file(url: str) -> bool:
+    """
+    Check if a database URL refers to an SQLite database file, i.e. one
+    that other connections can open, too (unlike an in-memory database).
+    """
+    parsed = sqlalchemy.engine.make_url(url)
+    return parsed.get_backend_name() == "sqlite" and \
+        parsed.database not in (None, "", ":memory:") and \
+        parsed.query.get("mode") != "memory"
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_shared_memory_url(url: str) -> str:
+    """
+    Get the URL of a named in-memory database shared by all connections of
+    this process for an in-memory SQLite URL, so the sync and the async
+    engine see the same tables and data (an unnamed in-memory database
+    exists per connection). The database lives as long as one of its
+    connections is open. Other URLs, and URLs of a shared in-memory
+    database, are returned unchanged.
+    """
+    parsed = sqlalchemy.engine.make_url(url)
+    if parsed.get_backend_name() != "sqlite" or is_sqlite_file(url) or \
+            parsed.query.get("cache") == "shared":
+        return url
+
+    return parsed.set(
+        database=f"file:memory-{uuid.uuid4().hex}",
+        query={"mode": "memory", "cache": "shared", "uri": "true"}
+    ).render_as_string(hide_password=False)
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_sqlite_pragmas(
+    config: schemas.SQLiteConfigSchema
+) -> List[Tuple[str, str]]:
+    """
+    Get the pragmas of the SQLite profile in the order they are applied.
+    WAL lets readers run concurrently with a writer, synchronous=NORMAL
+    syncs at checkpoints instead of every commit (safe with WAL), the busy
+    timeout makes connections wait for a lock instead of failing with
+    "database is locked", and the memory map and page cache reduce reads.
+    A negative cache size is in KiB, a positive one in pages.
+    """
+    return [
+        ("journal_mode", config.journal_mode.value),
+        ("synchronous", config.synchronous.value),
+        ("busy_timeout", str(config.busy_timeout)),
+        ("mmap_size", str(config.mmap_size)),
+        ("cache_size", str(config.cache_size)),
+    ]
+
+# ---------------------------------------------------------------------------- #
+
+
+def apply_sqlite_pragmas(
+    engine: sqlalchemy.engine.Engine,
+    config: schemas.SQLiteConfigSchema
+) -> None:
+    """
+    Apply the pragmas of the SQLite profile to every new connection of an
+    engine. For an async engine, pass its sync_engine.
+    """
+    pragmas = get_sqlite_pragmas(config)
+
+    @sqlalchemy.event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        """
+        Set the pragmas on a new DBAPI connection.
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+# ---------------------------------------------------------------------------- #
+
+
+class WriterQueue():
+    """
+    First-in, first-out queue of the transactions writing to an SQLite
+    database. It admits one writer at a time, in the order the writers
+    arrive, and is shared by the sync and the async engine of a database.
+    Threads wait blocking, async tasks wait on a future, so a waiting task
+    does not block the event loop. Waiting longer than the timeout raises
+    a TimeoutError.
+    """
+    _lock: threading.Lock
+    _waiters: Deque[Callable[[], None]]
+    _held: bool
+    timeout: float
+
+    def __init__(self, timeout: float) -> None:
+        """
+        Initialize the WriterQueue.
+        """
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+        self._held = False
+        self.timeout = timeout
+
+    def acquire(self) -> None:
+        """
+        Wait until it is the calling thread's turn to write.
+        """
+        event = threading.Event()
+        wake = event.set
+        if self._enqueue(wake):
+            return
+        if not event.wait(self.timeout) and self._abandon(wake):
+            raise self._timeout_error()
+
+    async def acquire_async(self) -> None:
+        """
+        Wait until it is the calling task's turn to write.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+
+        def resolve() -> None:
+            """
+            Resolve the future, unless the task stopped waiting.
+            """
+            if not future.done():
+                future.set_result(None)
+
+        def wake() -> None:
+            """
+            Resolve the future on the event loop of the waiting task.
+            """
+            loop.call_soon_threadsafe(resolve)
+
+        if self._enqueue(wake):
+            return
+        try:
+            async with asyncio.timeout(self.timeout):
+                await future
+        except BaseException as exception:
+            if not self._abandon(wake):
+                self.release()
+            if isinstance(exception, TimeoutError):
+                raise self._timeout_error() from exception
+            raise
+
+    def release(self) -> None:
+        """
+        Hand the turn to the next writer in the queue.
+        """
+        with self._lock:
+            if not self._waiters:
+                self._held = False
+                return
+            wake = self._waiters.popleft()
+        wake()
+
+    def _enqueue(self, wake: Callable[[], None]) -> bool:
+        """
+        Take the turn if nobody holds it (returns True), otherwise queue up.
+        """
+        with self._lock:
+            if not self._held:
+                self._held = True
+                return True
+            self._waiters.append(wake)
+            return False
+
+    def _abandon(self, wake: Callable[[], None]) -> bool:
+        """
+        Leave the queue after waiting too long. Returns False if the turn
+        was handed over in the meantime, i.e. the waiter holds it.
+        """
+        with self._lock:
+            if wake in self._waiters:
+                self._waiters.remove(wake)
+                return True
+            return False
+
+    def _timeout_error(self) -> sqlalchemy.exc.TimeoutError:
+        """
+        Get the error raised when a writer waited too long.
+        """
+        return sqlalchemy.exc.TimeoutError(
+            f"Waited more than {self.timeout} seconds for the SQLite writer "
+            f"queue.")
+
+# ---------------------------------------------------------------------------- #
+
+
+def is_write_statement(statement: str) -> bool:
+    """
+    Check if an SQL statement may write to the database, i.e. is not one
+    of READ_STATEMENTS.
+    """
+    words = statement.split(None, 1)
+    return not words or words[0].upper() not in READ_STATEMENTS
+
+# ---------------------------------------------------------------------------- #
+
+
+def use_writer_queue(
+    engine: sqlalchemy.engine.Engine,
+    queue: WriterQueue
+) -> None:
+    """
+    Funnel the writes of an engine through a writer queue. The driver's own
+    transaction handling is disabled, so reads run without a transaction
+    and never wait. The first write of a transaction waits for its turn in
+    the queue, then begins the transaction with BEGIN IMMEDIATE, which
+    takes the write lock of the database file, and the transaction holds
+    both until it commits or rolls back. Writers of this process therefore
+    take turns in arrival order rather than racing in SQLite's busy
+    handler; other processes still wait for the lock for up to the busy
+    timeout. Reads before the first write of a transaction see the latest
+    committed data, not a snapshot, as with the driver's default. For an
+    async engine, pass its sync_engine: its events run in a greenlet on the
+    event loop, so its writers await the queue.
+    """
+    is_async = engine.dialect.is_async
+
+    def release(info: Dict[Any, Any]) -> None:
+        """
+        Release the queue if the connection holds it.
+        """
+        if info.pop(WRITER_KEY, False):
+            queue.release()
+
+    @sqlalchemy.event.listens_for(engine, "connect")
+    def disable_driver_transactions(
+        dbapi_connection: Any,
+        connection_record: Any
+    ) -> None:
+        """
+        Stop the driver from beginning transactions on its own.
+        """
+        dbapi_connection.isolation_level = None
+
+    @sqlalchemy.event.listens_for(engine, "before_cursor_execute")
+    def begin_immediate(
+        connection: sqlalchemy.engine.Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool
+    ) -> None:
+        """
+        Wait for the queue and begin a transaction holding the write lock
+        before the first write of a transaction.
+        """
+        if connection.info.get(WRITER_KEY) or \
+                not is_write_statement(statement):
+            return
+        if is_async:
+            await_only(queue.acquire_async())
+        else:
+            queue.acquire()
+        connection.info[WRITER_KEY] = True
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            release(connection.info)
+            raise
+
+    @sqlalchemy.event.listens_for(engine, "commit")
+    @sqlalchemy.event.listens_for(engine, "rollback")
+    def end_transaction(connection: sqlalchemy.engine.Connection) -> None:
+        """
+        Hand the queue to the next writer when the transaction ends.
+        """
+        release(connection.info)
+
+    @sqlalchemy.event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection: Any, connection_record: Any) -> None:
+        """
+        Release the queue if a connection is returned without ending its
+        transaction (e.g. after it was invalidated).
+        """
+        release(connection_record.info)
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,9 @@
+# ---------------------------------------------------------------------------- #
+
+# Migration scripts, applied in order by python -m app migrate. Scripts are
+# named v<version>_<name>.py (e.g. v0002_add_user_created.py) and define
+# upgrade(connection), which runs in a transaction of its own. Scripts must
+# not change once released: define tables explicitly instead of using the
+# current models, which keep changing.
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,43 @@
+# ---------------------------------------------------------------------------- #
+
+import sqlalchemy
+
+# ---------------------------------------------------------------------------- #
+
+
+def upgrade(connection: sqlalchemy.engine.Connection) -> None:
+    """
+    Create the user and job tables. Tables that exist already (created by
+    create_all before migrations were introduced) are kept.
+    """
+    metadata = sqlalchemy.MetaData()
+
+    sqlalchemy.Table(
+        "user",
+        metadata,
+        sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True),
+        sqlalchemy.Column("username", sqlalchemy.String, nullable=False),
+        sqlalchemy.Column("email", sqlalchemy.String, nullable=False),
+        sqlalchemy.Column("password", sqlalchemy.String, nullable=False),
+        sqlalchemy.Column("disabled", sqlalchemy.Boolean, nullable=False),
+        sqlalchemy.Index("ix_user_username", "username", unique=True),
+        sqlalchemy.Index("ix_user_email", "email", unique=True),
+    )
+
+    sqlalchemy.Table(
+        "job",
+        metadata,
+        sqlalchemy.Column("id", sqlalchemy.String, primary_key=True),
+        sqlalchemy.Column("name", sqlalchemy.String, nullable=False),
+        sqlalchemy.Column("status", sqlalchemy.String, nullable=False),
+        sqlalchemy.Column("created", sqlalchemy.Float, nullable=False),
+        sqlalchemy.Column("finished", sqlalchemy.Float, nullable=True),
+        sqlalchemy.Column("expires", sqlalchemy.Float, nullable=False),
+        sqlalchemy.Column("result", sqlalchemy.JSON, nullable=True),
+        sqlalchemy.Column("error", sqlalchemy.String, nullable=True),
+        sqlalchemy.Index("ix_job_expires", "expires"),
+    )
+
+    metadata.create_all(connection, checkfirst=True)
+
+# ---------------------------------------------------------------------------- #
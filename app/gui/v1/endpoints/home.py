@@ -16,18 +16,16 @@ router = fastapi.APIRouter(prefix="/home", tags=[schemas.Tags.gui])
 
 
 @router.get("", summary="Home Gui Page")
+@services.cache_page()
 async def home_gui_page(
     request: fastapi.Request,
     templates: services.TemplatesDependency,
-) -> fastapi.responses.HTMLResponse:
+) -> fastapi.Response:
     """
-    Displays a home GUI page.
+    Displays a home GUI page. Conditional requests with a matching ETag are
+    answered with 304 (Not Modified), and the rendered page is kept in the
+    page cache.
     """
-    return templates.TemplateResponse(
-        "home.html",
-        context={
-            "request": request
-        }
-    )
+    return services.render_template(templates, request, "home.html")
 
 # ---------------------------------------------------------------------------- #
@@ -1,5 +1,6 @@
 # ---------------------------------------------------------------------------- #
 
 from .user import *
+from .job import *
 
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,21 @@
+# ---------------------------------------------------------------------------- #
+
+import sqlalchemy
+import sqlmodel
+from typing import Any, Optional
+
+# ---------------------------------------------------------------------------- #
+
+
+class Job(sqlmodel.SQLModel, table=True):
+    id: str = sqlmodel.Field(primary_key=True)
+    name: str = sqlmodel.Field()
+    status: str = sqlmodel.Field()
+    created: float = sqlmodel.Field()
+    finished: Optional[float] = sqlmodel.Field(default=None)
+    expires: float = sqlmodel.Field(index=True)
+    result: Any = sqlmodel.Field(
+        default=None, sa_column=sqlalchemy.Column(sqlalchemy.JSON))
+    error: Optional[str] = sqlmodel.Field(default=None)
+
+# ---------------------------------------------------------------------------- #
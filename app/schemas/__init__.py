@@ -2,6 +2,8 @@
 
 from .config import *
 from .user import *
+from .token import *
+from .job import *
 from .utils import *
 from .tags import *
 
@@ -1,16 +1,49 @@
 
 # ---------------------------------------------------------------------------- #
 
+import enum
 import pydantic
 from typing import Any, Dict, List, Optional
 
 # ---------------------------------------------------------------------------- #
 
 
+class PoolClassEnum(str, enum.Enum):
+    """
+    Enum for the connection pool class of the database engines.
+    """
+    QUEUE = "queue"
+    NULL = "null"
+    STATIC = "static"
+
+# ---------------------------------------------------------------------------- #
+
+
+class ReadSelectionEnum(str, enum.Enum):
+    """
+    Enum for the strategy to select a read replica.
+    """
+    ROUND_ROBIN = "round_robin"
+    LEAST_CONNECTIONS = "least_connections"
+
+# ---------------------------------------------------------------------------- #
+
+
 class DatabaseConfigSchema(pydantic.BaseModel):
+    async_enabled: bool = True
+    bulk_chunk_size: int = 1000
+    create_schema: bool = True
     echo: bool = False
     max_overflow: int = 10
+    pool_class: PoolClassEnum = PoolClassEnum.QUEUE
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
     pool_size: int = 5
+    pool_timeout: float = 30.0
+    read_selection: ReadSelectionEnum = ReadSelectionEnum.ROUND_ROBIN
+    read_urls: List[str] = []
+    replica_ejection_time: float = 30.0
+    stream_chunk_size: int = 1000
     url: str
 
 # ---------------------------------------------------------------------------- #
@@ -28,6 +61,14 @@ class AppConfigSchema(pydantic.BaseModel):
 # ---------------------------------------------------------------------------- #
 
 
+class AuthConfigSchema(pydantic.BaseModel):
+    secret_key: str = "{{SECRET_KEY}}"
+    token_expire_minutes: int = 30
+
+
+# ---------------------------------------------------------------------------- #
+
+
 class BackendConfigSchema(pydantic.BaseModel):
     root_path: str = ""
 
@@ -50,17 +91,28 @@ class CorsConfigSchema(pydantic.BaseModel):
 class StaticFilesConfigSchema(pydantic.BaseModel):
     directory: str = "static"
     enabled: bool = False
+    fingerprint: bool = False
     headers: Dict[str, str] = {}
     name: str = "static"
     path: str = "/static"
+    precompressed: bool = False
 
 # ---------------------------------------------------------------------------- #
 
 
 class TemplatesConfigSchema(pydantic.BaseModel):
+    auto_reload: bool = True
+    bytecode_cache: bool = False
+    bytecode_cache_directory: str | None = None
     directory: str = "templates"
     enabled: bool = False
+    etag_cache_size: int = 0
+    etag_cache_ttl: float = 60.0
     headers: Dict[str, str] = {}
+    page_cache_max_bytes: int = 16777216
+    page_cache_size: int = 0
+    page_cache_ttl: float = 60.0
+    precompile: bool = False
 
 # ---------------------------------------------------------------------------- #
 
@@ -73,19 +125,162 @@ class GzipConfigSchema(pydantic.BaseModel):
 # ---------------------------------------------------------------------------- #
 
 
+class WorkerQueuePolicyEnum(str, enum.Enum):
+    """
+    Enum for the policy applied when the worker pool queue is full.
+    """
+    REJECT = "reject"
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+
+# ---------------------------------------------------------------------------- #
+
+
+class WorkerModeEnum(str, enum.Enum):
+    """
+    Enum for the execution mode of the worker pool.
+    """
+    THREAD = "thread"
+    PROCESS = "process"
+    INTERPRETER = "interpreter"
+
+# ---------------------------------------------------------------------------- #
+
+
 class WorkersConfigSchema(pydantic.BaseModel):
     enabled: bool = False
+    max_queue_size: int = 0
     max_workers: int = 4
+    mode: WorkerModeEnum = WorkerModeEnum.THREAD
+    queue_policy: WorkerQueuePolicyEnum = WorkerQueuePolicyEnum.REJECT
+
+# ---------------------------------------------------------------------------- #
+
+
+class HeadersConfigSchema(pydantic.BaseModel):
+    enabled: bool = False
+    policies: Dict[str, Dict[str, str]] = {}
+
+# ---------------------------------------------------------------------------- #
+
+
+class CacheBackendEnum(str, enum.Enum):
+    """
+    Enum for the backend of the crud cache.
+    """
+    MEMORY = "memory"
+    REDIS = "redis"
+
+# ---------------------------------------------------------------------------- #
+
+
+class CacheConfigSchema(pydantic.BaseModel):
+    backend: CacheBackendEnum = CacheBackendEnum.MEMORY
+    credentials_ttl: float = 30.0
+    max_size: int = 10000
+    negative_ttl: float = 5.0
+    redis_url: str = "redis://localhost:6379/0"
+    ttl: float = 30.0
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobStoreEnum(str, enum.Enum):
+    """
+    Enum for the store that keeps the state and results of jobs.
+    """
+    MEMORY = "memory"
+    DATABASE = "database"
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobsConfigSchema(pydantic.BaseModel):
+    max_jobs: int = 10000
+    result_ttl: float = 3600.0
+    store: JobStoreEnum = JobStoreEnum.MEMORY
+
+# ---------------------------------------------------------------------------- #
+
+
+class MetricsConfigSchema(pydantic.BaseModel):
+    enabled: bool = False
+    path: str = "/metrics"
+
+# ---------------------------------------------------------------------------- #
+
+
+class PasswordAlgorithmEnum(str, enum.Enum):
+    """
+    Enum for password hashing algorithms.
+    """
+    SCRYPT = "scrypt"
+    PBKDF2_SHA256 = "pbkdf2_sha256"
+
+# ---------------------------------------------------------------------------- #
+
+
+class PasswordsConfigSchema(pydantic.BaseModel):
+    algorithm: PasswordAlgorithmEnum = PasswordAlgorithmEnum.SCRYPT
+    pbkdf2_iterations: int = 600000
+    salt_length: int = 16
+    scrypt_n: int = 16384
+    scrypt_p: int = 1
+    scrypt_r: int = 8
+
+# ---------------------------------------------------------------------------- #
+
+
+class SQLiteJournalModeEnum(str, enum.Enum):
+    """
+    Enum for the journal modes of SQLite.
+    """
+    DELETE = "delete"
+    TRUNCATE = "truncate"
+    PERSIST = "persist"
+    MEMORY = "memory"
+    WAL = "wal"
+
+# ---------------------------------------------------------------------------- #
+
+
+class SQLiteSynchronousEnum(str, enum.Enum):
+    """
+    Enum for the synchronous settings of SQLite.
+    """
+    OFF = "off"
+    NORMAL = "normal"
+    FULL = "full"
+    EXTRA = "extra"
+
+# ---------------------------------------------------------------------------- #
+
+
+class SQLiteConfigSchema(pydantic.BaseModel):
+    busy_timeout: int = 5000
+    cache_size: int = -64000
+    enabled: bool = False
+    journal_mode: SQLiteJournalModeEnum = SQLiteJournalModeEnum.WAL
+    mmap_size: int = 268435456
+    single_writer: bool = True
+    synchronous: SQLiteSynchronousEnum = SQLiteSynchronousEnum.NORMAL
 
 # ---------------------------------------------------------------------------- #
 
 
 class ConfigSchema(pydantic.BaseModel):
     app: AppConfigSchema
+    auth: AuthConfigSchema = AuthConfigSchema()
     backend: BackendConfigSchema = BackendConfigSchema()
+    cache: CacheConfigSchema = CacheConfigSchema()
     cors: CorsConfigSchema = CorsConfigSchema()
     database: DatabaseConfigSchema
     gzip: GzipConfigSchema = GzipConfigSchema()
+    headers: HeadersConfigSchema = HeadersConfigSchema()
+    jobs: JobsConfigSchema = JobsConfigSchema()
+    metrics: MetricsConfigSchema = MetricsConfigSchema()
+    passwords: PasswordsConfigSchema = PasswordsConfigSchema()
+    sqlite: SQLiteConfigSchema = SQLiteConfigSchema()
     static_files: StaticFilesConfigSchema = StaticFilesConfigSchema()
     templates: TemplatesConfigSchema = TemplatesConfigSchema()
     workers: WorkersConfigSchema = WorkersConfigSchema()
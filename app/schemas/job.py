@@ -0,0 +1,40 @@
+# ---------------------------------------------------------------------------- #
+
+import enum
+import pydantic
+from typing import Any, Optional
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobStatusEnum(str, enum.Enum):
+    """
+    Enum for the status of a background job.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobSchema(pydantic.BaseModel):
+    """
+    Schema for a background job, its status and, once it has finished, its
+    result or error.
+    """
+    id: str = pydantic.Field(
+        ..., description="Id of the job.",
+        examples=["4f1c1b5e0c8a4e0f9b6f2f3a1d2c3b4a"])
+    name: str = pydantic.Field(
+        ..., description="Name of the job.", examples=["user_bulk_create"])
+    status: JobStatusEnum = JobStatusEnum.PENDING
+    created: float = pydantic.Field(
+        ..., description="Created at (unix time).")
+    finished: Optional[float] = pydantic.Field(
+        default=None, description="Finished at (unix time).")
+    result: Any = None
+    error: Optional[str] = None
+
+# ---------------------------------------------------------------------------- #
@@ -15,6 +15,7 @@ class Tags(str, enum.Enum):
 
     v1 = "v1"
 
+    jobs = "jobs"
     user = "user"
     utils = "utils"
 
@@ -0,0 +1,29 @@
+# ---------------------------------------------------------------------------- #
+
+import pydantic
+
+# ---------------------------------------------------------------------------- #
+
+
+class TokenSchema(pydantic.BaseModel):
+    """
+    Schema for an issued access token.
+    """
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int = pydantic.Field(
+        ..., description="Lifetime of the token in seconds.")
+
+# ---------------------------------------------------------------------------- #
+
+
+class TokenPayloadSchema(pydantic.BaseModel):
+    """
+    Schema for the payload of an access token.
+    """
+    sub: str = pydantic.Field(..., description="Username of the user.")
+    uid: int = pydantic.Field(..., description="Id of the user.")
+    iat: int = pydantic.Field(..., description="Issued at (unix time).")
+    exp: int = pydantic.Field(..., description="Expires at (unix time).")
+
+# ---------------------------------------------------------------------------- #
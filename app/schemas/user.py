@@ -1,6 +1,8 @@
 # ---------------------------------------------------------------------------- #
 
+import enum
 import pydantic
+from typing import List, Optional
 
 # ---------------------------------------------------------------------------- #
 
@@ -22,5 +24,142 @@ class UserCreateSchema(pydantic.BaseModel):
         description="Password must be at least 8 characters long.",
         examples=["securepassword123"])
 
+# ---------------------------------------------------------------------------- #
+
+
+class UserUpdateSchema(pydantic.BaseModel):
+    """
+    Schema for updating a user. Only the fields that are set are updated.
+    """
+    email: Optional[pydantic.EmailStr] = pydantic.Field(
+        default=None, description="A valid email address.")
+    password: Optional[str] = pydantic.Field(
+        default=None, min_length=8, max_length=128,
+        description="Password must be at least 8 characters long.")
+    disabled: Optional[bool] = None
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserLoginSchema(pydantic.BaseModel):
+    """
+    Schema for logging in a user.
+    """
+    username: str = pydantic.Field(
+        ..., max_length=50, examples=["john.doe"])
+    password: str = pydantic.Field(
+        ..., max_length=128, examples=["securepassword123"])
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserCredentialsSchema(pydantic.BaseModel):
+    """
+    Schema for the credentials of a user as needed for authentication. This
+    is an internal schema and must never be returned by the api.
+    """
+    id: int
+    username: str
+    password: str
+    disabled: bool
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserConflictSchema(pydantic.BaseModel):
+    """
+    Schema for a user that could not be created because it conflicts with
+    an existing user or with another user in the same request.
+    """
+    index: int = pydantic.Field(
+        ..., description="Position of the user in the request.")
+    username: str
+    email: str
+    fields: List[str] = pydantic.Field(
+        ..., description="Unique fields that caused the conflict.",
+        examples=[["username"]])
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserBulkResultSchema(pydantic.BaseModel):
+    """
+    Schema for the result of a bulk user creation.
+    """
+    created: int = 0
+    conflicts: List[UserConflictSchema] = []
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserImportErrorSchema(pydantic.BaseModel):
+    """
+    Schema for a line of a user import that could not be parsed or
+    validated.
+    """
+    line: int = pydantic.Field(
+        ..., description="Zero-based line number in the import.")
+    detail: str
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserImportProgressSchema(pydantic.BaseModel):
+    """
+    Schema for the progress of a streaming user import. One progress record
+    is sent per batch, conflicts and errors only cover the current batch
+    while the counters are totals.
+    """
+    batch: int = 0
+    lines: int = 0
+    created: int = 0
+    conflicts: List[UserConflictSchema] = []
+    errors: List[UserImportErrorSchema] = []
+    done: bool = False
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserSortEnum(str, enum.Enum):
+    """
+    Enum for the (unique) columns users can be listed by.
+    """
+    ID = "id"
+    USERNAME = "username"
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserExportFormatEnum(str, enum.Enum):
+    """
+    Enum for the formats users can be exported in.
+    """
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserSchema(pydantic.BaseModel):
+    """
+    Schema for a user as returned by the api. It never contains the
+    password.
+    """
+    id: int
+    username: str
+    email: str
+    disabled: bool
+
+# ---------------------------------------------------------------------------- #
+
+
+class UserPageSchema(pydantic.BaseModel):
+    """
+    Schema for a page of users. The cursor is passed to the next request to
+    get the next page, it is None on the last page.
+    """
+    users: List[UserSchema] = []
+    next_cursor: Optional[str] = pydantic.Field(
+        default=None, description="Cursor of the next page.")
 
 # ---------------------------------------------------------------------------- #
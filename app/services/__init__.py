@@ -1,11 +1,29 @@
 # ---------------------------------------------------------------------------- #
 
-from .config import get_configuration
+from .config import get_configuration, resolve_placeholders
+from .cache import TTLCache
+from .metrics import get_metrics_registry, metrics_endpoint, \
+    MetricsRegistry, MetricsMiddleware, Metric, Counter, Gauge, Histogram
 from .logging import setup_logger, ColonLevelFormatter
-from .templates import get_templates, TemplateHeaderMiddleware
-from .static import StaticFilesWithHeaders
+from .assets import get_asset_manifest, static_url, AssetManifest, \
+    IMMUTABLE_CACHE_CONTROL
+from .headers import HeaderPolicy, HeaderPolicyMiddleware
+from .templates import get_templates, get_etag_cache, render_template, \
+    precompile_templates, TemplateHeaderMiddleware
+from .pages import get_page_cache, cache_page, CachedPage
+from .static import StaticFilesWithHeaders, compress_static_files
 from .dependencies import ConfigDependency, TemplatesDependency, \
-    WorkerPoolDependency
-from .worker import get_worker_pool, WorkerPool
+    WorkerPoolDependency, JobManagerDependency, TokenDependency
+from .worker import get_worker_pool, get_thread_worker_pool, \
+    create_worker_pool, WorkerPool, ThreadWorkerPool, ProcessWorkerPool, \
+    WorkerPoolFullError
+from .passwords import hash_password, verify_password, \
+    hash_password_async, hash_passwords_async, verify_password_async
+from .tokens import create_token, decode_token, get_token_payload, \
+    get_secret_key, InvalidTokenError
+from .jobs import get_job_manager, JobManager, JobStore, MemoryJobStore, \
+    DatabaseJobStore
+from .ndjson import NDJSONStreamingResponse, NDJSONLineTooLongError, \
+    iterate_ndjson_lines
 
 # ---------------------------------------------------------------------------- #
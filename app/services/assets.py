@@ -0,0 +1,114 @@
+# ---------------------------------------------------------------------------- #
+
+import hashlib
+import jinja2
+import logging
+import os
+import pathlib
+from functools import lru_cache
+from typing import Dict
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+# ---------------------------------------------------------------------------- #
+
+HASH_LENGTH = 12
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# ---------------------------------------------------------------------------- #
+
+
+class AssetManifest:
+    """
+    Manifest of the static files, mapping every file to a fingerprinted
+    path containing a hash of its content (css/site.css becomes
+    css/site.0123456789ab.css). A fingerprinted path always refers to the
+    same content, so it can be cached forever. Precompressed sidecars are
+    not fingerprinted themselves, they are found next to the original file.
+    """
+    _urls: Dict[str, str]
+    _paths: Dict[str, str]
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        """
+        Build the manifest by hashing all files in directory.
+        """
+        self._urls = {}
+        self._paths = {}
+
+        root = pathlib.Path(directory)
+        for file in sorted(root.rglob("*")):
+            if not file.is_file() or file.suffix in (".br", ".gz"):
+                continue
+
+            with file.open("rb") as handle:
+                digest = hashlib.file_digest(handle, "sha256").hexdigest()
+
+            path = file.relative_to(root).as_posix()
+            stem = path[:len(path) - len(file.suffix)]
+            hashed = f"{stem}.{digest[:HASH_LENGTH]}{file.suffix}"
+
+            self._urls[path] = hashed
+            self._paths[hashed] = path
+
+        logger.info(f"Asset manifest built ({len(self._urls)} files).")
+
+    def url(self, path: str) -> str:
+        """
+        Get the fingerprinted path of a file. Unknown files keep their path.
+        """
+        path = path.lstrip("/")
+        return self._urls.get(path, path)
+
+    def resolve(self, path: str) -> str | None:
+        """
+        Get the path of the file a fingerprinted path refers to, or None if
+        the path is not fingerprinted.
+        """
+        return self._paths.get(path)
+
+    def __len__(self) -> int:
+        """
+        Return the number of files in the manifest.
+        """
+        return len(self._urls)
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_asset_manifest() -> AssetManifest:
+    """
+    Returns the AssetManifest of the static files directory. The manifest is
+    built once, usually at startup.
+    """
+    config = services.get_configuration()
+    return AssetManifest(config.static_files.directory)
+
+# ---------------------------------------------------------------------------- #
+
+
+@jinja2.pass_context
+def static_url(context: jinja2.runtime.Context, path: str) -> str:
+    """
+    Jinja global returning the URL of a static file, replacing
+    url_for('static', path=...). If fingerprinting is enabled, the URL
+    contains a hash of the file content. The URL is root-relative: an
+    absolute URL would be built from the Host header of the request and
+    end up in the page cache, where it is served to all clients.
+    """
+    config = services.get_configuration()
+    if config.static_files.fingerprint:
+        path = get_asset_manifest().url(path)
+
+    return context["request"].url_for(
+        config.static_files.name, path=path).path
+
+# ---------------------------------------------------------------------------- #
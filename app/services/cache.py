@@ -0,0 +1,125 @@
+# ---------------------------------------------------------------------------- #
+
+import collections
+import math
+import threading
+import time
+from typing import Callable, Generic, Hashable, Tuple, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# ---------------------------------------------------------------------------- #
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe in-memory cache with least-recently-used eviction and a
+    time-to-live per entry. Lookups of missing or expired keys raise a
+    KeyError, so None can be cached as a regular (e.g. negative) value.
+    Optionally, entries are weighed (e.g. by their size in bytes) and the
+    least recently used entries are also evicted if the total weight
+    exceeds a limit.
+    """
+    _entries: collections.OrderedDict[K, Tuple[float, V, int]]
+    _lock: threading.Lock
+    _maxsize: int
+    _maxweight: float
+    _ttl: float
+    _weigh: Callable[[V], int] | None
+    hits: int
+    misses: int
+    weight: int
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        maxweight: float = math.inf,
+        weigh: Callable[[V], int] | None = None
+    ) -> None:
+        """
+        Initialize the cache with a maximum number of entries, a default
+        time-to-live in seconds and optionally a maximum total weight of the
+        entries, as computed by weigh.
+        """
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self._maxweight = maxweight
+        self._ttl = ttl
+        self._weigh = weigh
+        self.hits = 0
+        self.misses = 0
+        self.weight = 0
+
+    def get(self, key: K) -> V:
+        """
+        Get a value from the cache. Raises a KeyError if the key is not
+        cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                raise KeyError(key)
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """
+        Add a value to the cache. If ttl is not given, the default
+        time-to-live of the cache is used. The least recently used entries
+        are evicted if the cache is full. A value weighing more than the
+        maximum weight is not cached at all.
+        """
+        expires = time.monotonic() + (self._ttl if ttl is None else ttl)
+        weight = self._weigh(value) if self._weigh is not None else 0
+        with self._lock:
+            self._remove(key)
+            if weight > self._maxweight:
+                return
+
+            self._entries[key] = (expires, value, weight)
+            self.weight += weight
+            while len(self._entries) > self._maxsize or \
+                    self.weight > self._maxweight:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: K) -> None:
+        """
+        Remove a value from the cache if present.
+        """
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Remove all values from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries, including expired entries that have
+        not been evicted yet.
+        """
+        return len(self._entries)
+
+    def _remove(self, key: K) -> None:
+        """
+        Remove a value from the cache if present. The lock must be held.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+# ---------------------------------------------------------------------------- #
@@ -4,6 +4,7 @@ import logging
 import pathlib
 import os
 import json
+import re
 from functools import lru_cache
 
 # ---------------------------------------------------------------------------- #
@@ -43,3 +44,26 @@ def get_configuration() -> schemas.ConfigSchema:
     return config
 
 # ---------------------------------------------------------------------------- #
+
+
+def resolve_placeholders(value: str) -> str:
+    """
+    Replace environment variable placeholders in a configuration value with
+    their values. Placeholders are in the format {{VAR_NAME}} where VAR_NAME
+    is the name of the environment variable to be replaced. If an
+    environment variable is not set, raise an exception.
+    """
+    def replace_env_var(match: re.Match) -> str:
+        """
+        Replace a single environment variable placeholder.
+        """
+        name = match.group(1)
+        variable = os.getenv(name, default=None)
+        if variable is None:
+            raise Exception(f"Environment variable '{name}' not set. "
+                            f"The configuration value cannot be resolved.")
+        return variable
+
+    return re.sub(r"{{(\w+)}}", replace_env_var, value)
+
+# ---------------------------------------------------------------------------- #
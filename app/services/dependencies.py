@@ -10,6 +10,8 @@ import app.schemas as schemas
 from .templates import get_templates
 from .config import get_configuration
 from .worker import get_worker_pool, WorkerPool
+from .tokens import get_token_payload
+from .jobs import get_job_manager, JobManager
 
 # ---------------------------------------------------------------------------- #
 
@@ -26,4 +28,12 @@ WorkerPoolDependency = Annotated[
     WorkerPool, fastapi.Depends(get_worker_pool)
 ]
 
+JobManagerDependency = Annotated[
+    JobManager, fastapi.Depends(get_job_manager)
+]
+
+TokenDependency = Annotated[
+    schemas.TokenPayloadSchema, fastapi.Depends(get_token_payload)
+]
+
 # ---------------------------------------------------------------------------- #
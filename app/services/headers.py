@@ -0,0 +1,128 @@
+# ---------------------------------------------------------------------------- #
+
+import logging
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+# ---------------------------------------------------------------------------- #
+
+
+class HeaderPolicy:
+    """
+    A set of response headers compiled once into raw (name, value) byte
+    pairs, as used by ASGI messages and Starlette's Response.raw_headers,
+    with a precomputed set of lowercase names. Headers already present in
+    a response always take precedence over the policy.
+    """
+    headers: Tuple[Tuple[bytes, bytes], ...]
+    names: FrozenSet[bytes]
+
+    def __init__(self, headers: Dict[str, str]) -> None:
+        """
+        Compile the headers of the policy.
+        """
+        self.headers = tuple(
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        )
+        self.names = frozenset(name for name, _ in self.headers)
+
+    def apply(
+        self,
+        headers: Iterable[Tuple[bytes, bytes]]
+    ) -> List[Tuple[bytes, bytes]]:
+        """
+        Merge the policy into raw response headers in a single pass over
+        the response headers. Header names of ASGI responses are lowercase,
+        so they are compared as they are.
+        """
+        merged = list(headers)
+        if not self.headers:
+            return merged
+
+        present = self.names.intersection(name for name, _ in merged)
+        if present:
+            merged.extend(
+                header for header in self.headers if header[0] not in present)
+        else:
+            merged.extend(self.headers)
+        return merged
+
+# ---------------------------------------------------------------------------- #
+
+
+class HeaderPolicyMiddleware:
+    """
+    Pure ASGI middleware applying header policies by path prefix, e.g. to
+    add security headers to all API responses. If several prefixes match
+    a request, the policy of the longest prefix is applied. Only the
+    http.response.start message is rewritten.
+    """
+    _app: ASGIApp
+    _policies: List[Tuple[str, HeaderPolicy]]
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the HeaderPolicyMiddleware and compile the configured
+        policies.
+        """
+        self._app = app
+
+        config = services.get_configuration()
+
+        self._policies = sorted(
+            (
+                (prefix.rstrip("/"), HeaderPolicy(headers))
+                for prefix, headers in config.headers.policies.items()
+            ),
+            key=lambda policy: len(policy[0]),
+            reverse=True
+        )
+
+        logger.info("Header policy middleware initialized")
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        """
+        Apply the policy matching the request path to the response.
+        """
+        policy = self._get_policy(scope) if scope["type"] == "http" else None
+        if policy is None:
+            await self._app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            """
+            Apply the policy to the response start message.
+            """
+            if message["type"] == "http.response.start":
+                message["headers"] = policy.apply(message.get("headers", []))
+            await send(message)
+
+        await self._app(scope, receive, send_wrapper)
+
+    def _get_policy(self, scope: Scope) -> HeaderPolicy | None:
+        """
+        Get the policy of the longest prefix matching the request path. A
+        prefix matches the path itself and everything below it.
+        """
+        path = scope["path"]
+        for prefix, policy in self._policies:
+            if path.startswith(prefix) and \
+                    path[len(prefix):len(prefix) + 1] in ("", "/"):
+                return policy
+        return None
+
+# ---------------------------------------------------------------------------- #
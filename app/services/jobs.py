@@ -0,0 +1,277 @@
+# ---------------------------------------------------------------------------- #
+
+import abc
+import asyncio
+import concurrent.futures
+import logging
+import pydantic
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+# ---------------------------------------------------------------------------- #
+
+import app.crud as crud
+import app.database as database
+import app.services as services
+import app.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobStore(abc.ABC):
+    """
+    Base class for the stores that keep the state and results of jobs.
+    """
+
+    @abc.abstractmethod
+    def save(self, job: schemas.JobSchema) -> None:
+        """
+        Insert or update a job.
+        """
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> schemas.JobSchema | None:
+        """
+        Get a job by its id, or None if it is unknown or has expired.
+        """
+
+# ---------------------------------------------------------------------------- #
+
+
+class MemoryJobStore(JobStore):
+    """
+    Job store keeping jobs in memory. Jobs are evicted after the configured
+    time-to-live or if there are more than the configured number of jobs.
+    Jobs are lost on restart and are not shared between processes.
+    """
+    _jobs: services.TTLCache[str, schemas.JobSchema]
+
+    def __init__(self) -> None:
+        """
+        Initialize the MemoryJobStore.
+        """
+        config = services.get_configuration()
+        self._jobs = services.TTLCache(
+            maxsize=config.jobs.max_jobs, ttl=config.jobs.result_ttl)
+
+    def save(self, job: schemas.JobSchema) -> None:
+        """
+        Insert or update a job.
+        """
+        self._jobs.set(job.id, job)
+
+    def get(self, job_id: str) -> schemas.JobSchema | None:
+        """
+        Get a job by its id, or None if it is unknown or has expired.
+        """
+        try:
+            return self._jobs.get(job_id)
+        except KeyError:
+            return None
+
+# ---------------------------------------------------------------------------- #
+
+
+class DatabaseJobStore(JobStore):
+    """
+    Job store keeping jobs in the database, so they survive restarts and
+    are shared between processes. Expired jobs are deleted whenever a new
+    job is created.
+    """
+    _ttl: float
+
+    def __init__(self) -> None:
+        """
+        Initialize the DatabaseJobStore.
+        """
+        config = services.get_configuration()
+        self._ttl = config.jobs.result_ttl
+
+    def save(self, job: schemas.JobSchema) -> None:
+        """
+        Insert or update a job.
+        """
+        for session in database.get_database_session():
+            if job.status == schemas.JobStatusEnum.PENDING:
+                crud.job.delete_expired_jobs(session=session)
+            crud.job.save_job(
+                session=session, job=job, expires=time.time() + self._ttl)
+
+    def get(self, job_id: str) -> schemas.JobSchema | None:
+        """
+        Get a job by its id, or None if it is unknown or has expired.
+        """
+        for session in database.get_database_session():
+            return crud.job.get_job(session=session, job_id=job_id)
+        return None
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobManager:
+    """
+    Run functions as background jobs on the worker pool. Jobs get an id
+    that can be used to poll their status and result, which are kept in the
+    configured job store. Results must be JSON-serializable or pydantic
+    models. In process mode, the function and its arguments must be
+    picklable.
+    """
+    _store: JobStore
+    _futures: Dict[str, concurrent.futures.Future]
+    _lock: threading.Lock
+
+    def __init__(self, store: JobStore) -> None:
+        """
+        Initialize the JobManager with a job store.
+        """
+        self._store = store
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    async def submit(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        /,
+        *args: Any,
+        **kwargs: Any
+    ) -> schemas.JobSchema:
+        """
+        Enqueue a function as a job on the worker pool and return the
+        pending job immediately. Raises a WorkerPoolFullError if the worker
+        pool rejects the job.
+        """
+        return await self._submit(
+            name, services.get_worker_pool, fn, args, kwargs)
+
+    async def submit_threaded(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        /,
+        *args: Any,
+        **kwargs: Any
+    ) -> schemas.JobSchema:
+        """
+        Enqueue a function as a job on a thread of this process, whatever
+        the worker mode, and return the pending job immediately. Use this
+        for jobs that access the database or the crud cache: workers in
+        other processes or subinterpreters have no database connection, and
+        their writes would not invalidate the cache of this process.
+        """
+        return await self._submit(
+            name, services.get_thread_worker_pool, fn, args, kwargs)
+
+    async def _submit(
+        self,
+        name: str,
+        get_pool: Callable[[], "services.WorkerPool"],
+        fn: Callable[..., Any],
+        args: Any,
+        kwargs: Any
+    ) -> schemas.JobSchema:
+        """
+        Store a pending job and enqueue it on the given worker pool.
+        """
+        config = services.get_configuration()
+        if not config.workers.enabled:
+            raise Exception("Jobs need the worker pool, enable workers in "
+                            "the configuration.")
+
+        job = schemas.JobSchema(
+            id=uuid.uuid4().hex, name=name, created=time.time())
+        await asyncio.to_thread(self._store.save, job)
+
+        try:
+            future = await get_pool().enqueue(fn, *args, **kwargs)
+        except services.WorkerPoolFullError:
+            job.status = schemas.JobStatusEnum.FAILED
+            job.finished = time.time()
+            job.error = "Worker pool queue is full."
+            await asyncio.to_thread(self._store.save, job)
+            raise
+
+        with self._lock:
+            self._futures[job.id] = future
+        future.add_done_callback(
+            lambda future: self._job_done(job.model_copy(), future))
+
+        logger.info(f"Job '{job.id}' ({name}) submitted.")
+        return job
+
+    def get(self, job_id: str) -> schemas.JobSchema | None:
+        """
+        Get a job by its id, or None if it is unknown or has expired. This
+        may access the database, so do not call it on the event loop.
+        """
+        job = self._store.get(job_id)
+        if job is None or job.status != schemas.JobStatusEnum.PENDING:
+            return job
+
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.running():
+            job.status = schemas.JobStatusEnum.RUNNING
+        return job
+
+    def _job_done(
+        self,
+        job: schemas.JobSchema,
+        future: concurrent.futures.Future
+    ) -> None:
+        """
+        Store the result or error of a finished (or cancelled) job.
+        """
+        job.finished = time.time()
+        if future.cancelled():
+            job.status = schemas.JobStatusEnum.FAILED
+            job.error = "Job was cancelled."
+        elif future.exception() is not None:
+            job.status = schemas.JobStatusEnum.FAILED
+            job.error = repr(future.exception())
+        else:
+            job.status = schemas.JobStatusEnum.SUCCEEDED
+            job.result = _serialize(future.result())
+
+        try:
+            self._store.save(job)
+        except Exception:
+            logger.exception(f"Job '{job.id}' could not be stored.")
+        finally:
+            with self._lock:
+                self._futures.pop(job.id, None)
+
+        logger.info(f"Job '{job.id}' ({job.name}) {job.status.value}.")
+
+# ---------------------------------------------------------------------------- #
+
+
+def _serialize(result: Any) -> Any:
+    """
+    Convert the result of a job into JSON-compatible data.
+    """
+    if isinstance(result, pydantic.BaseModel):
+        return result.model_dump(mode="json")
+    return result
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_job_manager() -> JobManager:
+    """
+    Returns a JobManager instance using the configured job store.
+    """
+    config = services.get_configuration()
+    if config.jobs.store == schemas.JobStoreEnum.DATABASE:
+        return JobManager(store=DatabaseJobStore())
+    return JobManager(store=MemoryJobStore())
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,495 @@
+# ---------------------------------------------------------------------------- #
+
+import abc
+import fastapi
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+from starlette.routing import Match, Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict, List, Sequence, Tuple, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+# ---------------------------------------------------------------------------- #
+
+DEFAULT_BUCKETS = (
+    .005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 7.5, 10.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+M = TypeVar("M", bound="Counter")
+
+# ---------------------------------------------------------------------------- #
+
+
+class Metric(abc.ABC):
+    """
+    Base class for metrics. A metric has a name, a help text and optional
+    label names. Values are kept per combination of label values, which
+    are passed as a tuple in the order of the label names.
+    """
+    name: str
+    help: str
+    label_names: Tuple[str, ...]
+    type: str = "untyped"
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = ()
+    ) -> None:
+        """
+        Initialize the metric.
+        """
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def render(self) -> List[str]:
+        """
+        Render the samples of the metric in the Prometheus text format.
+        """
+
+    def _render_labels(
+        self,
+        labels: Tuple[str, ...],
+        extra: str = ""
+    ) -> str:
+        """
+        Render label values (and an optional pre-rendered extra label) as a
+        Prometheus label set.
+        """
+        rendered = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.label_names, labels)
+        ]
+        if extra:
+            rendered.append(extra)
+        return "{" + ",".join(rendered) + "}" if rendered else ""
+
+# ---------------------------------------------------------------------------- #
+
+
+class Counter(Metric):
+    """
+    Metric for a value that only increases, like the number of requests.
+    """
+    type = "counter"
+    _values: Dict[Tuple[str, ...], float]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = ()
+    ) -> None:
+        """
+        Initialize the counter.
+        """
+        super().__init__(name, help, label_names)
+        self._values = {}
+
+    def inc(self, value: float = 1.0, labels: Tuple[str, ...] = ()) -> None:
+        """
+        Increase the counter.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def get(self, labels: Tuple[str, ...] = ()) -> float:
+        """
+        Get the current value of the counter.
+        """
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        """
+        Render the samples of the counter.
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{self._render_labels(labels)} {_format(value)}"
+            for labels, value in values
+        ]
+
+# ---------------------------------------------------------------------------- #
+
+
+class Gauge(Counter):
+    """
+    Metric for a value that goes up and down, like the number of requests
+    in flight. Instead of being set, a gauge can read its value from a
+    function when it is rendered.
+    """
+    type = "gauge"
+    function: Callable[[], float] | None = None
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        """
+        Set the gauge to a value.
+        """
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, value: float = 1.0, labels: Tuple[str, ...] = ()) -> None:
+        """
+        Decrease the gauge.
+        """
+        self.inc(-value, labels)
+
+    def render(self) -> List[str]:
+        """
+        Render the samples of the gauge, calling its function if it has
+        one.
+        """
+        if self.function is not None:
+            return [f"{self.name} {_format(self.function())}"]
+        return super().render()
+
+# ---------------------------------------------------------------------------- #
+
+
+class Histogram(Metric):
+    """
+    Metric for the distribution of observed values, like request latencies,
+    counted in cumulative buckets.
+    """
+    type = "histogram"
+    buckets: Tuple[float, ...]
+    _values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]]
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        """
+        Initialize the histogram with the upper bounds of its buckets. A
+        bucket for infinity is added automatically.
+        """
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        """
+        Record an observed value.
+        """
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * len(self.buckets), [0.])
+            counts, total = entry
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            total[0] += value
+
+    def get_count(self, labels: Tuple[str, ...] = ()) -> int:
+        """
+        Get the number of observed values.
+        """
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        """
+        Render the buckets, the sum and the count of the histogram.
+        """
+        with self._lock:
+            values = [
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._values.items()
+            ]
+
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket = self._render_labels(
+                    labels, f'le="{_format(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            rendered = self._render_labels(labels)
+            lines.append(f"{self.name}_sum{rendered} {_format(total)}")
+            lines.append(f"{self.name}_count{rendered} {cumulative}")
+        return lines
+
+# ---------------------------------------------------------------------------- #
+
+
+class MetricsRegistry:
+    """
+    Registry of all metrics of the application. Metrics are created on
+    first use and shared afterwards, so modules can ask for a metric by name
+    without coordinating who creates it.
+    """
+    _metrics: Dict[str, Metric]
+    _collectors: Dict[str, Callable[[], None]]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        """
+        Initialize the MetricsRegistry.
+        """
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def counter(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = ()
+    ) -> Counter:
+        """
+        Get or create a counter.
+        """
+        return self._register(Counter, name, help, label_names)
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        function: Callable[[], float] | None = None
+    ) -> Gauge:
+        """
+        Get or create a gauge. If a function is given, it replaces the
+        function of an existing gauge.
+        """
+        gauge = self._register(Gauge, name, help, label_names)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Get or create a histogram.
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(
+                    name, help, label_names, buckets)
+        if not isinstance(metric, Histogram):
+            raise Exception(f"Metric '{name}' is not a histogram.")
+        return metric
+
+    def collector(self, name: str, function: Callable[[], None]) -> None:
+        """
+        Add a function that updates metrics right before they are rendered,
+        e.g. to read gauges from an object. A collector with the same name
+        is replaced.
+        """
+        with self._lock:
+            self._collectors[name] = function
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+        """
+        with self._lock:
+            collectors = list(self._collectors.values())
+        for collect in collectors:
+            collect()
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(
+        self,
+        metric_class: type[M],
+        name: str,
+        help: str,
+        label_names: Sequence[str]
+    ) -> M:
+        """
+        Get a metric by name or create it with the given class.
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(
+                    name, help, label_names)
+        if not isinstance(metric, metric_class) or \
+                type(metric) is not metric_class:
+            raise Exception(
+                f"Metric '{name}' is not a {metric_class.type}.")
+        return metric
+
+# ---------------------------------------------------------------------------- #
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording the number, latency and concurrency of
+    HTTP requests. Requests are labelled by route template (like
+    /api/v1/jobs/{job_id}) rather than by path, so the number of label
+    values stays bounded. Requests that match no route share one label.
+    """
+    _app: ASGIApp
+    _routes: services.TTLCache[str, str]
+    _requests: Counter
+    _latency: Histogram
+    _in_flight: Gauge
+
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Initialize the MetricsMiddleware and register its metrics.
+        """
+        self._app = app
+        self._routes = services.TTLCache(maxsize=1000, ttl=math.inf)
+
+        registry = get_metrics_registry()
+        self._requests = registry.counter(
+            "http_requests_total",
+            "HTTP requests by method, route and status.",
+            ["method", "route", "status"])
+        self._latency = registry.histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by method and route.",
+            ["method", "route"])
+        self._in_flight = registry.gauge(
+            "http_requests_in_flight",
+            "HTTP requests being handled by method and route.",
+            ["method", "route"])
+
+        logger.info("Metrics middleware initialized")
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        """
+        Handle a request and record its metrics.
+        """
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        labels = (scope["method"], self._get_route(scope))
+        status = "500"
+
+        async def send_wrapper(message: Message) -> None:
+            """
+            Capture the status code of the response.
+            """
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        self._in_flight.inc(labels=labels)
+        start = time.perf_counter()
+        try:
+            await self._app(scope, receive, send_wrapper)
+        finally:
+            self._latency.observe(time.perf_counter() - start, labels)
+            self._requests.inc(labels=labels + (status,))
+            self._in_flight.dec(labels=labels)
+
+    def _get_route(self, scope: Scope) -> str:
+        """
+        Get the template of the route matching a request. Templates are
+        cached per path, so routing is only repeated for new paths.
+        """
+        path = scope["path"]
+        try:
+            return self._routes.get(path)
+        except KeyError:
+            pass
+
+        route = UNMATCHED_ROUTE
+        for candidate in scope["app"].router.routes:
+            match, _ = candidate.matches(scope)
+            if match != Match.NONE:
+                route = candidate.path
+                if isinstance(candidate, Mount):
+                    route += "/{path}"
+                if match == Match.FULL:
+                    break
+
+        self._routes.set(path, route)
+        return route
+
+# ---------------------------------------------------------------------------- #
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value for the Prometheus text format.
+    """
+    return value.replace("\\", "\\\\").replace("\n", "\\n") \
+        .replace('"', '\\"')
+
+# ---------------------------------------------------------------------------- #
+
+
+def _format(value: float) -> str:
+    """
+    Format a sample value for the Prometheus text format.
+    """
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Returns the MetricsRegistry instance of the application.
+    """
+    return MetricsRegistry()
+
+# ---------------------------------------------------------------------------- #
+
+
+def metrics_endpoint() -> fastapi.Response:
+    """
+    Return all metrics in the Prometheus text format. This endpoint is
+    added to the app at the configured path if metrics are enabled.
+    """
+    return fastapi.Response(
+        content=get_metrics_registry().render(),
+        media_type=CONTENT_TYPE
+    )
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,100 @@
+# ---------------------------------------------------------------------------- #
+
+import logging
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from typing import Any, AsyncGenerator, AsyncIterable, Mapping, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+# ---------------------------------------------------------------------------- #
+
+
+class NDJSONLineTooLongError(Exception):
+    """
+    Raised if a single line of an NDJSON stream exceeds the maximum line
+    length.
+    """
+
+# ---------------------------------------------------------------------------- #
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response for newline-delimited JSON. Unlike Starlette's
+    StreamingResponse, this response does not listen for client disconnects
+    while streaming, because that would consume (and discard) request body
+    messages. This allows endpoints to read the request body incrementally
+    while streaming the response. Disconnects are detected when reading the
+    request body instead. The response is sent with Content-Encoding
+    identity, as the GZipMiddleware would otherwise buffer the records
+    (e.g. progress records) until the compressor emits a block.
+    """
+    media_type = "application/x-ndjson"
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        **kwargs: Any
+    ) -> None:
+        """
+        Initialize the response, opting out of compression.
+        """
+        super().__init__(
+            content,
+            status_code=status_code,
+            headers={"Content-Encoding": "identity", **(headers or {})},
+            **kwargs)
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        """
+        Stream the response without listening for disconnects.
+        """
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
+
+# ---------------------------------------------------------------------------- #
+
+
+async def iterate_ndjson_lines(
+    stream: AsyncIterable[bytes],
+    max_line_length: int = 65536
+) -> AsyncGenerator[Tuple[int, bytes]]:
+    """
+    Split a byte stream into NDJSON lines without buffering more than one
+    line (plus one chunk) in memory. Yields tuples of the zero-based line
+    number and the stripped line. Empty lines are skipped but counted.
+    """
+    buffer = b""
+    line_number = 0
+
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line_number, line
+            line_number += 1
+
+        if len(buffer) > max_line_length:
+            raise NDJSONLineTooLongError(
+                f"Line {line_number} exceeds {max_line_length} bytes.")
+
+    buffer = buffer.strip()
+    if buffer:
+        yield line_number, buffer
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,202 @@
+# ---------------------------------------------------------------------------- #
+
+import fastapi
+import functools
+import inspect
+from functools import lru_cache
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Hashable, Iterable, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+PageKey = Tuple[str, Tuple[Tuple[str, Tuple[str, ...]], ...], Hashable]
+
+Endpoint = Callable[..., Any]
+
+# ---------------------------------------------------------------------------- #
+
+
+class CachedPage:
+    """
+    A rendered page as stored in the page cache. Only the status, the body
+    and the raw headers are kept, a new response is created for every hit,
+    as middlewares (e.g. gzip) may modify the headers of a response.
+    """
+    status_code: int
+    body: bytes
+    headers: Tuple[Tuple[bytes, bytes], ...]
+
+    def __init__(self, response: fastapi.Response) -> None:
+        """
+        Copy a rendered response.
+        """
+        self.status_code = response.status_code
+        self.body = bytes(response.body)
+        self.headers = tuple(response.raw_headers)
+
+    def to_response(self) -> fastapi.Response:
+        """
+        Create a new response for the page.
+        """
+        response = fastapi.Response(self.body, status_code=self.status_code)
+        # update in place, response.headers is a view on this list
+        response.raw_headers[:] = self.headers
+        return response
+
+    def __len__(self) -> int:
+        """
+        Return the size of the page in bytes, used to limit the memory used
+        by the page cache.
+        """
+        return len(self.body) + sum(
+            len(name) + len(value) for name, value in self.headers)
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_page_cache() -> services.TTLCache[PageKey, CachedPage]:
+    """
+    Returns the cache of rendered pages. Pages are evicted if they expire,
+    and the least recently used pages are evicted if the cache holds too
+    many pages or too many bytes.
+    """
+    config = services.get_configuration()
+    return services.TTLCache(
+        maxsize=config.templates.page_cache_size,
+        ttl=config.templates.page_cache_ttl,
+        maxweight=config.templates.page_cache_max_bytes,
+        weigh=len
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def cache_page(
+    query_params: Iterable[str] = (),
+    key: Callable[[fastapi.Request], Hashable] | None = None,
+    ttl: float | None = None
+) -> Callable[[Endpoint], Endpoint]:
+    """
+    Decorator caching the pages rendered by a GUI endpoint. Pages are cached
+    by path, the values of the given query parameters (other parameters are
+    ignored) and the result of the key function, e.g. to cache pages per
+    user or language. Only successful GET requests are cached, and responses
+    setting cookies are never cached. If the cached page has an ETag, a
+    conditional request is answered with 304 (Not Modified). The endpoint
+    must have a parameter of type fastapi.Request. The decorator is placed
+    below the route decorator:
+
+        @router.get("")
+        @services.cache_page(query_params=["page"])
+        async def page(request: fastapi.Request) -> fastapi.Response:
+            ...
+    """
+    names = tuple(sorted(set(query_params)))
+
+    def decorator(endpoint: Endpoint) -> Endpoint:
+        """
+        Wrap the endpoint. The signature of the endpoint is kept, so FastAPI
+        resolves its parameters and dependencies as before.
+        """
+        request_name = _get_request_parameter(endpoint)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Any:
+            """
+            Serve the page from the cache or render and cache it.
+            """
+            config = services.get_configuration()
+            request: fastapi.Request = kwargs[request_name]
+
+            if config.templates.page_cache_size <= 0 or \
+                    request.method != "GET":
+                return await _call(endpoint, kwargs)
+
+            page_key: PageKey = (
+                request.url.path,
+                tuple(
+                    (name, tuple(request.query_params.getlist(name)))
+                    for name in names
+                ),
+                key(request) if key is not None else None
+            )
+
+            cache = get_page_cache()
+            try:
+                page = cache.get(page_key)
+            except KeyError:
+                response = await _call(endpoint, kwargs)
+                if _is_cacheable(response):
+                    cache.set(page_key, CachedPage(response), ttl=ttl)
+                return response
+
+            return _serve(page, request)
+
+        return wrapper
+
+    return decorator
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_request_parameter(endpoint: Endpoint) -> str:
+    """
+    Get the name of the fastapi.Request parameter of an endpoint.
+    """
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        if parameter.annotation is fastapi.Request:
+            return name
+
+    raise Exception(
+        f"Endpoint '{endpoint.__name__}' must have a fastapi.Request "
+        f"parameter to cache its pages.")
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _call(endpoint: Endpoint, kwargs: Any) -> Any:
+    """
+    Call an async or sync endpoint, the latter in the thread pool like
+    FastAPI does.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        return await endpoint(**kwargs)
+    return await run_in_threadpool(endpoint, **kwargs)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _is_cacheable(response: Any) -> bool:
+    """
+    Check if an endpoint result can be cached: a successful response with a
+    rendered body that does not set cookies.
+    """
+    return isinstance(response, fastapi.Response) and \
+        response.status_code == 200 and \
+        isinstance(getattr(response, "body", None), bytes) and \
+        "set-cookie" not in response.headers
+
+# ---------------------------------------------------------------------------- #
+
+
+def _serve(page: CachedPage, request: fastapi.Request) -> fastapi.Response:
+    """
+    Create the response for a cached page, or a 304 (Not Modified) response
+    if the request has a matching If-None-Match header.
+    """
+    response = page.to_response()
+
+    etag = response.headers.get("etag")
+    if_none_match = request.headers.get("if-none-match")
+    if etag is not None and if_none_match is not None and \
+            services.templates.etag_matches(etag, if_none_match):
+        return services.templates.not_modified_response(etag)
+
+    return response
+
+# ---------------------------------------------------------------------------- #
@@ -0,0 +1,184 @@
+# ---------------------------------------------------------------------------- #
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+from typing import Any, Callable, List, Sequence, TypeVar
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+import app.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+T = TypeVar("T")
+
+# ---------------------------------------------------------------------------- #
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password using the algorithm and cost parameters from the
+    configuration. This is deliberately CPU-expensive and must not be called
+    on the event loop, use hash_password_async() there instead. The result
+    contains the algorithm, the cost parameters and the salt, so hashes stay
+    verifiable after the configuration changes.
+    """
+    config = services.get_configuration().passwords
+    salt = os.urandom(config.salt_length)
+
+    if config.algorithm == schemas.PasswordAlgorithmEnum.SCRYPT:
+        digest = _scrypt(
+            password, salt, config.scrypt_n, config.scrypt_r, config.scrypt_p)
+        parameters = f"{config.scrypt_n}${config.scrypt_r}${config.scrypt_p}"
+    else:
+        digest = _pbkdf2(password, salt, config.pbkdf2_iterations)
+        parameters = f"{config.pbkdf2_iterations}"
+
+    return f"{config.algorithm.value}${parameters}$" \
+        f"{_encode(salt)}${_encode(digest)}"
+
+# ---------------------------------------------------------------------------- #
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """
+    Verify a password against a hash created by hash_password(). Like
+    hashing, this is CPU-expensive, use verify_password_async() on the event
+    loop. Malformed hashes never verify.
+    """
+    try:
+        algorithm, *parameters, salt, digest = password_hash.split("$")
+
+        if algorithm == schemas.PasswordAlgorithmEnum.SCRYPT.value:
+            n, r, p = (int(parameter) for parameter in parameters)
+            expected = _scrypt(password, _decode(salt), n, r, p)
+        elif algorithm == schemas.PasswordAlgorithmEnum.PBKDF2_SHA256.value:
+            (iterations,) = (int(parameter) for parameter in parameters)
+            expected = _pbkdf2(password, _decode(salt), iterations)
+        else:
+            return False
+
+        return hmac.compare_digest(expected, _decode(digest))
+    except ValueError:
+        logger.warning("Malformed password hash could not be verified.")
+        return False
+
+# ---------------------------------------------------------------------------- #
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password without blocking the event loop. The work is executed on
+    the worker pool if workers are enabled, otherwise on the default
+    executor of the event loop.
+    """
+    return await _run_in_executor(hash_password, password)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def hash_passwords_async(passwords: Sequence[str]) -> List[str]:
+    """
+    Hash many passwords without blocking the event loop. The passwords are
+    split into one slice per worker, so a large batch occupies only a few
+    slots of the worker pool queue.
+    """
+    config = services.get_configuration()
+    slices = [
+        passwords[index::config.workers.max_workers]
+        for index in range(min(config.workers.max_workers, len(passwords)))
+    ]
+
+    hashed = await asyncio.gather(*(
+        _run_in_executor(_hash_passwords, passwords_slice)
+        for passwords_slice in slices
+    ))
+
+    # restore the original order of the interleaved slices
+    result: List[str] = [""] * len(passwords)
+    for index, hashes in enumerate(hashed):
+        result[index::config.workers.max_workers] = hashes
+    return result
+
+# ---------------------------------------------------------------------------- #
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """
+    Verify a password without blocking the event loop. See
+    hash_password_async() for where the work is executed.
+    """
+    return await _run_in_executor(verify_password, password, password_hash)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def _run_in_executor(function: Callable[..., T], *args: Any) -> T:
+    """
+    Run a function on the worker pool (or the default executor if workers
+    are disabled) and await its result.
+    """
+    config = services.get_configuration()
+    if config.workers.enabled:
+        return await services.get_worker_pool().run(function, *args)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, function, *args)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _hash_passwords(passwords: Sequence[str]) -> List[str]:
+    """
+    Hash a sequence of passwords.
+    """
+    return [hash_password(password) for password in passwords]
+
+# ---------------------------------------------------------------------------- #
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    """
+    Derive a key with scrypt. The memory limit is derived from the cost
+    parameters, as OpenSSL's default limit is too low for larger values
+    of n.
+    """
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=128 * r * (n + p + 2), dklen=32)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    """
+    Derive a key with PBKDF2-HMAC-SHA256.
+    """
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+# ---------------------------------------------------------------------------- #
+
+
+def _encode(value: bytes) -> str:
+    """
+    Encode bytes as unpadded url-safe base64.
+    """
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode()
+
+# ---------------------------------------------------------------------------- #
+
+
+def _decode(value: str) -> bytes:
+    """
+    Decode unpadded url-safe base64.
+    """
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+# ---------------------------------------------------------------------------- #
@@ -1,11 +1,25 @@
 # ---------------------------------------------------------------------------- #
 
+import anyio.to_thread
+import gzip
 import logging
-from typing import Any, Dict
+import mimetypes
+import os
+import pathlib
+import stat
+from typing import Any, Dict, Set, Tuple
 from fastapi import Response
+from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
 from starlette.types import Scope
 
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:
+    brotli = None
+
 # ---------------------------------------------------------------------------- #
 
 import app.services as services
@@ -16,12 +30,32 @@ logger = logging.getLogger("app.core")
 
 # ---------------------------------------------------------------------------- #
 
+SIDECAR_ENCODINGS: Tuple[Tuple[str, str], ...] = (
+    ("br", ".br"),
+    ("gzip", ".gz"),
+)
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css", ".csv", ".html", ".js", ".json", ".map", ".mjs", ".svg",
+    ".txt", ".xml",
+}
+
+# ---------------------------------------------------------------------------- #
+
 
 class StaticFilesWithHeaders(StaticFiles):
     """
-    Custom StaticFiles class to add headers to static file responses.
+    Custom StaticFiles class to add headers to static file responses. If
+    precompressed files are enabled, a .br or .gz sidecar file (created by
+    python -m app compress-static) is served instead of the file itself if
+    the client accepts the encoding. If fingerprinting is enabled,
+    fingerprinted paths from the asset manifest are served with a
+    Cache-Control header allowing to cache them forever.
     """
     _custom_headers: Dict[str, str]
+    _policy: services.HeaderPolicy
+    _precompressed: bool
+    _fingerprint: bool
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
@@ -29,6 +63,9 @@ class StaticFilesWithHeaders(StaticFiles):
         config = services.get_configuration()
 
         self._custom_headers = config.static_files.headers
+        self._policy = services.HeaderPolicy(self._custom_headers)
+        self._precompressed = config.static_files.precompressed
+        self._fingerprint = config.static_files.fingerprint
 
         logger.info("Static file serving initialized.")
 
@@ -37,15 +74,162 @@ class StaticFilesWithHeaders(StaticFiles):
         Override the get_response method to add custom headers. Please note
         that this method is called for each static file request, and it will
         only add headers if the response status code is 200 (OK) and the
-        header is not already present in the response.
+        header is not already present in the response. If precompressed
+        files are enabled, Vary is added to 304 (Not Modified) responses,
+        too, so caches revalidate per encoding.
         """
-        response = await super().get_response(path, scope)
+        fingerprinted = None
+        if self._fingerprint:
+            fingerprinted = services.get_asset_manifest().resolve(path)
+            path = fingerprinted or path
+
+        response = None
+        if self._precompressed:
+            response = await self._get_encoded_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if self._precompressed and response.status_code in (200, 304):
+            response.headers["Vary"] = "Accept-Encoding"
 
         if response.status_code == 200:
-            for header, value in self._custom_headers.items():
-                if header.lower() not in response.headers:
-                    response.headers[header] = value
+            if fingerprinted:
+                response.headers["Cache-Control"] = \
+                    services.IMMUTABLE_CACHE_CONTROL
+            # update in place, response.headers is a view on this list
+            response.raw_headers[:] = self._policy.apply(response.raw_headers)
 
         return response
 
+    async def _get_encoded_response(
+        self,
+        path: str,
+        scope: Scope
+    ) -> Response | None:
+        """
+        Return a response for the best sidecar file of path accepted by the
+        client, or None if there is none. Requests with a Range header are
+        served uncompressed, as ranges refer to the uncompressed file.
+        Sidecars older than the file are stale (the file was changed after
+        compress-static ran) and are not served. The sidecars and the file
+        are looked up together in one thread, like StaticFiles does, so the
+        event loop is not blocked.
+        """
+        request_headers = Headers(scope=scope)
+        if "range" in request_headers:
+            return None
+
+        accepted = _get_accepted_encodings(
+            request_headers.get("accept-encoding", ""))
+        if not accepted:
+            return None
+
+        sidecar = await anyio.to_thread.run_sync(
+            self._lookup_sidecar, path, accepted)
+        if sidecar is None:
+            return None
+
+        encoding, full_path, stat_result = sidecar
+        media_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            media_type=media_type or "text/plain",
+            headers={"Content-Encoding": encoding}
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _lookup_sidecar(
+        self,
+        path: str,
+        accepted: Set[str]
+    ) -> Tuple[str, str, os.stat_result] | None:
+        """
+        Find the best sidecar of path in an accepted encoding that is not
+        stale. Returns its encoding, full path and stat result, or None. The
+        file itself is only looked up once a sidecar is found.
+        """
+        source_stat: os.stat_result | None = None
+        source_looked_up = False
+        for encoding, extension in SIDECAR_ENCODINGS:
+            if encoding not in accepted:
+                continue
+
+            full_path, stat_result = self.lookup_path(path + extension)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            if not source_looked_up:
+                _, source_stat = self.lookup_path(path)
+                source_looked_up = True
+            if source_stat is not None and \
+                    stat_result.st_mtime < source_stat.st_mtime:
+                logger.debug(f"Skipping stale sidecar '{full_path}'.")
+                continue
+
+            return encoding, full_path, stat_result
+
+        return None
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_accepted_encodings(accept_encoding: str) -> Set[str]:
+    """
+    Parse an Accept-Encoding header into the set of accepted encodings.
+    Encodings with a quality of zero are not accepted.
+    """
+    accepted = set()
+    for item in accept_encoding.split(","):
+        encoding, _, parameters = item.partition(";")
+        quality = parameters.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(encoding.strip().lower())
+
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in SIDECAR_ENCODINGS)
+    return accepted
+
+# ---------------------------------------------------------------------------- #
+
+
+def compress_static_files(directory: str | os.PathLike) -> int:
+    """
+    Write a .gz sidecar (and a .br sidecar, if the brotli package is
+    installed) at maximum compression level next to every compressible file
+    in directory. Sidecars that would not be smaller than the file are not
+    written. Returns the number of sidecars written.
+    """
+    if brotli is None:
+        logger.warning("Brotli is not installed, only gzip sidecars are "
+                       "written.")
+
+    written = 0
+    for file in sorted(pathlib.Path(directory).rglob("*")):
+        if not file.is_file() or file.suffix not in COMPRESSIBLE_EXTENSIONS:
+            continue
+
+        content = file.read_bytes()
+        sidecars = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            sidecars[".br"] = brotli.compress(content, quality=11)
+
+        for extension, compressed in sidecars.items():
+            sidecar = file.with_name(file.name + extension)
+            if len(compressed) >= len(content):
+                sidecar.unlink(missing_ok=True)
+                continue
+            sidecar.write_bytes(compressed)
+            written += 1
+
+        logger.info(f"Compressed '{file}'.")
+
+    return written
+
 # ---------------------------------------------------------------------------- #
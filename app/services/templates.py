@@ -1,12 +1,15 @@
 # ---------------------------------------------------------------------------- #
 
+import fastapi
+import hashlib
+import jinja2
+import json
 import logging
-from fastapi import Request, Response
+import os
 from fastapi.templating import Jinja2Templates
 from functools import lru_cache
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from typing import Awaitable, Callable, Dict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
 
 # ---------------------------------------------------------------------------- #
 
@@ -30,59 +33,259 @@ def get_templates() -> Jinja2Templates:
         raise Exception(
             "Templates are not enabled in the configuration.")
 
-    return Jinja2Templates(directory=config.templates.directory)
+    bytecode_cache = None
+    if config.templates.bytecode_cache:
+        directory = config.templates.bytecode_cache_directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(directory)
+
+    environment = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(config.templates.directory),
+        autoescape=True,
+        auto_reload=config.templates.auto_reload,
+        bytecode_cache=bytecode_cache
+    )
+
+    templates = Jinja2Templates(env=environment)
+    templates.env.globals["static_url"] = services.static_url
+    return templates
+
+# ---------------------------------------------------------------------------- #
+
+
+def precompile_templates() -> int:
+    """
+    Compile all templates in the templates directory, so the first requests
+    do not have to. Compiled templates are kept by the Jinja environment
+    (and written to the bytecode cache, if enabled). Returns the number of
+    compiled templates.
+    """
+    environment = get_templates().env
+    names = environment.list_templates()
+    for name in names:
+        environment.get_template(name)
+
+    logger.info(f"Precompiled {len(names)} templates.")
+    return len(names)
 
 # ---------------------------------------------------------------------------- #
 
 
-class TemplateHeaderMiddleware(BaseHTTPMiddleware):
+@lru_cache
+def get_etag_cache() -> services.TTLCache[Tuple[str, str, str], str]:
+    """
+    Returns the cache mapping a template name, the version of its source and
+    a fingerprint of its context to the ETag of the page rendered last from
+    them.
     """
-    Middleware to add custom headers to HTML responses. Please note
-    that this middleware will not add headers to Swagger UI responses.
+    config = services.get_configuration()
+    return services.TTLCache(
+        maxsize=config.templates.etag_cache_size,
+        ttl=config.templates.etag_cache_ttl
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+class TemplateHeaderMiddleware:
+    """
+    Pure ASGI middleware to add custom headers to HTML responses. Please
+    note that this middleware will not add headers to Swagger UI responses.
     It is designed to be used with FastAPI applications that serve HTML
-    templates, such as those rendered with Jinja2.
+    templates, such as those rendered with Jinja2. Only the
+    http.response.start message is inspected, the body is passed through
+    untouched, so streaming responses are not buffered.
     """
+    _app: ASGIApp
     _custom_headers: Dict[str, str]
+    _policy: services.HeaderPolicy
     _swagger_path: str | None
 
-    def __init__(
-        self,
-        app: ASGIApp,
-        dispatch: Callable[[Request, Callable[[
-            Request], Awaitable[Response]]], Awaitable[Response]] | None = None
-    ) -> None:
+    def __init__(self, app: ASGIApp) -> None:
         """
-        Initializes the TemplateHeaderMiddleware.
+        Initializes the TemplateHeaderMiddleware. The headers are compiled
+        once here instead of on every request.
         """
-        super().__init__(app, dispatch)
+        self._app = app
 
         config = services.get_configuration()
 
         self._custom_headers = config.templates.headers
+        self._policy = services.HeaderPolicy(self._custom_headers)
         self._swagger_path = config.app.swagger_path
 
         logger.info("Template headers middleware initialized")
 
-    async def dispatch(
+    async def __call__(
         self,
-        request: Request,
-        call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
         """
-        Custom dispatch method to add headers to HTML responses. Please note
-        that this method will not add headers to Swagger UI responses and
-        will only add headers to responses that have a content type of
-        "text/html". It will only add headers if they are not already
-        present in the response headers.
+        Add the headers to the response start message of HTML responses.
         """
-        response = await call_next(request)
+        if scope["type"] != "http" or scope["path"] == self._swagger_path:
+            await self._app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            """
+            Add the headers if the message starts an HTML response.
+            """
+            if message["type"] == "http.response.start":
+                message["headers"] = self._add_headers(
+                    message.get("headers", []))
+            await send(message)
 
-        if "text/html" in response.headers.get("content-type", "") \
-                and request.scope["path"] != self._swagger_path:
-            for header, value in self._custom_headers.items():
-                if header.lower() not in response.headers:
-                    response.headers[header] = value
+        await self._app(scope, receive, send_wrapper)
+
+    def _add_headers(
+        self,
+        headers: Iterable[Tuple[bytes, bytes]]
+    ) -> List[Tuple[bytes, bytes]]:
+        """
+        Add the custom headers to the headers of an HTML response. Headers
+        already present in the response are kept. Responses with another
+        content type are returned unchanged.
+        """
+        headers = list(headers)
+        for name, value in headers:
+            if name == b"content-type":
+                if b"text/html" in value:
+                    return self._policy.apply(headers)
+                break
+        return headers
+
+# ---------------------------------------------------------------------------- #
 
+
+def render_template(
+    templates: Jinja2Templates,
+    request: fastapi.Request,
+    name: str,
+    context: Dict[str, Any] | None = None,
+    status_code: int = 200
+) -> fastapi.Response:
+    """
+    Render a template into an HTML response with an ETag computed from the
+    rendered page. If the If-None-Match header of the request matches the
+    ETag, an empty 304 (Not Modified) response is returned instead. If the
+    ETag cache is enabled, the ETag of the last page rendered from the same
+    template source and context is remembered, so a matching conditional
+    request is answered without rendering the template at all. The ETag is
+    weak, as the page may be compressed on the way to the client.
+    """
+    config = services.get_configuration()
+    context = context or {}
+    if_none_match = request.headers.get("if-none-match")
+
+    key = None
+    if status_code == 200 and config.templates.etag_cache_size > 0:
+        key = (name, _get_template_version(templates, name),
+               _get_context_fingerprint(context))
+        if if_none_match is not None:
+            try:
+                etag = get_etag_cache().get(key)
+                if etag_matches(etag, if_none_match):
+                    return not_modified_response(etag)
+            except KeyError:
+                pass
+
+    response = templates.TemplateResponse(
+        request, name, context=context, status_code=status_code)
+    if status_code != 200:
         return response
 
+    etag = _get_etag(bytes(response.body))
+    if key is not None:
+        get_etag_cache().set(key, etag)
+
+    if if_none_match is not None and etag_matches(etag, if_none_match):
+        return not_modified_response(etag)
+
+    response.headers["ETag"] = etag
+    return response
+
+# ---------------------------------------------------------------------------- #
+
+
+def not_modified_response(etag: str) -> fastapi.Response:
+    """
+    Create an empty 304 (Not Modified) response. It has no content type, so
+    the TemplateHeaderMiddleware skips it - the template headers (e.g.
+    Cache-Control) are added here, as a 304 must repeat them.
+    """
+    config = services.get_configuration()
+    return fastapi.Response(
+        status_code=304,
+        headers={**config.templates.headers, "ETag": etag}
+    )
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_etag(body: bytes) -> str:
+    """
+    Compute a weak ETag from a response body. BLAKE2b is used as it is
+    faster than SHA-256, and 128 bits are plenty to tell pages apart.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_template_version(templates: Jinja2Templates, name: str) -> str:
+    """
+    Get the version of the source of a template, the modification time of
+    its file, so pages are not answered from the ETag cache after the
+    template was changed (and reloaded, if auto_reload is enabled). Getting
+    the template is cheap, as the Jinja environment keeps loaded templates.
+    Templates without a file (e.g. from a DictLoader) have no version.
+    """
+    filename = templates.get_template(name).filename
+    if filename is None:
+        return ""
+
+    try:
+        return str(os.stat(filename).st_mtime_ns)
+    except OSError:
+        return ""
+
+# ---------------------------------------------------------------------------- #
+
+
+def _get_context_fingerprint(context: Mapping[str, Any]) -> str:
+    """
+    Compute a fingerprint of a template context. The request is left out,
+    as it differs on every call. Values that are not JSON serializable are
+    represented by their repr(), which may change between calls - at worst
+    the render is not skipped then.
+    """
+    serialized = json.dumps(
+        {key: value for key, value in context.items() if key != "request"},
+        sort_keys=True,
+        default=repr
+    )
+    return hashlib.blake2b(
+        serialized.encode("utf-8"), digest_size=16).hexdigest()
+
+# ---------------------------------------------------------------------------- #
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Check if an ETag matches an If-None-Match header, using the weak
+    comparison required for If-None-Match (the W/ prefix is ignored).
+    """
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
 # ---------------------------------------------------------------------------- #
@@ -0,0 +1,163 @@
+# ---------------------------------------------------------------------------- #
+
+import base64
+import fastapi
+import fastapi.security
+import hashlib
+import hmac
+import json
+import logging
+import time
+import pydantic
+from functools import lru_cache
+
+# ---------------------------------------------------------------------------- #
+
+import app.services as services
+import app.schemas as schemas
+
+# ---------------------------------------------------------------------------- #
+
+logger = logging.getLogger("app.services")
+
+# ---------------------------------------------------------------------------- #
+
+TOKEN_HEADER = base64.urlsafe_b64encode(
+    b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+MIN_SECRET_KEY_LENGTH = 32
+
+# ---------------------------------------------------------------------------- #
+
+
+class InvalidTokenError(Exception):
+    """
+    Raised if a token is malformed, has an invalid signature or has
+    expired.
+    """
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_secret_key() -> bytes:
+    """
+    Returns the secret key used to sign tokens. The key is taken from the
+    configuration and may contain environment variable placeholders. Raises
+    an exception if the key is shorter than MIN_SECRET_KEY_LENGTH bytes
+    (e.g. an empty SECRET_KEY), as tokens signed with it could be forged.
+    """
+    config = services.get_configuration()
+    key = services.resolve_placeholders(config.auth.secret_key).encode()
+    if len(key) < MIN_SECRET_KEY_LENGTH:
+        raise Exception(
+            f"The secret key must be at least {MIN_SECRET_KEY_LENGTH} bytes "
+            f"long, set auth.secret_key (or SECRET_KEY) to a random value.")
+    return key
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_token(user_id: int, username: str) -> str:
+    """
+    Create a signed, stateless access token (a JWT signed with HMAC-SHA256)
+    for a user. The token expires after the configured number of minutes.
+    """
+    config = services.get_configuration()
+    issued = int(time.time())
+
+    payload = schemas.TokenPayloadSchema(
+        sub=username,
+        uid=user_id,
+        iat=issued,
+        exp=issued + config.auth.token_expire_minutes * 60
+    )
+
+    message = TOKEN_HEADER + b"." + _encode(
+        payload.model_dump_json().encode())
+    return (message + b"." + _encode(_sign(message))).decode()
+
+# ---------------------------------------------------------------------------- #
+
+
+def decode_token(token: str) -> schemas.TokenPayloadSchema:
+    """
+    Validate a token created by create_token() and return its payload. This
+    only needs the secret key, no database access. Raises an
+    InvalidTokenError if the token is malformed, has an invalid signature
+    or has expired.
+    """
+    try:
+        header, payload, signature = token.encode().split(b".")
+        if header != TOKEN_HEADER:
+            raise InvalidTokenError("Unsupported token header.")
+
+        if not hmac.compare_digest(
+                _decode(signature), _sign(header + b"." + payload)):
+            raise InvalidTokenError("Invalid token signature.")
+
+        result = schemas.TokenPayloadSchema.model_validate_json(
+            _decode(payload))
+    except (ValueError, UnicodeError, pydantic.ValidationError) as exception:
+        raise InvalidTokenError("Malformed token.") from exception
+
+    if result.exp < time.time():
+        raise InvalidTokenError("Token has expired.")
+
+    return result
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_token_payload(
+    credentials: fastapi.security.HTTPAuthorizationCredentials | None =
+        fastapi.Depends(fastapi.security.HTTPBearer(auto_error=False))
+) -> schemas.TokenPayloadSchema:
+    """
+    Validate the bearer token of a request and return its payload. Raises
+    an HTTP 401 error if the token is missing or invalid.
+    """
+    if credentials is None:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    try:
+        return decode_token(credentials.credentials)
+    except InvalidTokenError as exception:
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_401_UNAUTHORIZED,
+            detail=str(exception),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+# ---------------------------------------------------------------------------- #
+
+
+def _sign(message: bytes) -> bytes:
+    """
+    Sign a message with the secret key.
+    """
+    return hmac.new(get_secret_key(), message, hashlib.sha256).digest()
+
+# ---------------------------------------------------------------------------- #
+
+
+def _encode(value: bytes) -> bytes:
+    """
+    Encode bytes as unpadded url-safe base64.
+    """
+    return base64.urlsafe_b64encode(value).rstrip(b"=")
+
+# ---------------------------------------------------------------------------- #
+
+
+def _decode(value: bytes) -> bytes:
+    """
+    Decode unpadded url-safe base64.
+    """
+    return base64.urlsafe_b64decode(value + b"=" * (-len(value) % 4))
+
+# ---------------------------------------------------------------------------- #
@@ -1,43 +1,145 @@
 # ---------------------------------------------------------------------------- #
 
+import asyncio
 import concurrent.futures
+import functools
 import logging
-from typing import Any
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
 from functools import lru_cache
 
 # ---------------------------------------------------------------------------- #
 
 import app.services as services
+import app.schemas as schemas
 
 # ---------------------------------------------------------------------------- #
 
 logger = logging.getLogger("app.services")
 
+T = TypeVar("T")
+
 # ---------------------------------------------------------------------------- #
 
 
-class WorkerPool(concurrent.futures.ThreadPoolExecutor):
+class WorkerPoolFullError(Exception):
     """
-    Custom ThreadPoolExecutor that can be extended with additional methods
-    or properties if needed in the future.
+    Raised if a task cannot be submitted because the queue of the worker
+    pool is full.
     """
 
-    def __init__(self) -> None:
+# ---------------------------------------------------------------------------- #
+
+
+class WorkerPool(concurrent.futures.Executor):
+    """
+    Base class for the worker pools, adding a bounded queue and an asyncio
+    bridge to an executor. It is combined with a concrete executor class,
+    see ThreadWorkerPool and ProcessWorkerPool. If the queue is full, new
+    tasks are handled according to the configured policy: they are
+    rejected, the caller is blocked until there is room, or the oldest task
+    that has not started yet is cancelled.
+
+    If metrics are enabled, the queue wait and run time of every task are
+    recorded. Executors do not report when a task starts, so tasks are
+    assumed to start in order as soon as a worker is free. Process pools
+    hand a few tasks to their workers early, so for them the queue wait
+    is slightly overestimated and the run time underestimated. The metrics
+    are labelled by the kind of the pool (e.g. pool="thread"), as a process
+    worker pool is used next to a thread worker pool.
+    """
+    label: str
+    _max_workers: int
+    _max_queue_size: int
+    _queue_policy: schemas.WorkerQueuePolicyEnum
+    _condition: threading.Condition
+    _futures: Dict[
+        concurrent.futures.Future, Tuple[float, float | None] | None]
+    _waiters: List[asyncio.Future]
+    _closed: bool
+    _queue_wait: services.Histogram | None
+    _run_time: services.Histogram | None
+    _rejected: services.Counter | None
+
+    def __init__(self, **kwargs: Any) -> None:
         """
-        Initialize the WorkerPool with a maximum number of workers
-        based on the configuration.
+        Initialize the WorkerPool with a maximum number of workers, a
+        maximum queue size and a queue policy based on the configuration.
+        Additional keyword arguments are passed to the executor.
         """
         config = services.get_configuration()
-        super().__init__(max_workers=config.workers.max_workers)
-        logger.info(f"WorkerPool initialized (with a maximum of "
+        super().__init__(  # type: ignore[call-arg]
+            max_workers=config.workers.max_workers, **kwargs)
+
+        self._max_queue_size = config.workers.max_queue_size
+        self._queue_policy = config.workers.queue_policy
+        self._condition = threading.Condition(threading.RLock())
+        self._futures = {}
+        self._waiters = []
+        self._closed = False
+        self._queue_wait = None
+        self._run_time = None
+        self._rejected = None
+
+        if config.metrics.enabled:
+            self._register_metrics()
+
+        logger.info(f"{type(self).__name__} initialized (with a maximum of "
                     f"{config.workers.max_workers} workers).")
 
-    def submit(self, *args: Any, **kwargs: Any) -> concurrent.futures.Future:
+    @property
+    def queue_size(self) -> int:
         """
-        Submit a task to the worker pool.
+        Return the number of submitted tasks that have not started yet.
+        """
+        return max(0, len(self._futures) - self._max_workers)
+
+    def submit(
+        self,
+        fn: Callable[..., T],
+        /,
+        *args: Any,
+        **kwargs: Any
+    ) -> concurrent.futures.Future[T]:
+        """
+        Submit a task to the worker pool. If the queue is full, the task is
+        handled according to the queue policy. Note that the block policy
+        blocks the calling thread, use run() on the event loop instead.
         """
         logger.debug("Submitting task to worker pool.")
-        return super().submit(*args, **kwargs)
+        return self._submit(fn, args, kwargs, block=True)
+
+    async def enqueue(
+        self,
+        fn: Callable[..., T],
+        /,
+        *args: Any,
+        **kwargs: Any
+    ) -> concurrent.futures.Future[T]:
+        """
+        Submit a task to the worker pool without blocking the event loop
+        and return its future. With the block policy, the caller waits
+        asynchronously until there is room in the queue.
+        """
+        while True:
+            try:
+                return self._submit(fn, args, kwargs, block=False)
+            except WorkerPoolFullError:
+                if self._queue_policy != \
+                        schemas.WorkerQueuePolicyEnum.BLOCK:
+                    raise
+                await self._wait_for_room()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a task on the worker pool and await its result without blocking
+        the event loop, see enqueue().
+        """
+        logger.debug("Running task on worker pool.")
+        future = await self.enqueue(fn, *args, **kwargs)
+        return await asyncio.wrap_future(future)
 
     def shutdown(self, *args: Any, **kwargs: Any) -> None:
         """
@@ -45,17 +147,270 @@ class WorkerPool(concurrent.futures.ThreadPoolExecutor):
         """
         logger.info("Shutting down worker pool.")
         logger.debug(
-            f"Worker pool remaining queue size: {self._work_queue.qsize()}")
+            f"Worker pool remaining queue size: {self.queue_size}")
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
         super().shutdown(*args, **kwargs)
 
+    def _submit(
+        self,
+        fn: Callable[..., T],
+        args: Any,
+        kwargs: Any,
+        block: bool
+    ) -> concurrent.futures.Future[T]:
+        """
+        Make room for a task according to the queue policy and submit it.
+        Raises a WorkerPoolFullError if there is no room and the task can
+        neither wait (block is False) nor replace an older task.
+        """
+        with self._condition:
+            if not self._has_room():
+                if self._queue_policy == \
+                        schemas.WorkerQueuePolicyEnum.DROP_OLDEST:
+                    self._drop_oldest()
+                elif self._queue_policy == \
+                        schemas.WorkerQueuePolicyEnum.BLOCK and block:
+                    self._condition.wait_for(
+                        lambda: self._has_room() or self._closed)
+                else:
+                    if self._rejected is not None:
+                        self._rejected.inc(labels=(self.label,))
+                    logger.warning("Worker pool queue is full, task rejected.")
+                    raise WorkerPoolFullError("Worker pool queue is full.")
+
+            future = super().submit(fn, *args, **kwargs)
+            if self._queue_wait is None:
+                self._futures[future] = None
+            else:
+                submitted = time.perf_counter()
+                self._futures[future] = (
+                    submitted,
+                    submitted if self._active_workers() < self._max_workers
+                    else None
+                )
+
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _has_room(self) -> bool:
+        """
+        Check if another task fits into the queue. A maximum queue size of
+        zero means the queue is unbounded.
+        """
+        return self._max_queue_size <= 0 or \
+            len(self._futures) < self._max_workers + self._max_queue_size
+
+    def _drop_oldest(self) -> None:
+        """
+        Cancel the oldest task that has not started yet. Must be called
+        with the condition held.
+        """
+        for future in self._futures:
+            if future.cancel():
+                logger.warning("Worker pool queue is full, oldest task "
+                               "dropped.")
+                return
+
+        raise WorkerPoolFullError("Worker pool queue is full.")
+
+    def _task_done(self, future: concurrent.futures.Future) -> None:
+        """
+        Forget a finished (or cancelled) task and wake up callers waiting
+        for room in the queue.
+        """
+        with self._condition:
+            times = self._futures.pop(future, None)
+            if times is not None:
+                finished = time.perf_counter()
+                self._start_tasks(finished)
+            self._condition.notify()
+            waiters, self._waiters = self._waiters, []
+
+        if times is not None and not future.cancelled():
+            submitted, started = times
+            started = finished if started is None else started
+            if self._queue_wait is not None and self._run_time is not None:
+                self._queue_wait.observe(
+                    started - submitted, labels=(self.label,))
+                self._run_time.observe(
+                    finished - started, labels=(self.label,))
+
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(
+                functools.partial(_wake, waiter))
+
+    def _active_workers(self) -> int:
+        """
+        Return the number of tasks that are running.
+        """
+        return min(len(self._futures), self._max_workers)
+
+    def _start_tasks(self, now: float) -> None:
+        """
+        Record the start time of the tasks that just got a free worker.
+        Must be called with the condition held.
+        """
+        for index, (future, times) in enumerate(self._futures.items()):
+            if index >= self._max_workers:
+                break
+            if times is not None and times[1] is None:
+                self._futures[future] = (times[0], now)
+
+    def _register_metrics(self) -> None:
+        """
+        Register the metrics of the worker pool, labelled by its kind. The
+        gauges are read by a collector of the pool, which replaces the
+        collector of an earlier pool of the same kind.
+        """
+        registry = services.get_metrics_registry()
+        self._queue_wait = registry.histogram(
+            "worker_pool_queue_wait_seconds",
+            "Time tasks spent in the worker pool queue.",
+            label_names=("pool",))
+        self._run_time = registry.histogram(
+            "worker_pool_task_duration_seconds",
+            "Time tasks spent running on the worker pool.",
+            label_names=("pool",))
+        self._rejected = registry.counter(
+            "worker_pool_rejected_tasks_total",
+            "Tasks rejected because the worker pool queue was full.",
+            label_names=("pool",))
+        registry.collector(f"worker_pool_{self.label}", self._collect_metrics)
+
+    def _collect_metrics(self) -> None:
+        """
+        Read the state of the worker pool into gauges.
+        """
+        registry = services.get_metrics_registry()
+        labels = (self.label,)
+        registry.gauge(
+            "worker_pool_active_workers",
+            "Workers of the worker pool that are running a task.",
+            label_names=("pool",)).set(self._active_workers(), labels)
+        registry.gauge(
+            "worker_pool_queue_depth",
+            "Tasks waiting in the worker pool queue.",
+            label_names=("pool",)).set(self.queue_size, labels)
+        registry.gauge(
+            "worker_pool_max_workers",
+            "Maximum number of workers of the worker pool.",
+            label_names=("pool",)).set(self._max_workers, labels)
+
+    async def _wait_for_room(self) -> None:
+        """
+        Wait asynchronously until a task finishes.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        with self._condition:
+            if self._has_room():
+                return
+            self._waiters.append(waiter)
+
+        await waiter
+
+# ---------------------------------------------------------------------------- #
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    """
+    Resolve a waiter unless it has been cancelled in the meantime.
+    """
+    if not waiter.done():
+        waiter.set_result(None)
+
+# ---------------------------------------------------------------------------- #
+
+
+class ThreadWorkerPool(WorkerPool, concurrent.futures.ThreadPoolExecutor):
+    """
+    Worker pool running tasks on threads. Tasks share the GIL, so this suits
+    I/O-bound tasks and C extensions that release the GIL (like hashlib).
+    """
+    label = "thread"
+
+# ---------------------------------------------------------------------------- #
+
+
+class ProcessWorkerPool(WorkerPool, concurrent.futures.ProcessPoolExecutor):
+    """
+    Worker pool running tasks on processes, so CPU-bound Python code scales
+    across cores. Tasks and their arguments and results must be picklable.
+    Processes are spawned rather than forked, because forking a process
+    running threads (like the event loop and the thread pool) is unsafe.
+    """
+    label = "process"
+
+    def __init__(self) -> None:
+        """
+        Initialize the ProcessWorkerPool.
+        """
+        super().__init__(mp_context=multiprocessing.get_context("spawn"))
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_worker_pool(mode: schemas.WorkerModeEnum) -> WorkerPool:
+    """
+    Create a worker pool for the given mode. Subinterpreters need
+    concurrent.futures.InterpreterPoolExecutor (Python 3.14+), if it is not
+    available the process mode is used instead.
+    """
+    if mode == schemas.WorkerModeEnum.INTERPRETER:
+        executor_class = getattr(
+            concurrent.futures, "InterpreterPoolExecutor", None)
+        if executor_class is not None:
+            pool_class = type(
+                "InterpreterWorkerPool", (WorkerPool, executor_class),
+                {"label": "interpreter"})
+            return pool_class()
+
+        logger.warning("Subinterpreters are not available, falling back to "
+                       "the process worker pool.")
+        mode = schemas.WorkerModeEnum.PROCESS
+
+    if mode == schemas.WorkerModeEnum.PROCESS:
+        return ProcessWorkerPool()
+
+    return ThreadWorkerPool()
+
+# ---------------------------------------------------------------------------- #
+
+
+@lru_cache
+def get_worker_pool() -> WorkerPool:
+    """
+    Returns a WorkerPool instance for the configured mode (threads,
+    processes or subinterpreters).
+    """
+    config = services.get_configuration()
+    return create_worker_pool(config.workers.mode)
+
 # ---------------------------------------------------------------------------- #
 
 
 @lru_cache
-def get_worker_pool() -> concurrent.futures.ThreadPoolExecutor:
+def _get_thread_worker_pool() -> WorkerPool:
+    """
+    Returns the ThreadWorkerPool used next to a process or subinterpreter
+    worker pool.
+    """
+    return ThreadWorkerPool()
+
+# ---------------------------------------------------------------------------- #
+
+
+def get_thread_worker_pool() -> WorkerPool:
     """
-    Returns a ThreadPoolExecutor instance for managing worker threads.
+    Returns a WorkerPool running tasks on threads of this process, for
+    tasks that need its resources (like the database engines or the crud
+    cache), which process and subinterpreter workers do not have. In thread
+    mode, this is the worker pool itself.
     """
-    return WorkerPool()
+    config = services.get_configuration()
+    if config.workers.mode == schemas.WorkerModeEnum.THREAD:
+        return get_worker_pool()
+    return _get_thread_worker_pool()
 
 # ---------------------------------------------------------------------------- #
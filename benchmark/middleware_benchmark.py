@@ -0,0 +1,143 @@
+# ---------------------------------------------------------------------------- #
+
+"""
+Benchmark the per-request overhead of the template header middleware. The
+previous implementation based on Starlette's BaseHTTPMiddleware (kept here
+for reference) is compared with the pure ASGI TemplateHeaderMiddleware and
+with no middleware at all, for a JSON and an HTML endpoint. Requests are
+sent one after another through an in-process ASGI transport, so the
+numbers only contain framework overhead. The best of several rounds is
+reported to reduce noise.
+
+Usage:
+
+    CONFIG=config.dev.json python -m benchmark.middleware_benchmark \\
+        --requests 5000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import fastapi
+import httpx
+import os
+import time
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp
+from typing import Awaitable, Callable, Dict
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+
+class BaseHTTPTemplateHeaderMiddleware(BaseHTTPMiddleware):
+    """
+    The previous TemplateHeaderMiddleware, based on BaseHTTPMiddleware.
+    """
+
+    async def dispatch(
+        self,
+        request: fastapi.Request,
+        call_next: Callable[[fastapi.Request], Awaitable[fastapi.Response]]
+    ) -> fastapi.Response:
+        """
+        Add the configured headers to HTML responses.
+        """
+        config = services.get_configuration()
+        response = await call_next(request)
+
+        if "text/html" in response.headers.get("content-type", "") \
+                and request.scope["path"] != config.app.swagger_path:
+            for header, value in config.templates.headers.items():
+                if header.lower() not in response.headers:
+                    response.headers[header] = value
+
+        return response
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_benchmark_app(
+    middleware: Callable[[ASGIApp], ASGIApp] | None
+) -> fastapi.FastAPI:
+    """
+    Create a minimal app with a JSON and an HTML endpoint and the given
+    middleware.
+    """
+    app = fastapi.FastAPI()
+
+    @app.get("/json")
+    async def json() -> Dict:
+        return {"message": "hello"}
+
+    @app.get("/html", response_class=fastapi.responses.HTMLResponse)
+    async def html() -> str:
+        return "<html><body>hello</body></html>"
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    return app
+
+# ---------------------------------------------------------------------------- #
+
+
+async def run(app: fastapi.FastAPI, path: str, requests: int) -> float:
+    """
+    Send requests to path one after another and return the mean time per
+    request in microseconds.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark") as client:
+        for _ in range(100):
+            await client.get(path)
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get(path)
+            response.raise_for_status()
+        return (time.perf_counter() - start) / requests * 1e6
+
+# ---------------------------------------------------------------------------- #
+
+
+async def main(requests: int, rounds: int) -> None:
+    """
+    Run the benchmark for every middleware and endpoint and print the
+    results.
+    """
+    middlewares: Dict[str, Callable[[ASGIApp], ASGIApp] | None] = {
+        "none": None,
+        "base-http": BaseHTTPTemplateHeaderMiddleware,
+        "asgi": services.TemplateHeaderMiddleware,
+    }
+
+    for path in ("/json", "/html"):
+        baseline = None
+        for name, middleware in middlewares.items():
+            app = create_benchmark_app(middleware)
+            mean = min([
+                await run(app, path, requests) for _ in range(rounds)
+            ])
+            baseline = baseline or mean
+            print(f"{path:<6} {name:<10} {mean:8.1f} us/request   overhead "
+                  f"{mean - baseline:7.1f} us")
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the template header middleware overhead.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    arguments = parser.parse_args()
+
+    asyncio.run(main(arguments.requests, arguments.rounds))
+
+# ---------------------------------------------------------------------------- #
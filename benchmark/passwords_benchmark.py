@@ -0,0 +1,124 @@
+# ---------------------------------------------------------------------------- #
+
+"""
+Benchmark password hashing on the event loop vs. offloaded to the worker
+pool. Two endpoints are served from a minimal FastAPI app and hammered
+concurrently through an in-process ASGI transport, while a ticker task
+measures how late the event loop wakes it up (the lag every other request
+on the same worker would experience).
+
+Usage:
+
+    CONFIG=config.dev.json python -m benchmark.passwords_benchmark \\
+        --requests 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import fastapi
+import httpx
+import os
+import statistics
+import time
+from typing import List, Tuple
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+
+def create_benchmark_app() -> fastapi.FastAPI:
+    """
+    Create a minimal app with one endpoint hashing on the event loop and one
+    endpoint hashing on the worker pool.
+    """
+    app = fastapi.FastAPI()
+
+    @app.post("/on-loop")
+    async def on_loop() -> str:
+        return services.hash_password("benchmarkpassword")
+
+    @app.post("/offloaded")
+    async def offloaded() -> str:
+        return await services.hash_password_async("benchmarkpassword")
+
+    return app
+
+# ---------------------------------------------------------------------------- #
+
+
+async def run(
+    client: httpx.AsyncClient,
+    path: str,
+    requests: int,
+    concurrency: int
+) -> Tuple[float, List[float]]:
+    """
+    Send requests to path with the given concurrency while measuring the
+    event loop lag. Returns the requests per second and the lag samples in
+    milliseconds.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+    lags: List[float] = []
+
+    async def request() -> None:
+        async with semaphore:
+            response = await client.post(path)
+            response.raise_for_status()
+
+    async def tick() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append((time.perf_counter() - start - 0.01) * 1000)
+
+    ticker = asyncio.create_task(tick())
+    start = time.perf_counter()
+    await asyncio.gather(*(request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+
+    return requests / elapsed, lags
+
+# ---------------------------------------------------------------------------- #
+
+
+async def main(requests: int, concurrency: int) -> None:
+    """
+    Run the benchmark for both endpoints and print the results.
+    """
+    config = services.get_configuration()
+    print(f"algorithm={config.passwords.algorithm.value} "
+          f"scrypt_n={config.passwords.scrypt_n} "
+          f"workers={config.workers.max_workers} cpus={os.cpu_count()}")
+
+    transport = httpx.ASGITransport(app=create_benchmark_app())
+    async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark") as client:
+        for path in ("/on-loop", "/offloaded"):
+            rps, lags = await run(client, path, requests, concurrency)
+            print(f"{path:<12} {rps:8.1f} req/s   loop lag p50 "
+                  f"{statistics.median(lags):8.1f} ms   max "
+                  f"{max(lags):8.1f} ms")
+
+    services.get_worker_pool().shutdown(wait=True)
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark password hashing on vs. off the event loop.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    arguments = parser.parse_args()
+
+    asyncio.run(main(arguments.requests, arguments.concurrency))
+
+# ---------------------------------------------------------------------------- #
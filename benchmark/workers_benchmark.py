@@ -0,0 +1,99 @@
+# ---------------------------------------------------------------------------- #
+
+"""
+Benchmark the worker pool modes on a CPU-bound pure-Python task. Threads
+share the GIL, so they should not scale beyond one core, while processes
+(and subinterpreters, on Python 3.14+) should scale with the number of
+workers up to the number of cores.
+
+Usage:
+
+    CONFIG=config.dev.json python -m benchmark.workers_benchmark \\
+        --tasks 32 --limit 50000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+# ---------------------------------------------------------------------------- #
+
+os.environ.setdefault("CONFIG", "config.dev.json")
+
+import app.schemas as schemas
+import app.services as services
+
+# ---------------------------------------------------------------------------- #
+
+
+def count_primes(limit: int) -> int:
+    """
+    Count the primes below limit by trial division. Pure Python, so the GIL
+    is held for the entire task.
+    """
+    count = 0
+    for number in range(2, limit):
+        divisor = 2
+        while divisor * divisor <= number:
+            if number % divisor == 0:
+                break
+            divisor += 1
+        else:
+            count += 1
+    return count
+
+# ---------------------------------------------------------------------------- #
+
+
+async def run(mode: schemas.WorkerModeEnum, tasks: int, limit: int) -> float:
+    """
+    Run the tasks on a worker pool of the given mode and return the tasks
+    per second. The workers are started before the clock starts, so process
+    start-up is not measured.
+    """
+    worker_pool = services.create_worker_pool(mode)
+    try:
+        await asyncio.gather(*(
+            worker_pool.run(count_primes, 2)
+            for _ in range(worker_pool._max_workers)
+        ))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker_pool.run(count_primes, limit) for _ in range(tasks)
+        ))
+        return tasks / (time.perf_counter() - start)
+    finally:
+        worker_pool.shutdown(wait=True)
+
+# ---------------------------------------------------------------------------- #
+
+
+async def main(tasks: int, limit: int) -> None:
+    """
+    Run the benchmark for every mode and print the results.
+    """
+    config = services.get_configuration()
+    print(f"workers={config.workers.max_workers} cpus={os.cpu_count()}")
+
+    baseline = None
+    for mode in schemas.WorkerModeEnum:
+        rate = await run(mode, tasks, limit)
+        baseline = baseline or rate
+        print(f"{mode.value:<12} {rate:8.1f} tasks/s   "
+              f"{rate / baseline:5.2f}x")
+
+# ---------------------------------------------------------------------------- #
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the worker pool modes on a CPU-bound task.")
+    parser.add_argument("--tasks", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=50000)
+    arguments = parser.parse_args()
+
+    asyncio.run(main(arguments.tasks, arguments.limit))
+
+# ---------------------------------------------------------------------------- #
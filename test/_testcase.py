@@ -1,17 +1,21 @@
 # ---------------------------------------------------------------------------- #
 
+import asyncio
 import unittest
 import sqlmodel
 import sqlmodel.pool
 import sqlalchemy
+import sqlalchemy.ext.asyncio
+from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from unittest.mock import patch
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 # ---------------------------------------------------------------------------- #
 
 import app.core as core
+import app.crud as crud
 import app.database as database
 import app.services as services
 import app.schemas as schemas
@@ -31,14 +35,22 @@ def create_test_configuration() -> schemas.ConfigSchema:
             description="Test Description",
             title="Test Title"
         ),
+        auth=schemas.AuthConfigSchema(
+            secret_key="test-secret-key-of-at-least-32-bytes"
+        ),
         backend=schemas.BackendConfigSchema(),
         cors=schemas.CorsConfigSchema(),
         database=schemas.DatabaseConfigSchema(
             url="sqlite://",
+            async_enabled=True
         ),
         gzip=schemas.GzipConfigSchema(
             enabled=True
         ),
+        passwords=schemas.PasswordsConfigSchema(
+            scrypt_n=1024,
+            pbkdf2_iterations=1000
+        ),
         static_files=schemas.StaticFilesConfigSchema(
             enabled=True,
             headers={"Cache-Control": "no-cache"},
@@ -65,7 +77,9 @@ class TestCase(unittest.IsolatedAsyncioTestCase):
     app: FastAPI
     client: TestClient
     engine: sqlalchemy.engine.base.Engine
+    async_engine: sqlalchemy.ext.asyncio.AsyncEngine
     session: sqlmodel.Session
+    async_session: AsyncSession
     api_version: str
 
     config: schemas.ConfigSchema
@@ -106,6 +120,13 @@ class TestCase(unittest.IsolatedAsyncioTestCase):
             poolclass=sqlmodel.pool.StaticPool,
         )
 
+        # Initialize a separate in-memory SQLite database for async sessions
+        cls.async_engine = sqlalchemy.ext.asyncio.create_async_engine(
+            "sqlite+aiosqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=sqlmodel.pool.StaticPool,
+        )
+
         # Set the API version to an empty string (should be set in tests)
         cls.api_version = ""
 
@@ -121,10 +142,21 @@ class TestCase(unittest.IsolatedAsyncioTestCase):
         # Create a new session for testing
         self.session = sqlmodel.Session(self.engine)
 
+        # Forget users cached by previous tests
+        crud.get_crud_cache.cache_clear()
+        crud.get_credentials_cache.cache_clear()
+
+        # Forget jobs submitted by previous tests
+        services.get_job_manager.cache_clear()
+
         # Override the database session and configuration dependencies
         def get_session_override() -> Generator[sqlmodel.Session]:
             yield self.session
 
+        async def get_async_session_override(
+        ) -> AsyncGenerator[AsyncSession]:
+            yield self.async_session
+
         def get_config_override() -> schemas.ConfigSchema:
             return self.config
 
@@ -133,9 +165,38 @@ class TestCase(unittest.IsolatedAsyncioTestCase):
         ] = get_session_override
 
         self.app.dependency_overrides[
-            services.get_configuration
+            database.get_database_async_session
+        ] = get_async_session_override
+
+        self.app.dependency_overrides[
+            database.get_database_read_session
+        ] = get_session_override
+
+        self.app.dependency_overrides[
+            database.get_database_read_async_session
+        ] = get_async_session_override
+
+        self.app.dependency_overrides[
+            services.config.get_configuration
         ] = get_config_override
 
+    async def asyncSetUp(self) -> None:
+        """
+        Set up the async SQLite database for testing. This runs before each
+        test, after setUp(), inside the test's event loop.
+        """
+        async with self.async_engine.begin() as connection:
+            await connection.run_sync(sqlmodel.SQLModel.metadata.drop_all)
+            await connection.run_sync(sqlmodel.SQLModel.metadata.create_all)
+
+        self.async_session = AsyncSession(self.async_engine)
+
+    async def asyncTearDown(self) -> None:
+        """
+        Clean up the async session after each test.
+        """
+        await self.async_session.close()
+
     def tearDown(self) -> None:
         """
         Clean up the test case by closing the session and removing the
@@ -143,7 +204,14 @@ class TestCase(unittest.IsolatedAsyncioTestCase):
         """
         self.session.close()
         self.app.dependency_overrides.pop(database.get_database_session, None)
-        self.app.dependency_overrides.pop(services.get_configuration, None)
+        self.app.dependency_overrides.pop(
+            database.get_database_async_session, None)
+        self.app.dependency_overrides.pop(
+            database.get_database_read_session, None)
+        self.app.dependency_overrides.pop(
+            database.get_database_read_async_session, None)
+        self.app.dependency_overrides.pop(
+            services.config.get_configuration, None)
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -153,5 +221,7 @@ class TestCase(unittest.IsolatedAsyncioTestCase):
         """
         cls.patch_config.stop()
         cls.patch_logger.stop()
+        cls.engine.dispose()
+        asyncio.run(cls.async_engine.dispose())
 
 # ---------------------------------------------------------------------------- #
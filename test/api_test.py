@@ -1,9 +1,16 @@
 # ---------------------------------------------------------------------------- #
 
 import fastapi
+import json
+from starlette.types import Message
+from unittest.mock import patch
+from typing import Any, Dict, List
 
 # ---------------------------------------------------------------------------- #
 
+import app.database as database
+import app.schemas as schemas
+import app.services as services
 from test._testcase import TestCase
 
 # ---------------------------------------------------------------------------- #
@@ -34,14 +41,63 @@ class TestV1API(TestCase):
 
     def test_user_login(self) -> None:
         """
-        Test the user login endpoint to ensure it returns a 500 status code,
-        as the login functionality is not yet implemented.
+        Test the user login endpoint to ensure a token is issued for valid
+        credentials and that the token can be used to authenticate.
         """
+        self.client.post(
+            f"{self.api_version}/user/create",
+            json={
+                "username": "testuser",
+                "email": "test@example.com",
+                "password": "testpassword"
+            }
+        )
+
         response = self.client.post(
-            f"{self.api_version}/user/login")
+            f"{self.api_version}/user/login",
+            json={"username": "testuser", "password": "testpassword"}
+        )
 
-        assert response.status_code == \
-            fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.status_code == 200
+        assert response.json()["token_type"] == "bearer"
+
+        response = self.client.get(
+            f"{self.api_version}/user/me",
+            headers={
+                "Authorization": f"Bearer {response.json()['access_token']}"
+            }
+        )
+
+        assert response.status_code == 200
+        assert response.json()["sub"] == "testuser"
+
+    def test_user_login_invalid(self) -> None:
+        """
+        Test the user login endpoint to ensure invalid credentials and
+        missing tokens are rejected.
+        """
+        self.client.post(
+            f"{self.api_version}/user/create",
+            json={
+                "username": "testuser",
+                "email": "test@example.com",
+                "password": "testpassword"
+            }
+        )
+
+        for username, password in [("testuser", "wrongpassword"),
+                                   ("unknown", "testpassword")]:
+            response = self.client.post(
+                f"{self.api_version}/user/login",
+                json={"username": username, "password": password}
+            )
+
+            assert response.status_code == \
+                fastapi.status.HTTP_401_UNAUTHORIZED
+
+        response = self.client.get(f"{self.api_version}/user/me")
+
+        assert response.status_code == fastapi.status.HTTP_401_UNAUTHORIZED
 
     def test_user_create(self) -> None:
         """
@@ -60,4 +116,340 @@ class TestV1API(TestCase):
         assert response.status_code == 200
         assert "message" in response.json()
 
+    def test_user_bulk_create(self) -> None:
+        """
+        Test the bulk user creation endpoint to ensure users are created and
+        conflicts are reported without failing the request.
+        """
+        user = {
+            "username": "testuser",
+            "email": "test@example.com",
+            "password": "testpassword"
+        }
+        response = self.client.post(
+            f"{self.api_version}/user/bulk",
+            json=[user, {**user, "email": "other@example.com"}]
+        )
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 1
+        assert response.json()["conflicts"][0]["index"] == 1
+        assert response.json()["conflicts"][0]["fields"] == ["username"]
+
+    def test_user_bulk_create_job(self) -> None:
+        """
+        Test the bulk user creation job to ensure the job is returned
+        immediately and its result can be polled.
+        """
+        user = {
+            "username": "testuser",
+            "email": "test@example.com",
+            "password": "testpassword"
+        }
+        database.get_database()._engine = self.engine
+        try:
+            with patch.object(self.config.workers, "enabled", True):
+                response = self.client.post(
+                    f"{self.api_version}/user/bulk/job",
+                    json=[user, {**user, "email": "other@example.com"}]
+                )
+            services.get_worker_pool().shutdown(wait=True)
+        finally:
+            services.get_worker_pool.cache_clear()
+            database.get_database()._engine = None
+
+        assert response.status_code == 202
+        assert response.json()["name"] == "user_bulk_create"
+
+        response = self.client.get(
+            f"{self.api_version}/jobs/{response.json()['id']}")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"]["created"] == 1
+        assert response.json()["result"]["conflicts"][0]["index"] == 1
+
+    def test_user_bulk_create_job_process_mode(self) -> None:
+        """
+        Test the bulk user creation job with process workers, which must
+        still run on a thread with the database of this process.
+        """
+        user = {
+            "username": "testuser",
+            "email": "test@example.com",
+            "password": "testpassword"
+        }
+        database.get_database()._engine = self.engine
+        try:
+            with patch.object(self.config.workers, "enabled", True), \
+                    patch.object(self.config.workers, "mode",
+                                 schemas.WorkerModeEnum.PROCESS):
+                response = self.client.post(
+                    f"{self.api_version}/user/bulk/job", json=[user])
+                services.get_thread_worker_pool().shutdown(wait=True)
+        finally:
+            services.worker._get_thread_worker_pool.cache_clear()
+            database.get_database()._engine = None
+
+        assert response.status_code == 202
+        assert services.get_worker_pool.cache_info().currsize == 0
+
+        response = self.client.get(
+            f"{self.api_version}/jobs/{response.json()['id']}")
+
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["result"]["created"] == 1
+
+    def test_user_list(self) -> None:
+        """
+        Test the user listing endpoint to ensure users are paged by cursor
+        and passwords are never returned.
+        """
+        self.client.post(
+            f"{self.api_version}/user/bulk",
+            json=[
+                {
+                    "username": f"testuser{i}",
+                    "email": f"test{i}@example.com",
+                    "password": "testpassword"
+                }
+                for i in range(5)
+            ]
+        )
+        headers = {
+            "Authorization":
+                f"Bearer {services.create_token(user_id=1, username='x')}"
+        }
+
+        usernames = []
+        cursor = None
+        while True:
+            params: Dict[str, Any] = {"sort": "username", "limit": 2}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = self.client.get(
+                f"{self.api_version}/user", params=params, headers=headers)
+
+            assert response.status_code == 200
+            assert all("password" not in user
+                       for user in response.json()["users"])
+            usernames += [user["username"]
+                          for user in response.json()["users"]]
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+
+        assert usernames == [f"testuser{i}" for i in range(5)]
+
+        response = self.client.get(
+            f"{self.api_version}/user",
+            params={"disabled": True},
+            headers=headers
+        )
+        assert response.json() == {"users": [], "next_cursor": None}
+
+    def test_user_export(self) -> None:
+        """
+        Test the user export endpoint to ensure all users are streamed as
+        CSV or NDJSON without passwords.
+        """
+        self.client.post(
+            f"{self.api_version}/user/bulk",
+            json=[
+                {
+                    "username": f"testuser{i}",
+                    "email": f"test{i}@example.com",
+                    "password": "testpassword"
+                }
+                for i in range(3)
+            ]
+        )
+        headers = {
+            "Authorization":
+                f"Bearer {services.create_token(user_id=1, username='x')}"
+        }
+
+        database_instance = database.get_database()
+        database_instance._async_engine = self.async_engine
+        try:
+            with patch.object(self.config.database, "stream_chunk_size", 2):
+                csv_response = self.client.get(
+                    f"{self.api_version}/user/export", headers=headers)
+                ndjson_response = self.client.get(
+                    f"{self.api_version}/user/export",
+                    params={"format": "ndjson"},
+                    headers=headers
+                )
+        finally:
+            database_instance._async_engine = None
+
+        assert csv_response.status_code == 200
+        assert csv_response.headers["content-type"].startswith("text/csv")
+        assert "users.csv" in csv_response.headers["content-disposition"]
+        assert csv_response.text.splitlines() == [
+            "id,username,email,disabled",
+            "1,testuser0,test0@example.com,False",
+            "2,testuser1,test1@example.com,False",
+            "3,testuser2,test2@example.com,False",
+        ]
+
+        assert ndjson_response.status_code == 200
+        records = [json.loads(line) for line in ndjson_response.iter_lines()]
+        assert [record["username"] for record in records] == [
+            "testuser0", "testuser1", "testuser2"]
+        assert all("password" not in record for record in records)
+
+        response = self.client.get(f"{self.api_version}/user/export")
+        assert response.status_code == fastapi.status.HTTP_401_UNAUTHORIZED
+
+    def test_user_list_invalid(self) -> None:
+        """
+        Test the user listing endpoint to ensure invalid cursors and missing
+        tokens are rejected.
+        """
+        headers = {
+            "Authorization":
+                f"Bearer {services.create_token(user_id=1, username='x')}"
+        }
+
+        response = self.client.get(
+            f"{self.api_version}/user",
+            params={"cursor": "invalid"},
+            headers=headers
+        )
+        assert response.status_code == fastapi.status.HTTP_400_BAD_REQUEST
+
+        # a cursor of the username order is not valid for the id order
+        response = self.client.get(
+            f"{self.api_version}/user",
+            params={"cursor": "WyJ1c2VybmFtZSIsICJhIl0="},
+            headers=headers
+        )
+        assert response.status_code == fastapi.status.HTTP_400_BAD_REQUEST
+
+        response = self.client.get(f"{self.api_version}/user")
+        assert response.status_code == fastapi.status.HTTP_401_UNAUTHORIZED
+
+    def test_jobs_get_unknown(self) -> None:
+        """
+        Test the job status endpoint with an unknown job id.
+        """
+        response = self.client.get(f"{self.api_version}/jobs/unknown")
+
+        assert response.status_code == 404
+
+    def test_user_import(self) -> None:
+        """
+        Test the NDJSON user import endpoint to ensure users are written in
+        batches and a progress record is streamed back for each batch.
+        """
+        lines = [
+            json.dumps({
+                "username": f"testuser{i}",
+                "email": f"test{i}@example.com",
+                "password": "testpassword"
+            })
+            for i in range(3)
+        ]
+        lines.insert(1, "")
+        lines.append('{"username": "x"}')
+        lines.append(lines[0])
+
+        database_instance = database.get_database()
+        database_instance._async_engine = self.async_engine
+        try:
+            with patch.object(self.config.database, "bulk_chunk_size", 2):
+                response = self.client.post(
+                    f"{self.api_version}/user/import",
+                    content="\n".join(lines).encode(),
+                    headers={"content-type": "application/x-ndjson"}
+                )
+        finally:
+            database_instance._async_engine = None
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        records = [json.loads(line) for line in response.iter_lines()]
+
+        assert [record["batch"] for record in records] == [1, 2, 3, 3]
+        assert records[1]["errors"][0]["line"] == 4
+        assert records[2]["conflicts"][0]["index"] == 5
+        assert records[-1]["done"]
+        assert records[-1]["lines"] == 6
+        assert records[-1]["created"] == 3
+
+    async def test_user_import_gzip(self) -> None:
+        """
+        Test the NDJSON user import endpoint streams a progress record per
+        batch to clients accepting gzip, instead of the GZipMiddleware
+        holding them back until the import is done.
+        """
+        body = "\n".join(
+            json.dumps({
+                "username": f"testuser{i}",
+                "email": f"test{i}@example.com",
+                "password": "testpassword"
+            })
+            for i in range(4)
+        ).encode()
+        messages: List[Message] = []
+
+        async def receive() -> Message:
+            """
+            Helper to receive the whole request body at once.
+            """
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message: Message) -> None:
+            """
+            Helper to record the messages as they are sent.
+            """
+            messages.append(message)
+
+        database_instance = database.get_database()
+        database_instance._async_engine = self.async_engine
+        try:
+            with patch.object(self.config.database, "bulk_chunk_size", 2):
+                await self.app({
+                    "type": "http",
+                    "asgi": {"version": "3.0"},
+                    "http_version": "1.1",
+                    "method": "POST",
+                    "scheme": "http",
+                    "path": f"{self.api_version}/user/import",
+                    "raw_path": f"{self.api_version}/user/import".encode(),
+                    "query_string": b"",
+                    "root_path": "",
+                    "headers": [
+                        (b"content-type", b"application/x-ndjson"),
+                        (b"accept-encoding", b"gzip"),
+                    ],
+                    "client": ("testclient", 50000),
+                    "server": ("testserver", 80),
+                }, receive, send)
+        finally:
+            database_instance._async_engine = None
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"content-encoding"] == b"identity"
+
+        chunks = [message["body"] for message in messages[1:]
+                  if message.get("body")]
+        # one chunk per batch and one for the final record
+        assert len(chunks) == 3
+        assert [json.loads(chunk)["batch"] for chunk in chunks] == [1, 2, 2]
+
+    def test_user_import_content_type(self) -> None:
+        """
+        Test the NDJSON user import endpoint rejects other content types.
+        """
+        response = self.client.post(
+            f"{self.api_version}/user/import",
+            json=[]
+        )
+
+        assert response.status_code == \
+            fastapi.status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
 # ---------------------------------------------------------------------------- #
@@ -3,14 +3,16 @@
 import fastapi
 from fastapi.exceptions import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from unittest.mock import patch
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, Mock, patch
 from contextlib import ExitStack
 
 # ---------------------------------------------------------------------------- #
 
 import app.core as core
 import app.services as services
-from app.core.exceptions import exception_handler, http_exception_handler
+from app.core.exceptions import exception_handler, \
+    http_exception_handler, worker_pool_full_handler
 from test._testcase import TestCase
 
 # ---------------------------------------------------------------------------- #
@@ -48,6 +50,33 @@ class TestApp(TestCase):
         assert mock_router.called
         assert mock_exception_handler.called
 
+    def test_create_app_metrics(self) -> None:
+        """
+        Test if the metrics endpoint is added at the configured path.
+        """
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch.object(self.config.metrics, "enabled", True))
+            stack.enter_context(
+                patch.object(self.config.metrics, "path", "/test-metrics"))
+            app = core.create_app()
+
+        client = TestClient(app)
+        client.get("/api/v1/jobs/unknown")
+        client.get("/test/fake-route")
+        response = client.get("/test-metrics")
+
+        assert response.status_code == fastapi.status.HTTP_200_OK
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert 'http_requests_total{method="GET",' \
+            'route="/api/v1/jobs/{job_id}",status="404"}' in response.text
+        assert 'http_requests_total{method="GET",' \
+            'route="<unmatched>",status="404"}' in response.text
+        assert 'http_request_duration_seconds_count{method="GET",' \
+            'route="/api/v1/jobs/{job_id}"}' in response.text
+        assert 'http_requests_in_flight{method="GET",' \
+            'route="/test-metrics"} 1.0' in response.text
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -76,6 +105,75 @@ class TestLifespan(TestCase):
             assert mock_disconnect.called
             assert response.status_code == fastapi.status.HTTP_404_NOT_FOUND
 
+    def test_lifespan_shutdown_order(self) -> None:
+        """
+        Test if the lifespan shuts down the worker pools before it
+        disconnects the database, so running jobs can store their results.
+        """
+        manager = Mock()
+        manager.attach_mock(AsyncMock(), "disconnect_async")
+        with ExitStack() as stack:
+            stack.enter_context(patch('app.database.Database.connect'))
+            stack.enter_context(patch(
+                'app.database.Database.disconnect', manager.disconnect))
+            stack.enter_context(patch(
+                'app.database.Database.disconnect_async',
+                manager.disconnect_async))
+            stack.enter_context(patch(
+                'app.services.get_worker_pool',
+                return_value=manager.worker_pool))
+            stack.enter_context(patch(
+                'app.services.get_thread_worker_pool',
+                return_value=manager.thread_worker_pool))
+            stack.enter_context(
+                patch.object(self.config.workers, "enabled", True))
+
+            with self.client:
+                pass
+
+        assert [call[0] for call in manager.mock_calls] == [
+            "worker_pool.shutdown",
+            "thread_worker_pool.shutdown",
+            "disconnect_async",
+            "disconnect",
+        ]
+
+    def test_lifespan_precompile_templates(self) -> None:
+        """
+        Test if the lifespan precompiles the templates if configured.
+        """
+        with ExitStack() as stack:
+            stack.enter_context(patch('app.database.Database.connect'))
+            stack.enter_context(patch('app.database.Database.disconnect'))
+            stack.enter_context(
+                patch.object(self.config.templates, "precompile", True))
+            mock_precompile = stack.enter_context(
+                patch('app.services.precompile_templates')
+            )
+
+            with self.client:
+                pass
+
+            assert mock_precompile.called
+
+    def test_lifespan_secret_key(self) -> None:
+        """
+        Test if the lifespan refuses to start with an empty secret key.
+        """
+        services.get_secret_key.cache_clear()
+        self.addCleanup(services.get_secret_key.cache_clear)
+        with ExitStack() as stack:
+            mock_connect = stack.enter_context(
+                patch('app.database.Database.connect'))
+            stack.enter_context(
+                patch.object(self.config.auth, "secret_key", ""))
+
+            with self.assertRaises(Exception):
+                with self.client:
+                    pass
+
+            assert not mock_connect.called
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -126,6 +224,20 @@ class TestExceptions(TestCase):
         assert response.status_code == fastapi.status.\
             HTTP_500_INTERNAL_SERVER_ERROR
 
+    async def test_worker_pool_full_handler(self) -> None:
+        """
+        Test if the worker pool full handler asks the client to retry.
+        """
+        response = await worker_pool_full_handler(
+            fastapi.Request(
+                scope={"type": "http", "path": "/test", "headers": []}),
+            services.WorkerPoolFullError("Worker pool queue is full.")
+        )
+
+        assert response.status_code == \
+            fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+
     def test_invalid_route(self) -> None:
         """
         Test that an invalid route returns a handled error.
@@ -1,12 +1,18 @@
 # ---------------------------------------------------------------------------- #
 
+import sqlalchemy
 import sqlmodel
+import threading
+import tracemalloc
+from unittest.mock import patch
+from typing import Dict, Iterator, List, Tuple
 
 # ---------------------------------------------------------------------------- #
 
 import app.crud as crud
 import app.schemas as schemas
 import app.models as models
+import app.services as services
 from test._testcase import TestCase
 
 # ---------------------------------------------------------------------------- #
@@ -37,8 +43,625 @@ class UserCrudTest(TestCase):
         assert isinstance(user, models.User)
         assert user.username == "testuser"
         assert user.email == "test@example.com"
-        assert user.password == "testpassword"
+        assert user.password != "testpassword"
+        assert services.verify_password("testpassword", user.password)
         assert user.disabled == False
 
+    async def test_create_user_async(self) -> None:
+        """
+        Test case for creating a new user with an async session.
+        """
+        result = await crud.create_user_async(
+            session=self.async_session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )
+        assert isinstance(result, models.User)
+
+        user = (await self.async_session.exec(
+            sqlmodel.select(models.User))).first()
+
+        assert user is not None
+        assert user.id == result.id
+        assert user.username == "testuser"
+        assert services.verify_password("testpassword", user.password)
+        assert user.disabled == False
+
+    def test_create_users(self) -> None:
+        """
+        Test case for creating multiple users in chunks, including conflicts
+        with existing users and within the batch.
+        """
+        crud.create_user(
+            session=self.session,
+            user=schemas.UserCreateSchema(
+                username="existing",
+                email="existing@example.com",
+                password="testpassword"
+            )
+        )
+
+        users = [
+            schemas.UserCreateSchema(
+                username=f"testuser{i}",
+                email=f"test{i}@example.com",
+                password="testpassword"
+            )
+            for i in range(5)
+        ]
+        users.append(schemas.UserCreateSchema(
+            username="existing",
+            email="new@example.com",
+            password="testpassword"
+        ))
+        users.append(schemas.UserCreateSchema(
+            username="testuser0",
+            email="test0@example.com",
+            password="testpassword"
+        ))
+
+        result = crud.create_users(
+            session=self.session, users=users, chunk_size=2)
+
+        assert result.created == 5
+        assert [(c.index, c.fields) for c in result.conflicts] == [
+            (5, ["username"]),
+            (6, ["username", "email"])
+        ]
+
+        count = len(self.session.exec(sqlmodel.select(models.User)).all())
+        assert count == 6
+
+    async def test_create_users_async(self) -> None:
+        """
+        Test case for creating multiple users with an async session.
+        """
+        users = [
+            schemas.UserCreateSchema(
+                username=f"testuser{i}",
+                email=f"test{i}@example.com",
+                password="testpassword"
+            )
+            for i in range(3)
+        ]
+
+        result = await crud.create_users_async(
+            session=self.async_session, users=users + users[:1])
+
+        assert result.created == 3
+        assert len(result.conflicts) == 1
+        assert result.conflicts[0].index == 3
+
+        count = len((await self.async_session.exec(
+            sqlmodel.select(models.User))).all())
+        assert count == 3
+
+    async def test_hash_outside_transaction(self) -> None:
+        """
+        Test case for hashing and verifying passwords without holding a
+        connection of the session.
+        """
+        users = [
+            schemas.UserCreateSchema(
+                username=f"testuser{i}",
+                email=f"test{i}@example.com",
+                password="testpassword"
+            )
+            for i in range(2)
+        ]
+        hash_password = services.hash_password
+        hash_passwords_async = services.hash_passwords_async
+        verify_password_async = services.verify_password_async
+
+        def check_hash(password: str) -> str:
+            """
+            Helper to hash a password, checking the sync session.
+            """
+            assert not self.session.in_transaction()
+            return hash_password(password)
+
+        async def check_hashes(passwords: List[str]) -> List[str]:
+            """
+            Helper to hash passwords, checking the async session.
+            """
+            assert not self.async_session.in_transaction()
+            return await hash_passwords_async(passwords)
+
+        async def check_verify(password: str, password_hash: str) -> bool:
+            """
+            Helper to verify a password, checking the async session.
+            """
+            assert not self.async_session.in_transaction()
+            return await verify_password_async(password, password_hash)
+
+        with patch("app.services.hash_password", check_hash):
+            result = crud.create_users(session=self.session, users=users)
+        assert result.created == 2
+
+        with patch("app.services.hash_passwords_async", check_hashes), \
+                patch("app.services.verify_password_async", check_verify):
+            result = await crud.create_users_async(
+                session=self.async_session, users=users)
+            assert result.created == 2
+
+            assert await crud.authenticate_user_async(
+                session=self.async_session,
+                username="testuser0",
+                password="testpassword"
+            ) is not None
+
+    async def test_dummy_hash_off_event_loop(self) -> None:
+        """
+        Test case for computing the dummy hash for unknown users off the
+        event loop.
+        """
+        crud.user._dummy_password_hash.cache_clear()
+        self.addCleanup(crud.user._dummy_password_hash.cache_clear)
+        hash_password = services.hash_password
+        threads: List[threading.Thread] = []
+
+        def record_thread(password: str) -> str:
+            """
+            Helper to hash a password, recording the calling thread.
+            """
+            threads.append(threading.current_thread())
+            return hash_password(password)
+
+        with patch("app.services.hash_password", record_thread):
+            assert await crud.authenticate_user_async(
+                session=self.async_session,
+                username="unknown",
+                password="testpassword"
+            ) is None
+
+        assert threads
+        assert threading.main_thread() not in threads
+
+    async def test_authenticate_user_async(self) -> None:
+        """
+        Test case for authenticating users, including cached lookups of
+        known and unknown usernames.
+        """
+        user_id = (await crud.create_user_async(
+            session=self.async_session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )).id
+
+        for _ in range(2):
+            credentials = await crud.authenticate_user_async(
+                session=self.async_session,
+                username="testuser",
+                password="testpassword"
+            )
+            assert credentials is not None
+            assert credentials.id == user_id
+
+            assert await crud.authenticate_user_async(
+                session=self.async_session,
+                username="testuser",
+                password="wrongpassword"
+            ) is None
+
+            assert await crud.authenticate_user_async(
+                session=self.async_session,
+                username="unknown",
+                password="testpassword"
+            ) is None
+
+        # one lookup each for the known and the unknown user
+        assert crud.get_crud_cache().misses == 2
+
+    async def test_authenticate_user_cached(self) -> None:
+        """
+        Test case for authenticating a user twice with one database read,
+        and reading the credentials again after the password is changed.
+        """
+        user_id = (await crud.create_user_async(
+            session=self.async_session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )).id
+        assert user_id is not None
+
+        reads = patch.object(
+            self.async_session, "exec", wraps=self.async_session.exec)
+        with reads as mock_exec:
+            for password in ("testpassword", "wrongpassword"):
+                await crud.authenticate_user_async(
+                    session=self.async_session,
+                    username="testuser",
+                    password=password
+                )
+            assert mock_exec.call_count == 1
+
+        await crud.update_user_async(
+            session=self.async_session,
+            user_id=user_id,
+            user=schemas.UserUpdateSchema(password="newpassword")
+        )
+        with reads as mock_exec:
+            assert await crud.authenticate_user_async(
+                session=self.async_session,
+                username="testuser",
+                password="newpassword"
+            ) is not None
+            assert mock_exec.call_count == 1
+
+    async def test_create_user_forgets_credentials(self) -> None:
+        """
+        Test case for creating a user whose username is negatively cached.
+        """
+        assert await crud.authenticate_user_async(
+            session=self.async_session,
+            username="testuser",
+            password="testpassword"
+        ) is None
+
+        await crud.create_user_async(
+            session=self.async_session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )
+
+        assert await crud.authenticate_user_async(
+            session=self.async_session,
+            username="testuser",
+            password="testpassword"
+        ) is not None
+
+    def test_get_users(self) -> None:
+        """
+        Test case for listing users by keyset pagination.
+        """
+        crud.create_users(
+            session=self.session,
+            users=[
+                schemas.UserCreateSchema(
+                    username=f"testuser{i}",
+                    email=f"test{i}@example.com",
+                    password="testpassword"
+                )
+                for i in (3, 1, 2, 0)
+            ]
+        )
+        disabled = self.session.exec(sqlmodel.select(models.User).where(
+            models.User.username == "testuser2")).one()
+        disabled.disabled = True
+        self.session.commit()
+
+        users = crud.get_users(session=self.session, after=1, limit=2)
+        assert [user.id for user in users] == [2, 3]
+        assert "password" not in users[0].model_dump()
+
+        users = crud.get_users(
+            session=self.session,
+            sort=schemas.UserSortEnum.USERNAME,
+            after="testuser0",
+            disabled=False
+        )
+        assert [user.username for user in users] == [
+            "testuser1", "testuser3"]
+
+    def test_iterate_users(self) -> None:
+        """
+        Test case for iterating over a large user table in chunks, holding
+        only one chunk in memory at a time.
+        """
+        count = 20000
+        self.session.execute(sqlalchemy.insert(models.User), [
+            {
+                "username": f"testuser{i}",
+                "email": f"test{i}@example.com",
+                "password": "x" * 100,
+                "disabled": False
+            }
+            for i in range(count)
+        ])
+        self.session.commit()
+
+        def measure(keep: bool) -> Tuple[int, int]:
+            """
+            Iterate over all users, optionally keeping them, and return the
+            number of users and the peak memory allocated meanwhile.
+            """
+            kept = []
+            seen = 0
+            tracemalloc.start()
+            try:
+                for users in crud.iterate_users(
+                        session=self.session, chunk_size=500):
+                    assert len(users) <= 500
+                    seen += len(users)
+                    if keep:
+                        kept.extend(users)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            return seen, peak
+
+        seen, streamed_peak = measure(keep=False)
+        assert seen == count
+        _, loaded_peak = measure(keep=True)
+
+        # memory is bounded by the chunk size, not by the number of users
+        assert streamed_peak * 5 < loaded_peak
+
+    def test_get_user_cached(self) -> None:
+        """
+        Test case for reading users by id and username through the crud
+        cache, including unknown users.
+        """
+        cache = crud.get_crud_cache()
+        assert crud.get_user_by_id(session=self.session, user_id=1) is None
+
+        crud.create_users(session=self.session, users=[
+            schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        ])
+
+        # the negatively cached id is forgotten by the bulk creation
+        user = crud.get_user_by_id(session=self.session, user_id=1)
+        assert user is not None
+        assert user.username == "testuser"
+        assert cache.misses == 2
+
+        user = crud.get_user_by_username(
+            session=self.session, username="testuser")
+        assert user is not None
+        assert user.id == 1
+        assert "password" not in user.model_dump()
+        assert cache.hits == 1
+
+    async def test_cache_without_password(self) -> None:
+        """
+        Test case for caching users without their password hash, under the
+        id, username and email.
+        """
+        user_id = (await crud.create_user_async(
+            session=self.async_session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )).id
+        assert await crud.authenticate_user_async(
+            session=self.async_session,
+            username="testuser",
+            password="testpassword"
+        ) is not None
+
+        cache = crud.get_crud_cache()
+        for key in (f"user:id:{user_id}", "user:username:testuser",
+                    "user:email:test@example.com"):
+            record = cache.get(key)
+            assert record["username"] == "testuser"
+            assert "password" not in record
+
+        user = await crud.get_user_by_email_async(
+            session=self.async_session, email="test@example.com")
+        assert user is not None
+        assert user.id == user_id
+        assert cache.misses == 1
+
+    def test_get_user_by_email(self) -> None:
+        """
+        Test case for reading users by email through the crud cache, which
+        forgets them when they are updated or deleted.
+        """
+        assert crud.get_user_by_email(
+            session=self.session, email="test@example.com") is None
+
+        user_id = crud.create_user(
+            session=self.session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        ).id
+        assert user_id is not None
+
+        user = crud.get_user_by_email(
+            session=self.session, email="test@example.com")
+        assert user is not None
+        assert user.id == user_id
+
+        crud.update_user(
+            session=self.session,
+            user_id=user_id,
+            user=schemas.UserUpdateSchema(email="new@example.com")
+        )
+        assert crud.get_user_by_email(
+            session=self.session, email="test@example.com") is None
+        user = crud.get_user_by_email(
+            session=self.session, email="new@example.com")
+        assert user is not None
+        assert user.id == user_id
+
+        assert crud.delete_user(session=self.session, user_id=user_id)
+        assert crud.get_user_by_email(
+            session=self.session, email="new@example.com") is None
+        assert crud.get_user_by_id(
+            session=self.session, user_id=user_id) is None
+        assert crud.get_user_by_username(
+            session=self.session, username="testuser") is None
+        assert not crud.delete_user(session=self.session, user_id=user_id)
+
+    async def test_update_user_async(self) -> None:
+        """
+        Test case for updating and disabling users, which forgets the cached
+        users.
+        """
+        user_id = (await crud.create_user_async(
+            session=self.async_session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )).id
+        assert await crud.authenticate_user_async(
+            session=self.async_session,
+            username="testuser",
+            password="testpassword"
+        ) is not None
+
+        updated = await crud.update_user_async(
+            session=self.async_session,
+            user_id=user_id,
+            user=schemas.UserUpdateSchema(
+                email="new@example.com", password="newpassword")
+        )
+        assert updated is not None
+        assert updated.email == "new@example.com"
+
+        credentials = await crud.authenticate_user_async(
+            session=self.async_session,
+            username="testuser",
+            password="newpassword"
+        )
+        assert credentials is not None
+        assert not credentials.disabled
+
+        await crud.disable_user_async(
+            session=self.async_session, user_id=user_id)
+        cached = await crud.get_user_by_id_async(
+            session=self.async_session, user_id=user_id)
+        assert cached is not None
+        assert cached.disabled
+        assert cached.email == "new@example.com"
+
+        assert await crud.disable_user_async(
+            session=self.async_session, user_id=42) is None
+
+    def test_disable_user(self) -> None:
+        """
+        Test case for disabling a user with a sync session.
+        """
+        user = crud.create_user(
+            session=self.session,
+            user=schemas.UserCreateSchema(
+                username="testuser",
+                email="test@example.com",
+                password="testpassword"
+            )
+        )
+        cached = crud.get_user_by_username(
+            session=self.session, username="testuser")
+        assert cached is not None
+        assert not cached.disabled
+
+        crud.disable_user(session=self.session, user_id=user.id)
+        cached = crud.get_user_by_username(
+            session=self.session, username="testuser")
+        assert cached is not None
+        assert cached.disabled
+
+# ---------------------------------------------------------------------------- #
+
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for a Redis client.
+    """
+    data: Dict[str, bytes]
+
+    def __init__(self) -> None:
+        """
+        Initialize the empty store.
+        """
+        self.data = {}
+
+    def get(self, name: str) -> bytes | None:
+        """
+        Get a value.
+        """
+        return self.data.get(name)
+
+    def set(self, name: str, value: str, px: int) -> None:
+        """
+        Set a value (expiry is ignored).
+        """
+        self.data[name] = value.encode()
+
+    def delete(self, *names: str) -> None:
+        """
+        Delete values.
+        """
+        for name in names:
+            self.data.pop(name, None)
+
+    def scan_iter(self, match: str) -> Iterator[str]:
+        """
+        Iterate over the keys with a prefix.
+        """
+        prefix = match.rstrip("*")
+        return iter([key for key in self.data if key.startswith(prefix)])
+
+# ---------------------------------------------------------------------------- #
+
+
+class CrudCacheTest(TestCase):
+    """
+    Test cases for the crud cache and its backends.
+    """
+
+    def test_redis_backend(self) -> None:
+        """
+        Test case for storing JSON values in a Redis-compatible client.
+        """
+        client = FakeRedis()
+        client.set("other", "{}", px=1)
+        backend = crud.RedisCacheBackend(client)
+
+        backend.set("user:id:1", {"id": 1}, ttl=30)
+        backend.set("user:id:2", None, ttl=5)
+        assert client.data["app:crud:user:id:1"] == b'{"id": 1}'
+        assert backend.get("user:id:1") == {"id": 1}
+        assert backend.get("user:id:2") is None
+
+        backend.delete("user:id:2")
+        with self.assertRaises(KeyError):
+            backend.get("user:id:2")
+
+        backend.clear()
+        assert list(client.data) == ["other"]
+
+    def test_crud_cache_metrics(self) -> None:
+        """
+        Test case for counting hits and misses per entity.
+        """
+        with patch.object(self.config.metrics, "enabled", True):
+            cache = crud.CrudCache(crud.MemoryCacheBackend(10, 30))
+
+        cache.set("user:id:1", {"id": 1})
+        cache.get("user:id:1")
+        with self.assertRaises(KeyError):
+            cache.get("user:id:2")
+
+        registry = services.get_metrics_registry()
+        hits = registry.counter("crud_cache_hits_total", "", ("entity",))
+        misses = registry.counter("crud_cache_misses_total", "", ("entity",))
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert hits.get(("user",)) >= 1
+        assert misses.get(("user",)) >= 1
+
 
 # ---------------------------------------------------------------------------- #
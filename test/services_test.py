@@ -1,17 +1,27 @@
 # ---------------------------------------------------------------------------- #
 
 import unittest
+import anyio.to_thread
+import gzip
 import os
 import pathlib
 import tempfile
 import logging
-from fastapi import Request, Response
+import asyncio
+import threading
+import time
+import concurrent.futures
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
 from fastapi.templating import Jinja2Templates
 from unittest.mock import patch
 from contextlib import ExitStack
+from starlette.types import Receive, Scope, Send
+from typing import Any, AsyncGenerator, Callable, List, Tuple
 
 # ---------------------------------------------------------------------------- #
 
+import app.database as database
 import app.services as services
 import app.schemas as schemas
 from test._testcase import TestCase
@@ -136,6 +146,188 @@ class StaticTest(TestCase):
         # as defined in the test configuration
         assert response.headers.get("Cache-Control") == "no-cache"
 
+    async def test_static_files_precompressed(self) -> None:
+        """
+        Test case for compressing static files and serving the gzip sidecar
+        if the client accepts it.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            content = b"body { color: red; }\n" * 100
+            pathlib.Path(directory, "style.css").write_bytes(content)
+            pathlib.Path(directory, "image.png").write_bytes(content)
+
+            assert services.compress_static_files(directory) >= 1
+            sidecar = pathlib.Path(directory, "style.css.gz")
+            assert gzip.decompress(sidecar.read_bytes()) == content
+            assert not pathlib.Path(directory, "image.png.gz").exists()
+
+            with patch.object(
+                    self.config.static_files, "precompressed", True):
+                static_files = services.StaticFilesWithHeaders(
+                    directory=directory)
+
+            async def get(
+                accept_encoding: str,
+                etag: str | None = None
+            ) -> Response:
+                """
+                Get the stylesheet with an Accept-Encoding header.
+                """
+                headers = [(b"accept-encoding", accept_encoding.encode())]
+                if etag is not None:
+                    headers.append((b"if-none-match", etag.encode()))
+                return await static_files.get_response("style.css", {
+                    "method": "GET", "type": "http", "path": "/style.css",
+                    "headers": headers
+                })
+
+            with patch("app.services.static.anyio.to_thread.run_sync",
+                       wraps=anyio.to_thread.run_sync) as run_sync:
+                response = await get("gzip, deflate")
+            # the sidecar and the file are looked up in one thread hop
+            run_sync.assert_called_once()
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["Content-Type"].startswith("text/css")
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert response.headers["Cache-Control"] == "no-cache"
+
+            response = await get("gzip", etag=response.headers["ETag"])
+            assert response.status_code == 304
+            assert response.headers["Vary"] == "Accept-Encoding"
+
+            response = await get("gzip;q=0, deflate")
+            assert "Content-Encoding" not in response.headers
+            assert response.headers["Vary"] == "Accept-Encoding"
+
+            # the file changed after the sidecar was written
+            modified = sidecar.stat().st_mtime + 10
+            os.utime(pathlib.Path(directory, "style.css"),
+                     (modified, modified))
+            response = await get("gzip, deflate")
+            assert response.status_code == 200
+            assert "Content-Encoding" not in response.headers
+            assert response.headers["Vary"] == "Accept-Encoding"
+
+    async def test_static_files_fingerprint(self) -> None:
+        """
+        Test case for the asset manifest and serving fingerprinted paths
+        with an immutable Cache-Control header.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            pathlib.Path(directory, "css").mkdir()
+            pathlib.Path(directory, "css", "site.css").write_bytes(b"a{}")
+            pathlib.Path(directory, "css", "site.css.gz").write_bytes(b"")
+
+            manifest = services.AssetManifest(directory)
+            hashed = manifest.url("/css/site.css")
+
+            assert len(manifest) == 1
+            assert hashed.startswith("css/site.") and hashed.endswith(".css")
+            assert hashed != "css/site.css"
+            assert manifest.resolve(hashed) == "css/site.css"
+            assert manifest.url("unknown.js") == "unknown.js"
+
+            with ExitStack() as stack:
+                stack.enter_context(patch.object(
+                    self.config.static_files, "fingerprint", True))
+                stack.enter_context(patch(
+                    "app.services.get_asset_manifest",
+                    return_value=manifest))
+                static_files = services.StaticFilesWithHeaders(
+                    directory=directory)
+                scope = {"method": "GET", "type": "http", "headers": []}
+
+                response = await static_files.get_response(hashed, scope)
+                assert response.status_code == 200
+                assert response.headers["Cache-Control"] == \
+                    services.IMMUTABLE_CACHE_CONTROL
+
+                response = await static_files.get_response(
+                    "css/site.css", scope)
+                assert response.status_code == 200
+                assert response.headers["Cache-Control"] == "no-cache"
+
+    def test_static_url(self) -> None:
+        """
+        Test case for the static_url Jinja global with fingerprinting.
+        """
+        manifest = unittest.mock.Mock()
+        manifest.url.return_value = "css/site.0123.css"
+        request = unittest.mock.Mock()
+        request.url_for.return_value.path = "/static/css/site.0123.css"
+
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(
+                self.config.static_files, "fingerprint", True))
+            stack.enter_context(patch(
+                "app.services.assets.get_asset_manifest",
+                return_value=manifest))
+            template = services.get_templates().env.from_string(
+                "{{ static_url('/css/site.css') }}")
+            rendered = template.render(request=request)
+
+        assert rendered == "/static/css/site.0123.css"
+        manifest.url.assert_called_once_with("/css/site.css")
+        request.url_for.assert_called_once_with(
+            "static", path="css/site.0123.css")
+
+# ---------------------------------------------------------------------------- #
+
+
+class HeadersTest(TestCase):
+    """
+    Test cases for header policies.
+    """
+
+    def test_header_policy(self) -> None:
+        """
+        Test case for compiling a policy and merging it into headers.
+        """
+        policy = services.HeaderPolicy(
+            {"Cache-Control": "no-cache", "X-Frame-Options": "DENY"})
+
+        assert policy.names == {b"cache-control", b"x-frame-options"}
+        assert policy.apply([(b"cache-control", b"no-store")]) == [
+            (b"cache-control", b"no-store"),
+            (b"x-frame-options", b"DENY")
+        ]
+        assert policy.apply([]) == list(policy.headers)
+        assert services.HeaderPolicy({}).apply([(b"a", b"b")]) == \
+            [(b"a", b"b")]
+
+    async def test_header_policy_middleware(self) -> None:
+        """
+        Test case for applying the policy of the longest matching prefix.
+        """
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await Response("{}")(scope, receive, send)
+
+        policies = {
+            "/api": {"Cache-Control": "no-store"},
+            "/api/v1/jobs/": {"Cache-Control": "no-cache"}
+        }
+        with patch.object(self.config.headers, "policies", policies):
+            middleware = services.HeaderPolicyMiddleware(app)
+
+        async def get_headers(path: str) -> List[Tuple[bytes, bytes]]:
+            """
+            Send a request to path and return the response headers.
+            """
+            mock_send = unittest.mock.AsyncMock()
+            await middleware(
+                {"type": "http", "path": path, "headers": []},
+                unittest.mock.AsyncMock(),
+                mock_send
+            )
+            return mock_send.call_args_list[0].args[0]["headers"]
+
+        assert (b"cache-control", b"no-store") in await get_headers("/api")
+        assert (b"cache-control", b"no-store") in \
+            await get_headers("/api/v1/user")
+        assert (b"cache-control", b"no-cache") in \
+            await get_headers("/api/v1/jobs/123")
+        assert b"cache-control" not in dict(await get_headers("/apix"))
+
 # ---------------------------------------------------------------------------- #
 
 
@@ -151,6 +343,32 @@ class TemplatesTest(TestCase):
         templates = services.get_templates()
         assert isinstance(templates, Jinja2Templates)
 
+    def test_precompile_templates(self) -> None:
+        """
+        Test case for compiling all templates into the bytecode cache.
+        """
+        services.get_templates.cache_clear()
+        with ExitStack() as stack:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            cache_directory = pathlib.Path(directory, "cache")
+            pathlib.Path(directory, "templates").mkdir()
+            pathlib.Path(directory, "templates", "a.html").write_text("A")
+            pathlib.Path(directory, "templates", "b.html").write_text("B")
+
+            for field, value in (
+                ("directory", str(pathlib.Path(directory, "templates"))),
+                ("auto_reload", False),
+                ("bytecode_cache", True),
+                ("bytecode_cache_directory", str(cache_directory)),
+            ):
+                stack.enter_context(
+                    patch.object(self.config.templates, field, value))
+            stack.callback(services.get_templates.cache_clear)
+
+            assert services.precompile_templates() == 2
+            assert not services.get_templates().env.auto_reload
+            assert len(list(cache_directory.iterdir())) == 2
+
     def test_middleware_init(self) -> None:
         """
         Test case for initializing the TemplateHeaderMiddleware.
@@ -158,68 +376,293 @@ class TemplatesTest(TestCase):
         middleware = services.TemplateHeaderMiddleware(self.app)
         assert isinstance(middleware, services.TemplateHeaderMiddleware)
         assert middleware._custom_headers == self.config.templates.headers
+        assert middleware._policy.headers == ((b"cache-control", b"no-cache"),)
         assert middleware._swagger_path == self.config.app.swagger_path
 
-    async def _create_mock_request(
+    async def _call_middleware(
         self,
-        path: str = "/",
-        content_type: str = "text/html"
-    ) -> Request:
+        response: Response,
+        path: str = "/"
+    ) -> List[Tuple[bytes, bytes]]:
         """
-        Helper to create a mock Request object.
+        Helper to send a request for a response through the
+        TemplateHeaderMiddleware and return the headers that were sent.
         """
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await response(scope, receive, send)
+
+        middleware = services.TemplateHeaderMiddleware(app)
         scope = {
             "type": "http",
             "asgi": {"version": "3.0"},
             "method": "GET",
             "path": path,
-            "headers": [
-                (b"content-type", content_type.encode())
-            ] if content_type else []
+            "headers": []
         }
         mock_receive = unittest.mock.AsyncMock()
         mock_send = unittest.mock.AsyncMock()
-        return Request(scope, mock_receive, mock_send)
 
-    async def test_middleware_dispatch(self) -> None:
+        await middleware(scope, mock_receive, mock_send)
+
+        message = mock_send.call_args_list[0].args[0]
+        assert message["type"] == "http.response.start"
+        return message["headers"]
+
+    async def test_middleware_call(self) -> None:
         """
-        Test case for dispatching a request through the
+        Test case for sending an HTML response through the
         TemplateHeaderMiddleware.
         """
-        middleware = services.TemplateHeaderMiddleware(self.app)
-
-        initial_response = Response(
-            "<html>Hello</html>", media_type="text/html", status_code=200)
-        mock_call_next = unittest.mock.AsyncMock(return_value=initial_response)
-
-        response = await middleware.dispatch(
-            request=await self._create_mock_request(),
-            call_next=mock_call_next
-        )
+        headers = await self._call_middleware(Response(
+            "<html>Hello</html>", media_type="text/html", status_code=200))
 
-        assert response.status_code == 200
         # as defined in the test configuration
-        assert response.headers.get("Cache-Control") == "no-cache"
+        assert (b"cache-control", b"no-cache") in headers
 
-    async def test_middleware_dispatch_existing_header(self) -> None:
+    async def test_middleware_call_existing_header(self) -> None:
         """
-        Test case for dispatching a request through the
+        Test case for sending a response through the
         TemplateHeaderMiddleware when the response already has a Cache-Control
         header.
         """
-        middleware = services.TemplateHeaderMiddleware(self.app)
-        initial_response = Response(
+        headers = await self._call_middleware(Response(
             "<html>Hello</html>", media_type="text/html", status_code=200,
-            headers={"Cache-Control": "no-store"})
-        mock_call_next = unittest.mock.AsyncMock(return_value=initial_response)
+            headers={"Cache-Control": "no-store"}))
 
-        response = await middleware.dispatch(
-            request=await self._create_mock_request(),
-            call_next=mock_call_next
-        )
+        assert (b"cache-control", b"no-store") in headers
+        assert (b"cache-control", b"no-cache") not in headers
 
-        assert response.status_code == 200
-        assert response.headers.get("Cache-Control") == "no-store"
+    async def test_middleware_call_other_content(self) -> None:
+        """
+        Test case for sending non-HTML and Swagger UI responses through the
+        TemplateHeaderMiddleware, which must not add headers.
+        """
+        headers = await self._call_middleware(Response(
+            "{}", media_type="application/json", status_code=200))
+        assert (b"cache-control", b"no-cache") not in headers
+
+        headers = await self._call_middleware(Response(
+            "<html>Docs</html>", media_type="text/html", status_code=200),
+            path=self.config.app.swagger_path)
+        assert (b"cache-control", b"no-cache") not in headers
+
+    def _request(self, if_none_match: str | None = None) -> Request:
+        """
+        Helper to create a GET request, optionally conditional.
+        """
+        headers = []
+        if if_none_match is not None:
+            headers.append((b"if-none-match", if_none_match.encode()))
+        return Request({
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "headers": headers
+        })
+
+    def test_render_template(self) -> None:
+        """
+        Test case for rendering a template with an ETag and answering a
+        conditional request with 304.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            pathlib.Path(directory, "page.html").write_text(
+                "<html>{{ title }}</html>")
+            templates = Jinja2Templates(directory=directory)
+
+            response = services.render_template(
+                templates, self._request(), "page.html", {"title": "Hi"})
+            assert response.status_code == 200
+            assert response.body == b"<html>Hi</html>"
+            etag = response.headers["etag"]
+            assert etag.startswith('W/"')
+
+            response = services.render_template(
+                templates, self._request(f'"other", {etag}'), "page.html",
+                {"title": "Hi"})
+            assert response.status_code == 304
+            assert response.body == b""
+            assert response.headers["etag"] == etag
+            assert response.headers["cache-control"] == "no-cache"
+
+            response = services.render_template(
+                templates, self._request(etag), "page.html",
+                {"title": "Changed"})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+
+    def test_render_template_etag_cache(self) -> None:
+        """
+        Test case for skipping the render of a conditional request if the
+        ETag of the template and context is cached.
+        """
+        services.get_etag_cache.cache_clear()
+        with ExitStack() as stack:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            stack.enter_context(patch.object(
+                self.config.templates, "etag_cache_size", 10))
+            stack.callback(services.get_etag_cache.cache_clear)
+
+            pathlib.Path(directory, "page.html").write_text(
+                "<html>{{ title }}</html>")
+            templates = Jinja2Templates(directory=directory)
+
+            response = services.render_template(
+                templates, self._request(), "page.html", {"title": "Hi"})
+            etag = response.headers["etag"]
+
+            render = stack.enter_context(patch.object(
+                templates, "TemplateResponse",
+                wraps=templates.TemplateResponse))
+
+            response = services.render_template(
+                templates, self._request(etag), "page.html", {"title": "Hi"})
+            assert response.status_code == 304
+            render.assert_not_called()
+
+            response = services.render_template(
+                templates, self._request(etag), "page.html",
+                {"title": "Changed"})
+            assert response.status_code == 200
+            render.assert_called_once()
+
+            # the template changed, the cached ETag must not be used
+            page = pathlib.Path(directory, "page.html")
+            page.write_text("<html><h1>{{ title }}</h1></html>")
+            modified = time.time() + 10
+            os.utime(page, (modified, modified))
+
+            response = services.render_template(
+                templates, self._request(etag), "page.html", {"title": "Hi"})
+            assert response.status_code == 200
+            assert response.body == b"<html><h1>Hi</h1></html>"
+
+# ---------------------------------------------------------------------------- #
+
+
+class PagesTest(TestCase):
+    """
+    Test cases for the rendered page cache.
+    """
+
+    def _create_client(
+        self,
+        stack: ExitStack,
+        **kwargs: Any
+    ) -> Tuple[TestClient, List[str]]:
+        """
+        Helper to create a client for an app with a cached endpoint. The
+        returned list collects the query strings of the rendered pages.
+        """
+        stack.enter_context(patch.object(
+            self.config.templates, "page_cache_size", 10))
+        services.get_page_cache.cache_clear()
+        stack.callback(services.get_page_cache.cache_clear)
+
+        rendered: List[str] = []
+        app = FastAPI()
+
+        @app.get("/page")
+        @services.cache_page(**kwargs)
+        async def page(request: Request, cookie: bool = False) -> Response:
+            rendered.append(request.url.query)
+            response = Response(
+                "<html>Page</html>", media_type="text/html",
+                headers={"ETag": '"page"'})
+            if cookie:
+                response.set_cookie("session", "secret")
+            return response
+
+        return TestClient(app), rendered
+
+    def test_cache_page(self) -> None:
+        """
+        Test case for caching pages by path and selected query parameters.
+        """
+        with ExitStack() as stack:
+            client, rendered = self._create_client(
+                stack, query_params=["page"])
+
+            assert client.get("/page?page=1").text == "<html>Page</html>"
+            assert client.get("/page?page=1&other=1").status_code == 200
+            assert client.get("/page?page=2").status_code == 200
+            assert rendered == ["page=1", "page=2"]
+
+            response = client.get(
+                "/page?page=1", headers={"If-None-Match": '"page"'})
+            assert response.status_code == 304
+            assert response.content == b""
+
+            client.get("/page?cookie=true")
+            client.get("/page?cookie=true")
+            assert rendered[2:] == ["cookie=true", "cookie=true"]
+
+    def test_cache_page_key(self) -> None:
+        """
+        Test case for caching pages by a key function.
+        """
+        with ExitStack() as stack:
+            client, rendered = self._create_client(
+                stack, key=lambda request: request.headers.get("user"))
+
+            client.get("/page", headers={"user": "a"})
+            client.get("/page", headers={"user": "a"})
+            client.get("/page", headers={"user": "b"})
+            assert len(rendered) == 2
+
+    def test_cache_page_host(self) -> None:
+        """
+        Test case for caching a page linking static files, which must not
+        contain the Host header of the request that rendered it.
+        """
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(
+                self.config.templates, "page_cache_size", 10))
+            services.get_page_cache.cache_clear()
+            stack.callback(services.get_page_cache.cache_clear)
+
+            app = FastAPI()
+            app.mount("/static", services.StaticFilesWithHeaders(
+                directory="."), name="static")
+            template = services.get_templates().env.from_string(
+                "<link href=\"{{ static_url('site.css') }}\">")
+
+            @app.get("/page")
+            @services.cache_page()
+            async def page(request: Request) -> Response:
+                return Response(template.render(request=request),
+                                media_type="text/html")
+
+            client = TestClient(app)
+            poisoned = client.get("/page", headers={"Host": "evil.example"})
+            response = client.get("/page", headers={"Host": "example.com"})
+
+            assert poisoned.text == '<link href="/static/site.css">'
+            assert response.text == poisoned.text
+
+    def test_cache_page_disabled(self) -> None:
+        """
+        Test case for rendering every page if the page cache is disabled.
+        """
+        with ExitStack() as stack:
+            client, rendered = self._create_client(stack)
+            stack.enter_context(patch.object(
+                self.config.templates, "page_cache_size", 0))
+
+            client.get("/page")
+            client.get("/page")
+            assert len(rendered) == 2
+
+    def test_cache_page_without_request(self) -> None:
+        """
+        Test case for decorating an endpoint without a request parameter.
+        """
+        async def page() -> None:
+            pass
+
+        with self.assertRaises(Exception):
+            services.cache_page()(page)
 
 # ---------------------------------------------------------------------------- #
 
@@ -262,6 +705,590 @@ class WorkerTest(TestCase):
         services.get_worker_pool.cache_clear()
         worker_pool = services.get_worker_pool()
         worker_pool.shutdown()
-        assert worker_pool._shutdown
+        assert worker_pool._closed
+
+    def _create_bounded_pool(
+        self,
+        policy: schemas.WorkerQueuePolicyEnum
+    ) -> services.WorkerPool:
+        """
+        Helper to create a worker pool with one worker and a queue of one.
+        """
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch.object(self.config.workers, "max_workers", 1))
+            stack.enter_context(
+                patch.object(self.config.workers, "max_queue_size", 1))
+            stack.enter_context(
+                patch.object(self.config.workers, "queue_policy", policy))
+            return services.ThreadWorkerPool()
+
+    async def test_worker_pool_run(self) -> None:
+        """
+        Test case for awaiting a task on the WorkerPool.
+        """
+        worker_pool = self._create_bounded_pool(
+            schemas.WorkerQueuePolicyEnum.REJECT)
+        result = await worker_pool.run(sum, [1, 2, 3])
+        worker_pool.shutdown(wait=True)
+        assert result == 6
+
+    async def test_worker_pool_reject(self) -> None:
+        """
+        Test case for rejecting tasks if the queue is full.
+        """
+        worker_pool = self._create_bounded_pool(
+            schemas.WorkerQueuePolicyEnum.REJECT)
+        event = threading.Event()
+
+        worker_pool.submit(event.wait)
+        worker_pool.submit(event.wait)
+        assert worker_pool.queue_size == 1
+
+        with self.assertRaises(services.WorkerPoolFullError):
+            worker_pool.submit(event.wait)
+        with self.assertRaises(services.WorkerPoolFullError):
+            await worker_pool.run(event.wait)
+
+        event.set()
+        worker_pool.shutdown(wait=True)
+        assert worker_pool.queue_size == 0
+
+    async def test_worker_pool_block(self) -> None:
+        """
+        Test case for waiting for room in the queue if it is full.
+        """
+        worker_pool = self._create_bounded_pool(
+            schemas.WorkerQueuePolicyEnum.BLOCK)
+        event = threading.Event()
+
+        worker_pool.submit(event.wait)
+        worker_pool.submit(event.wait)
+
+        task = asyncio.create_task(worker_pool.run(lambda: "done"))
+        await asyncio.sleep(0.05)
+        assert not task.done()
+
+        event.set()
+        assert await asyncio.wait_for(task, timeout=5) == "done"
+        worker_pool.shutdown(wait=True)
+
+    async def test_worker_pool_drop_oldest(self) -> None:
+        """
+        Test case for dropping the oldest queued task if the queue is full.
+        """
+        worker_pool = self._create_bounded_pool(
+            schemas.WorkerQueuePolicyEnum.DROP_OLDEST)
+        event = threading.Event()
+
+        running = worker_pool.submit(event.wait)
+        queued = worker_pool.submit(event.wait)
+        newest = worker_pool.submit(lambda: "done")
+
+        assert queued.cancelled()
+        assert not running.cancelled()
+
+        event.set()
+        assert newest.result(timeout=5) == "done"
+        worker_pool.shutdown(wait=True)
+
+    async def test_worker_pool_process_mode(self) -> None:
+        """
+        Test case for running a task on the process worker pool.
+        """
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch.object(self.config.workers, "max_workers", 1))
+            worker_pool = services.create_worker_pool(
+                schemas.WorkerModeEnum.PROCESS)
+
+        assert isinstance(worker_pool, services.ProcessWorkerPool)
+        result = await worker_pool.run(sum, [1, 2, 3])
+        worker_pool.shutdown(wait=True)
+        assert result == 6
+        assert worker_pool.queue_size == 0
+
+    async def test_worker_pool_metrics(self) -> None:
+        """
+        Test case for the metrics of the WorkerPool.
+        """
+        registry = services.get_metrics_registry()
+        queue_wait = registry.histogram(
+            "worker_pool_queue_wait_seconds", "", ("pool",))
+        run_time = registry.histogram(
+            "worker_pool_task_duration_seconds", "", ("pool",))
+        count = queue_wait.get_count(("thread",))
+
+        with patch.object(self.config.metrics, "enabled", True):
+            worker_pool = self._create_bounded_pool(
+                schemas.WorkerQueuePolicyEnum.REJECT)
+        await asyncio.gather(
+            worker_pool.run(time.sleep, .05),
+            worker_pool.run(time.sleep, .05)
+        )
+        event = threading.Event()
+        worker_pool.submit(event.wait)
+        worker_pool.submit(event.wait)
+        with self.assertRaises(services.WorkerPoolFullError):
+            worker_pool.submit(event.wait)
+        assert 'worker_pool_queue_depth{pool="thread"} 1.0' in \
+            registry.render()
+        event.set()
+        worker_pool.shutdown(wait=True)
+
+        assert queue_wait.get_count(("thread",)) == count + 4
+        assert run_time.get_count(("thread",)) == count + 4
+        assert 'worker_pool_queue_depth{pool="thread"} 0.0' in \
+            registry.render()
+        assert registry.counter(
+            "worker_pool_rejected_tasks_total", "", ("pool",)
+        ).get(("thread",)) >= 1
+
+    async def test_worker_pool_metrics_two_pools(self) -> None:
+        """
+        Test case for the metrics of a process worker pool next to a thread
+        worker pool, which are kept apart by their pool label.
+        """
+        registry = services.get_metrics_registry()
+        queue_wait = registry.histogram(
+            "worker_pool_queue_wait_seconds", "", ("pool",))
+        counts = [queue_wait.get_count((pool,))
+                  for pool in ("process", "thread")]
+
+        with patch.object(self.config.metrics, "enabled", True):
+            process_pool = services.ProcessWorkerPool()
+            thread_pool = services.ThreadWorkerPool()
+        try:
+            await process_pool.run(sum, [1, 2, 3])
+            await thread_pool.run(sum, [1, 2, 3])
+            await thread_pool.run(sum, [1, 2, 3])
+            rendered = registry.render()
+        finally:
+            process_pool.shutdown(wait=True)
+            thread_pool.shutdown(wait=True)
+
+        assert [queue_wait.get_count((pool,))
+                for pool in ("process", "thread")] == \
+            [counts[0] + 1, counts[1] + 2]
+        for pool in ("process", "thread"):
+            assert f'worker_pool_max_workers{{pool="{pool}"}} ' \
+                f'{float(self.config.workers.max_workers)}' in rendered
+
+    def test_worker_pool_interpreter_mode(self) -> None:
+        """
+        Test case for the subinterpreter mode, which falls back to processes
+        if subinterpreters are not available.
+        """
+        worker_pool = services.create_worker_pool(
+            schemas.WorkerModeEnum.INTERPRETER)
+
+        if hasattr(concurrent.futures, "InterpreterPoolExecutor"):
+            assert type(worker_pool).__name__ == "InterpreterWorkerPool"
+        else:
+            assert isinstance(worker_pool, services.ProcessWorkerPool)
+        worker_pool.shutdown(wait=True)
+
+# ---------------------------------------------------------------------------- #
+
+
+class NDJSONTest(TestCase):
+    """
+    Test cases for NDJSON streaming helpers.
+    """
+
+    async def _stream(self, chunks: List[bytes]) -> AsyncGenerator[bytes]:
+        """
+        Helper to turn a list of chunks into an async byte stream.
+        """
+        for chunk in chunks:
+            yield chunk
+
+    async def test_iterate_ndjson_lines(self) -> None:
+        """
+        Test case for splitting a chunked stream into lines.
+        """
+        lines = [
+            line async for line in services.iterate_ndjson_lines(
+                self._stream([b'{"a": 1}\n{"b"', b': 2}\n\n', b'{"c": 3}']))
+        ]
+
+        assert lines == [(0, b'{"a": 1}'), (1, b'{"b": 2}'), (3, b'{"c": 3}')]
+
+    async def test_iterate_ndjson_lines_too_long(self) -> None:
+        """
+        Test case for rejecting lines exceeding the maximum length.
+        """
+        with self.assertRaises(services.NDJSONLineTooLongError):
+            async for _ in services.iterate_ndjson_lines(
+                    self._stream([b"x" * 10, b"x" * 10]), max_line_length=15):
+                pass
+
+# ---------------------------------------------------------------------------- #
+
+
+class PasswordsTest(TestCase):
+    """
+    Test cases for password hashing.
+    """
+
+    def test_hash_password(self) -> None:
+        """
+        Test case for hashing and verifying passwords with all algorithms.
+        """
+        for algorithm in schemas.PasswordAlgorithmEnum:
+            with patch.object(self.config.passwords, "algorithm", algorithm):
+                password_hash = services.hash_password("testpassword")
+
+            assert password_hash.startswith(f"{algorithm.value}$")
+            assert password_hash != services.hash_password("testpassword")
+            assert services.verify_password("testpassword", password_hash)
+            assert not services.verify_password("wrongpassword", password_hash)
+
+    def test_verify_password_malformed(self) -> None:
+        """
+        Test case for verifying passwords against malformed hashes.
+        """
+        assert not services.verify_password("testpassword", "testpassword")
+        assert not services.verify_password("testpassword", "md5$abc$def")
+        assert not services.verify_password("testpassword", "scrypt$1$a$b")
+
+    async def test_hash_password_async(self) -> None:
+        """
+        Test case for hashing and verifying passwords off the event loop.
+        """
+        password_hash = await services.hash_password_async("testpassword")
+
+        assert await services.verify_password_async(
+            "testpassword", password_hash)
+        assert not await services.verify_password_async(
+            "wrongpassword", password_hash)
+
+    async def test_hash_passwords_async(self) -> None:
+        """
+        Test case for hashing many passwords in slices off the event loop.
+        """
+        passwords = [f"testpassword{i}" for i in range(6)]
+        with patch.object(self.config.workers, "enabled", True):
+            password_hashes = await services.hash_passwords_async(passwords)
+
+        assert len(password_hashes) == len(passwords)
+        for password, password_hash in zip(passwords, password_hashes):
+            assert services.verify_password(password, password_hash)
+
+# ---------------------------------------------------------------------------- #
+
+
+class CacheTest(TestCase):
+    """
+    Test cases for the in-memory cache.
+    """
+
+    def test_cache(self) -> None:
+        """
+        Test case for getting, setting and deleting cached values.
+        """
+        cache: services.TTLCache[str, int | None] = services.TTLCache(
+            maxsize=10, ttl=60)
+
+        with self.assertRaises(KeyError):
+            cache.get("a")
+
+        cache.set("a", 1)
+        cache.set("b", None)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (2, 1)
+
+        cache.delete("a")
+        with self.assertRaises(KeyError):
+            cache.get("a")
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_cache_eviction(self) -> None:
+        """
+        Test case for evicting least recently used and expired values.
+        """
+        cache: services.TTLCache[str, int] = services.TTLCache(
+            maxsize=2, ttl=60)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        with self.assertRaises(KeyError):
+            cache.get("b")
+        assert cache.get("a") == 1
+
+        cache.set("d", 4, ttl=-1)
+        with self.assertRaises(KeyError):
+            cache.get("d")
+
+    def test_cache_weight(self) -> None:
+        """
+        Test case for evicting values if the total weight is exceeded.
+        """
+        cache: services.TTLCache[str, bytes] = services.TTLCache(
+            maxsize=10, ttl=60, maxweight=10, weigh=len)
+
+        cache.set("a", b"1234")
+        cache.set("b", b"1234")
+        cache.set("a", b"12")
+        assert cache.weight == 6
+
+        cache.set("c", b"12345")
+        assert cache.weight == 7
+        with self.assertRaises(KeyError):
+            cache.get("b")
+
+        cache.set("d", b"12345678901")
+        assert cache.weight == 7
+        with self.assertRaises(KeyError):
+            cache.get("d")
+
+        cache.delete("c")
+        assert cache.weight == 2
+
+# ---------------------------------------------------------------------------- #
+
+
+class TokensTest(TestCase):
+    """
+    Test cases for access tokens.
+    """
+
+    def setUp(self) -> None:
+        """
+        Make sure the secret key is read from the test configuration.
+        """
+        super().setUp()
+        services.tokens.get_secret_key.cache_clear()
+
+    def test_create_token(self) -> None:
+        """
+        Test case for creating and decoding a token.
+        """
+        token = services.create_token(user_id=1, username="testuser")
+        payload = services.decode_token(token)
+
+        assert payload.sub == "testuser"
+        assert payload.uid == 1
+        assert payload.exp - payload.iat == \
+            self.config.auth.token_expire_minutes * 60
+
+    def test_decode_token_invalid(self) -> None:
+        """
+        Test case for rejecting tampered, malformed and expired tokens.
+        """
+        token = services.create_token(user_id=1, username="testuser")
+        header, payload, signature = token.split(".")
+        tampered = services.create_token(user_id=2, username="admin")
+
+        for invalid in [
+            f"{header}.{tampered.split('.')[1]}.{signature}",
+            f"{header}.{payload}",
+            "not-a-token",
+            f"{header}.{payload}.!!!!"
+        ]:
+            with self.assertRaises(services.InvalidTokenError):
+                services.decode_token(invalid)
+
+        with patch.object(self.config.auth, "token_expire_minutes", -1):
+            expired = services.create_token(user_id=1, username="testuser")
+        with self.assertRaises(services.InvalidTokenError):
+            services.decode_token(expired)
+
+    def test_secret_key_too_short(self) -> None:
+        """
+        Test case for rejecting empty and short secret keys, e.g. an empty
+        SECRET_KEY environment variable.
+        """
+        self.addCleanup(services.tokens.get_secret_key.cache_clear)
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(
+                self.config.auth, "secret_key", "{{SECRET_KEY}}"))
+            stack.enter_context(patch.dict(os.environ, {"SECRET_KEY": ""}))
+            with self.assertRaises(Exception):
+                services.get_secret_key()
+            with self.assertRaises(Exception):
+                services.create_token(user_id=1, username="testuser")
+
+        with patch.object(self.config.auth, "secret_key", "x" * 31):
+            with self.assertRaises(Exception):
+                services.get_secret_key()
+
+# ---------------------------------------------------------------------------- #
+
+
+class JobsTest(TestCase):
+    """
+    Test cases for the background job subsystem.
+    """
+
+    async def _run_job(
+        self,
+        job_manager: services.JobManager,
+        fn: Callable[..., Any],
+        *args: Any
+    ) -> schemas.JobSchema | None:
+        """
+        Helper to run a job on the worker pool until it has finished and
+        return its final state.
+        """
+        try:
+            with patch.object(self.config.workers, "enabled", True):
+                job = await job_manager.submit("test", fn, *args)
+            assert job.status == schemas.JobStatusEnum.PENDING
+            services.get_worker_pool().shutdown(wait=True)
+        finally:
+            services.get_worker_pool.cache_clear()
+        return job_manager.get(job.id)
+
+    async def test_job_succeeded(self) -> None:
+        """
+        Test case for a job that returns a result.
+        """
+        job_manager = services.JobManager(store=services.MemoryJobStore())
+        job = await self._run_job(job_manager, sum, [1, 2, 3])
+
+        assert job is not None
+        assert job.status == schemas.JobStatusEnum.SUCCEEDED
+        assert job.result == 6
+        assert job.finished is not None
+
+    async def test_job_failed(self) -> None:
+        """
+        Test case for a job that raises an exception.
+        """
+        job_manager = services.JobManager(store=services.MemoryJobStore())
+        job = await self._run_job(job_manager, int, "invalid")
+
+        assert job is not None
+        assert job.status == schemas.JobStatusEnum.FAILED
+        assert job.error is not None and "ValueError" in job.error
+
+    async def test_job_running(self) -> None:
+        """
+        Test case for the status of a job that is running.
+        """
+        job_manager = services.JobManager(store=services.MemoryJobStore())
+        event = threading.Event()
+        try:
+            with patch.object(self.config.workers, "enabled", True):
+                job = await job_manager.submit("test", event.wait)
+            await asyncio.sleep(.1)
+            running = job_manager.get(job.id)
+            event.set()
+            services.get_worker_pool().shutdown(wait=True)
+        finally:
+            services.get_worker_pool.cache_clear()
+
+        assert running is not None
+        assert running.status == schemas.JobStatusEnum.RUNNING
+
+    async def test_job_workers_disabled(self) -> None:
+        """
+        Test case for submitting a job without the worker pool.
+        """
+        job_manager = services.JobManager(store=services.MemoryJobStore())
+        with self.assertRaises(Exception):
+            await job_manager.submit("test", sum, [1, 2, 3])
+
+    def test_memory_job_store_expired(self) -> None:
+        """
+        Test case for the expiry of jobs in the memory store.
+        """
+        with patch.object(self.config.jobs, "result_ttl", -1):
+            store = services.MemoryJobStore()
+        store.save(schemas.JobSchema(id="job", name="test", created=0))
+
+        assert store.get("job") is None
+
+    async def test_database_job_store(self) -> None:
+        """
+        Test case for running a job with the database store.
+        """
+        database.get_database()._engine = self.engine
+        try:
+            job_manager = services.JobManager(
+                store=services.DatabaseJobStore())
+            job = await self._run_job(job_manager, sum, [1, 2, 3])
+
+            with patch.object(self.config.jobs, "result_ttl", -1):
+                store = services.DatabaseJobStore()
+            store.save(schemas.JobSchema(id="job", name="test", created=0))
+            expired = store.get("job")
+        finally:
+            database.get_database()._engine = None
+
+        assert job is not None
+        assert job.status == schemas.JobStatusEnum.SUCCEEDED
+        assert job.result == 6
+        assert expired is None
+
+# ---------------------------------------------------------------------------- #
+
+
+class MetricsTest(TestCase):
+    """
+    Test cases for the metrics registry.
+    """
+
+    def test_counter(self) -> None:
+        """
+        Test case for rendering a counter with labels.
+        """
+        registry = services.MetricsRegistry()
+        counter = registry.counter("test_total", "Test.", ["path"])
+        counter.inc(labels=('/a"b',))
+        counter.inc(2, labels=('/a"b',))
+
+        assert registry.render() == (
+            "# HELP test_total Test.\n"
+            "# TYPE test_total counter\n"
+            'test_total{path="/a\\"b"} 3.0\n'
+        )
+
+    def test_gauge(self) -> None:
+        """
+        Test case for gauges that are set or read from a function.
+        """
+        registry = services.MetricsRegistry()
+        registry.gauge("test_set", "Test.").set(5)
+        registry.gauge("test_function", "Test.", function=lambda: 7)
+
+        assert "test_set 5.0\n" in registry.render()
+        assert "test_function 7.0\n" in registry.render()
+
+    def test_histogram(self) -> None:
+        """
+        Test case for the cumulative buckets of a histogram.
+        """
+        registry = services.MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Test.", buckets=[1])
+        histogram.observe(.5)
+        histogram.observe(2)
+
+        rendered = registry.render()
+        assert 'test_seconds_bucket{le="1.0"} 1\n' in rendered
+        assert 'test_seconds_bucket{le="+Inf"} 2\n' in rendered
+        assert "test_seconds_sum 2.5\n" in rendered
+        assert "test_seconds_count 2\n" in rendered
+
+    def test_registry_type_conflict(self) -> None:
+        """
+        Test case for asking for an existing metric with another type.
+        """
+        registry = services.MetricsRegistry()
+        registry.counter("test", "Test.")
+
+        assert registry.counter("test", "Test.") is not None
+        with self.assertRaises(Exception):
+            registry.gauge("test", "Test.")
+        with self.assertRaises(Exception):
+            registry.histogram("test", "Test.")
 
 # ---------------------------------------------------------------------------- #